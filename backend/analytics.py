@@ -0,0 +1,400 @@
+# backend/analytics.py
+import os, json, time, hashlib, datetime, tempfile
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy.orm import Session
+
+from .catalog import parse_grade
+from .mastery import KT_MASTERED
+
+# -------------------------------------------------------------
+# COHORT ANALYTICS
+# -------------------------------------------------------------
+# Reports across every child, e.g. "mastery per topic and Bloom level for
+# all Grade 5 children this term". Rows are read with the DBAPI cursor in
+# READ_CHUNK-row chunks straight into Arrow record batches (strings
+# dictionary-encoded to integer codes); answers are folded into per-attempt
+# counts chunk by chunk, so detail rows are never held in memory. Group-bys
+# are NumPy bincounts over combined key codes, and percentiles come from
+# one lexsort by (group, value) with index arithmetic per group.
+#
+# Results are written as Parquet under ANALYTICS_CACHE_DIR, keyed by the
+# report, its parameters and a fingerprint of the tables it read, so a
+# repeated request is a file read until new attempts arrive (or the entry
+# is older than ANALYTICS_CACHE_TTL, which also covers edits to profile
+# grades). Served by /admin/analytics/* (backend/routes/admin.py).
+#
+#     python -m backend.analytics scores --grade 5 --since 2026-01-05
+ANALYTICS_CACHE_DIR = os.getenv("ANALYTICS_CACHE_DIR", "./analytics_cache")
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", 6 * 3600))
+READ_CHUNK = 100_000
+REPORT_VERSION = 1  # bump when a report's output changes
+
+DIMENSIONS = ("grade", "subject", "topic", "bloom")
+PERCENTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+# -------------------------------------------------------------
+# LOADING
+# -------------------------------------------------------------
+def _read(db: Session, sql: str, params: tuple, schema: pa.Schema) -> pa.Table:
+    """Run `sql` and collect the rows as one Arrow record batch per READ_CHUNK rows."""
+    cursor = db.connection().connection.cursor()  # plain DBAPI rows, no Row objects
+    cursor.execute(sql, params)
+    batches = []
+    while chunk := cursor.fetchmany(READ_CHUNK):
+        columns = zip(*chunk)
+        batches.append(pa.RecordBatch.from_arrays(
+            [pa.array(c, type=f.type) for c, f in zip(columns, schema)], schema=schema))
+    cursor.close()
+    return pa.Table.from_batches(batches, schema=schema)
+
+
+def _encode(column: pa.ChunkedArray) -> tuple[np.ndarray, list]:
+    """(int32 code per row, distinct values); nulls get their own code."""
+    encoded = column.combine_chunks().dictionary_encode(null_encoding="encode")
+    return encoded.indices.to_numpy(zero_copy_only=False).astype(np.int32), encoded.dictionary.to_pylist()
+
+
+def _grades(db: Session, child_ids: np.ndarray) -> np.ndarray:
+    """Catalog grade per child id (-1 when the profile is gone or has no grade)."""
+    cursor = db.connection().connection.cursor()
+    cursor.execute("SELECT id, grade FROM child_profiles ORDER BY id")
+    profiles = cursor.fetchall()
+    cursor.close()
+    ids = np.array([p[0] for p in profiles], dtype=np.int64)
+    grades = np.array([parse_grade(p[1]) or -1 for p in profiles], dtype=np.int16)
+    if not len(ids):
+        return np.full(len(child_ids), -1, dtype=np.int16)
+    pos = np.minimum(np.searchsorted(ids, child_ids), len(ids) - 1)
+    return np.where(ids[pos] == child_ids, grades[pos], -1).astype(np.int16)
+
+
+def _window(since: datetime.date | None, until: datetime.date | None, column: str) -> tuple[list, list]:
+    """SQL conditions on a taken_at column for [since, until] (whole days)."""
+    clauses, params = [], []
+    if since:
+        clauses.append(f"{column} >= ?")
+        params.append(f"{since.isoformat()} 00:00:00")
+    if until:
+        clauses.append(f"{column} < ?")
+        params.append(f"{(until + datetime.timedelta(days=1)).isoformat()} 00:00:00")
+    return clauses, params
+
+
+def _cohort(db: Session, table: str, grade: int | None, subject: str | None) -> tuple[list, list]:
+    """
+    SQL conditions keeping one grade's children and one subject, so rows
+    outside the cohort are never fetched (a row costs far more to bring
+    into Python than to skip in SQLite). Profile grades are free text, so
+    the labels that parse to `grade` are looked up first.
+    """
+    clauses, params = [], []
+    if grade is not None:
+        cursor = db.connection().connection.cursor()
+        labels = [g for (g,) in cursor.execute("SELECT DISTINCT grade FROM child_profiles") if parse_grade(g) == grade]
+        cursor.close()
+        clauses.append(f"{table}.child_id IN (SELECT id FROM child_profiles WHERE grade IN "
+                       f"({', '.join('?' * len(labels)) or 'NULL'}))")
+        params += labels
+    if subject is not None:
+        clauses.append(f"{table}.subject = ?")
+        params.append(subject)
+    return clauses, params
+
+
+def _where(*conditions: tuple[list, list]) -> tuple[str, tuple]:
+    clauses = [c for cs, _ in conditions for c in cs]
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), tuple(p for _, ps in conditions for p in ps)
+
+
+ATTEMPT_SCHEMA = pa.schema([("id", pa.int64()), ("child_id", pa.int64()), ("subject", pa.string()),
+                            ("topic", pa.string()), ("bloom", pa.string()), ("score", pa.float64())])
+
+
+def load_attempts(db: Session, grade=None, subject=None, since=None, until=None) -> tuple[pa.Table, np.ndarray, np.ndarray]:
+    """
+    The cohort's attempts taken in the window as an Arrow table, plus
+    answered and correct counts per attempt (row-aligned). SQLite counts
+    the answers per attempt, so one row per attempt is fetched rather than
+    one per answer; only the window's attempt id range is visited.
+    """
+    where, params = _where(_cohort(db, "quiz_attempts", grade, subject), _window(since, until, "taken_at"))
+    attempts = _read(db, "SELECT id, IFNULL(child_id, 0), subject, topic, bloom_level, score FROM quiz_attempts"
+                         f"{where} ORDER BY id", params, ATTEMPT_SCHEMA)
+    ids = attempts.column("id").to_numpy()
+    answered = np.zeros(len(ids), dtype=np.int64)
+    correct = np.zeros(len(ids), dtype=np.int64)
+    if not len(ids):
+        return attempts, answered, correct
+
+    cursor = db.connection().connection.cursor()
+    cursor.execute("SELECT attempt_id, count(*), sum(picked_idx = correct_idx) FROM quiz_attempt_details "
+                   "WHERE attempt_id BETWEEN ? AND ? AND correct_idx >= 0 GROUP BY attempt_id",
+                   (int(ids[0]), int(ids[-1])))
+    while chunk := cursor.fetchmany(READ_CHUNK):
+        d = np.array(chunk, dtype=np.float64)  # sum() is NULL when no picked_idx is set: none correct
+        attempt = d[:, 0].astype(np.int64)
+        pos = np.minimum(np.searchsorted(ids, attempt), len(ids) - 1)
+        known = ids[pos] == attempt
+        answered[pos[known]] = d[known, 1]
+        correct[pos[known]] = np.nan_to_num(d[known, 2])
+    cursor.close()
+    return attempts, answered, correct
+
+
+MASTERY_SCHEMA = pa.schema([("child_id", pa.int64()), ("subject", pa.string()), ("topic", pa.string()),
+                            ("bloom", pa.string()), ("p_mastery", pa.float64()), ("observations", pa.int64())])
+
+
+def load_mastery(db: Session, grade=None, subject=None, since=None, until=None) -> pa.Table:
+    """
+    The cohort's topic_mastery rows; with a window, only rows whose topic
+    the child attempted inside it (an EXISTS probe on the attempts
+    (child, subject, topic, taken_at) index).
+    """
+    conditions = [_cohort(db, "topic_mastery", grade, subject)]
+    if since or until:
+        clauses, params = _window(since, until, "a.taken_at")
+        conditions.append(([
+            "EXISTS (SELECT 1 FROM quiz_attempts a WHERE a.child_id = topic_mastery.child_id AND "
+            "a.subject = topic_mastery.subject AND a.topic = topic_mastery.topic AND " + " AND ".join(clauses) + ")"
+        ], params))
+    where, params = _where(*conditions)
+    return _read(db, "SELECT child_id, subject, topic, bloom, p_mastery, observations FROM topic_mastery" + where,
+                 params, MASTERY_SCHEMA)
+
+
+# -------------------------------------------------------------
+# VECTORIZED GROUP-BY
+# -------------------------------------------------------------
+class Groups:
+    """Rows mapped to one group index per distinct combination of the chosen dimensions."""
+
+    def __init__(self, codes: dict[str, np.ndarray], values: dict[str, list], group_by: tuple[str, ...]):
+        n = len(next(iter(codes.values()))) if codes else 0
+        if group_by:
+            sizes = tuple(max(len(values[d]), 1) for d in group_by)
+            combined = np.ravel_multi_index(tuple(codes[d] for d in group_by), sizes)
+            uniq, self.index = np.unique(combined, return_inverse=True)
+            unravelled = np.unravel_index(uniq, sizes)
+            self.keys = [{d: values[d][int(c)] for d, c in zip(group_by, col)} for col in zip(*unravelled)]
+        else:
+            self.index = np.zeros(n, dtype=np.int64)
+            self.keys = [{}] if n else []
+        self.n = len(self.keys)
+
+    def count(self, mask: np.ndarray | None = None) -> np.ndarray:
+        idx = self.index if mask is None else self.index[mask]
+        return np.bincount(idx, minlength=self.n)
+
+    def total(self, weights: np.ndarray, mask: np.ndarray | None = None) -> np.ndarray:
+        if mask is None:
+            return np.bincount(self.index, weights=weights, minlength=self.n)
+        return np.bincount(self.index[mask], weights=weights[mask], minlength=self.n)
+
+    def distinct(self, ids: np.ndarray) -> np.ndarray:
+        """Distinct `ids` (e.g. children) per group."""
+        pairs = np.unique(np.stack((self.index, ids)), axis=1)
+        return np.bincount(pairs[0], minlength=self.n)
+
+    def percentiles(self, values: np.ndarray, qs=PERCENTILES) -> dict[float, np.ndarray]:
+        """
+        Linear-interpolated percentiles per group (numpy's default method),
+        NaN values ignored; NaN for groups with no values. One lexsort
+        orders every group's values; each percentile is then a gather.
+        """
+        ok = ~np.isnan(values)
+        group, v = self.index[ok], values[ok]
+        order = np.lexsort((v, group))
+        v = v[order]
+        counts = np.bincount(group, minlength=self.n)
+        starts = np.cumsum(counts) - counts
+        has = counts > 0
+        out = {}
+        for q in qs:
+            pos = starts + q * np.maximum(counts - 1, 0)
+            lo = np.floor(pos).astype(np.int64)
+            hi = np.minimum(lo + 1, starts + counts - 1)
+            lo, hi = np.where(has, lo, 0), np.where(has, hi, 0)
+            value = v[lo] + (v[hi] - v[lo]) * (pos - np.floor(pos)) if len(v) else np.zeros(self.n)
+            out[q] = np.where(has, value, np.nan)
+        return out
+
+
+def _num(x, digits: int = 4):
+    return None if x is None or np.isnan(x) else round(float(x), digits)
+
+
+def _rows(groups: Groups, columns: dict[str, np.ndarray]) -> list[dict]:
+    rows = []
+    for i, key in enumerate(groups.keys):
+        row = dict(key)
+        for name, values in columns.items():
+            v = values[i]
+            row[name] = int(v) if np.issubdtype(values.dtype, np.integer) else _num(v)
+        rows.append(row)
+    return sorted(rows, key=lambda r: tuple((r[d] is None, r[d]) for d in DIMENSIONS if d in r))
+
+
+def _codes(table: pa.Table, grades: np.ndarray) -> tuple[dict, dict]:
+    codes, values = {}, {}
+    for d in ("subject", "topic", "bloom"):
+        codes[d], values[d] = _encode(table.column(d))
+    grade_values = sorted(set(grades.tolist()))
+    codes["grade"] = np.searchsorted(np.array(grade_values, dtype=np.int16), grades).astype(np.int32)
+    values["grade"] = [g if g >= 0 else None for g in grade_values]
+    return codes, values
+
+
+# -------------------------------------------------------------
+# REPORTS
+# -------------------------------------------------------------
+def score_report(db: Session, grade: int | None = None, subject: str | None = None, since=None, until=None,
+                 group_by: tuple[str, ...] = DIMENSIONS) -> list[dict]:
+    """
+    Per group: attempts, distinct children, mean and percentiles of the
+    attempt score, and answer accuracy (correct / answered questions).
+    """
+    attempts, answered, correct = load_attempts(db, grade, subject, since, until)
+    if not attempts.num_rows:
+        return []
+    grades = _grades(db, attempts.column("child_id").to_numpy())
+
+    codes, values = _codes(attempts, grades)
+    groups = Groups(codes, values, group_by)
+    score = attempts.column("score").to_numpy(zero_copy_only=False).astype(np.float64)
+    scored = ~np.isnan(score)
+    n_scored = groups.count(scored)
+    n_answered = groups.total(answered.astype(np.float64))
+    pct = groups.percentiles(score)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        columns = {
+            "attempts": groups.count(),
+            "children": groups.distinct(attempts.column("child_id").to_numpy()),
+            "mean_score": groups.total(np.nan_to_num(score), scored) / n_scored,
+            **{f"p{int(q * 100)}_score": v for q, v in pct.items()},
+            "answered": n_answered.astype(np.int64),
+            "accuracy": groups.total(correct.astype(np.float64)) / n_answered,
+        }
+    return _rows(groups, columns)
+
+
+def mastery_report(db: Session, grade: int | None = None, subject: str | None = None, since=None, until=None,
+                   group_by: tuple[str, ...] = DIMENSIONS) -> list[dict]:
+    """
+    Per group: children, mean and percentiles of the current knowledge-
+    tracing estimate (topic_mastery) and the share of children at or above
+    KT_MASTERED. With a window, only (child, subject, topic) estimates the
+    child worked on inside it count.
+    """
+    table = load_mastery(db, grade, subject, since, until)
+    if not table.num_rows:
+        return []
+    grades = _grades(db, table.column("child_id").to_numpy())
+
+    codes, values = _codes(table, grades)
+    groups = Groups(codes, values, group_by)
+    p = table.column("p_mastery").to_numpy(zero_copy_only=False).astype(np.float64)
+    n = groups.count()
+    columns = {
+        "children": groups.distinct(table.column("child_id").to_numpy()),
+        "estimates": n,
+        "mean_mastery": groups.total(p) / n,
+        **{f"p{int(q * 100)}_mastery": v for q, v in groups.percentiles(p).items()},
+        "mastered_share": groups.total((p >= KT_MASTERED).astype(np.float64)) / n,
+    }
+    return _rows(groups, columns)
+
+
+REPORTS = {"scores": score_report, "mastery": mastery_report}
+
+
+# -------------------------------------------------------------
+# ON-DISK RESULT CACHE
+# -------------------------------------------------------------
+def _fingerprint(db: Session, report: str) -> list:
+    """Cheap summary of the tables a report reads; it changes whenever rows are added or removed."""
+    cursor = db.connection().connection.cursor()
+    cursor.execute("SELECT count(*), max(id) FROM quiz_attempts")
+    parts = list(cursor.fetchone())
+    cursor.execute("SELECT max(id) FROM quiz_attempt_details")
+    parts += list(cursor.fetchone())
+    cursor.execute("SELECT count(*), max(id) FROM child_profiles")
+    parts += list(cursor.fetchone())
+    if report == "mastery":
+        cursor.execute("SELECT count(*), max(updated_at) FROM topic_mastery")
+        parts += list(cursor.fetchone())
+    cursor.close()
+    return parts
+
+
+def _cache_path(report: str, params: dict, fingerprint: list) -> str:
+    key = json.dumps([REPORT_VERSION, report, params, fingerprint], sort_keys=True, default=str)
+    return os.path.join(ANALYTICS_CACHE_DIR, f"{report}-{hashlib.sha1(key.encode()).hexdigest()[:20]}.parquet")
+
+
+def _prune(now: float) -> None:
+    for name in os.listdir(ANALYTICS_CACHE_DIR):
+        path = os.path.join(ANALYTICS_CACHE_DIR, name)
+        try:
+            if name.endswith(".parquet") and now - os.path.getmtime(path) > ANALYTICS_CACHE_TTL:
+                os.remove(path)
+        except OSError:
+            pass  # removed by a concurrent request
+
+
+def run(db: Session, report: str, refresh: bool = False, **params) -> dict:
+    """
+    {"report", "params", "generated_at", "cached", "rows"} for one of
+    REPORTS, from the on-disk cache when a fresh entry for the same
+    parameters and data exists. `refresh` recomputes regardless.
+    """
+    params = {k: v for k, v in params.items() if v is not None}
+    if "group_by" in params:
+        params["group_by"] = tuple(params["group_by"])
+    path = _cache_path(report, params, _fingerprint(db, report))
+    now = time.time()
+    if not refresh and os.path.exists(path) and now - os.path.getmtime(path) < ANALYTICS_CACHE_TTL:
+        try:
+            table = pq.read_table(path)
+            return {"report": report, "params": params, "cached": True,
+                    "generated_at": table.schema.metadata[b"generated_at"].decode(), "rows": table.to_pylist()}
+        except (OSError, pa.ArrowInvalid, KeyError, TypeError):
+            pass  # unreadable entry: recompute and overwrite it
+
+    rows = REPORTS[report](db, **params)
+    generated_at = datetime.datetime.utcnow().isoformat(timespec="seconds")
+    os.makedirs(ANALYTICS_CACHE_DIR, exist_ok=True)
+    table = pa.Table.from_pylist(rows).replace_schema_metadata({"generated_at": generated_at})
+    fd, tmp = tempfile.mkstemp(dir=ANALYTICS_CACHE_DIR, suffix=".tmp")
+    os.close(fd)
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)  # readers never see a half-written file
+    _prune(now)
+    return {"report": report, "params": params, "cached": False, "generated_at": generated_at, "rows": rows}
+
+
+if __name__ == "__main__":
+    import argparse
+    from .database import SessionLocal
+
+    ap = argparse.ArgumentParser(description="Cohort reports over all quiz attempts.")
+    ap.add_argument("report", choices=sorted(REPORTS))
+    ap.add_argument("--grade", type=int)
+    ap.add_argument("--subject")
+    ap.add_argument("--since", type=datetime.date.fromisoformat, help="YYYY-MM-DD, inclusive")
+    ap.add_argument("--until", type=datetime.date.fromisoformat, help="YYYY-MM-DD, inclusive")
+    ap.add_argument("--group-by", default=",".join(DIMENSIONS), help=f"comma-separated subset of {DIMENSIONS}")
+    ap.add_argument("--refresh", action="store_true", help="ignore the result cache")
+    args = ap.parse_args()
+
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        out = run(db, args.report, refresh=args.refresh, grade=args.grade, subject=args.subject,
+                  since=args.since, until=args.until, group_by=tuple(d for d in args.group_by.split(",") if d))
+    for row in out["rows"]:
+        print(json.dumps(row, default=str))
+    print(f"{len(out['rows'])} groups in {time.perf_counter() - start:.2f}s ({'cached' if out['cached'] else 'computed'})")
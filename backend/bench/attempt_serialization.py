@@ -0,0 +1,131 @@
+# backend/bench/attempt_serialization.py
+"""
+Requests/sec for /quiz/attempt/{id} (15 answers) and /quiz/recent
+(limit=50), served in-process through TestClient:
+  * before:  the previous handlers: ORM entities, json.loads of every
+             answer's options, isoformat() per timestamp, then FastAPI's
+             jsonable_encoder + json.dumps over the returned dicts
+  * typed:   the same column reads returned through response_model
+             (FastAPI validates and serializes with Pydantic)
+  * orjson:  the routes as they are: column tuples, cached decoded
+             question text, bytes from OrjsonResponse
+
+    python -m backend.bench.attempt_serialization --seconds 3
+"""
+import argparse, datetime, json, os, tempfile, time
+
+import orjson
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from .. import models, submissions
+from ..database import Base, get_db
+from ..migrations import upgrade
+from ..routes import quiz
+
+DETAILS = 15
+
+
+def seed(Session) -> tuple[int, int]:
+    with Session() as db:
+        payloads = [quiz.SubmitPayload(
+            profile_id=1, subject="Mathematics", topic="Fractions", bloom_level="Apply", score=0.6,
+            taken_at=datetime.datetime(2026, 3, 1, 8, 0, 0, 123456) + datetime.timedelta(minutes=n),
+            details=[quiz.AnswerDetail(
+                question_index=i, stem=f"Amina shares {i + 2} mangoes equally among 4 friends. What fraction does each get?",
+                options=[f"{i + 2}/4", f"4/{i + 2}", f"1/{i + 2}", "1/4"], picked_idx=i % 4, correct_idx=0,
+                explanation="Divide the mangoes (numerator) by the number of friends (denominator).",
+            ) for i in range(DETAILS)],
+        ) for n in range(60)]
+        attempt_id = submissions.save_attempts(db, payloads)[0]["attempt_id"]
+    return attempt_id, 1
+
+
+def legacy_app(override) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/before/attempt/{attempt_id}")
+    def before_attempt(attempt_id: int, db: Session = Depends(get_db)):
+        a = db.query(models.QuizAttempt).filter(models.QuizAttempt.id == attempt_id).first()
+        details = (
+            db.query(models.QuizAttemptDetail, models.Question)
+            .join(models.Question, models.Question.id == models.QuizAttemptDetail.question_id)
+            .filter(models.QuizAttemptDetail.attempt_id == attempt_id)
+            .order_by(models.QuizAttemptDetail.question_index.asc())
+            .all()
+        )
+        return {
+            "id": a.id, "profile_id": a.child_id, "subject": a.subject, "topic": a.topic,
+            "bloom_level": a.bloom_level, "score": a.score,
+            "taken_at": a.taken_at.isoformat() if a.taken_at else None,
+            "details": [
+                {"question_index": d.question_index, "stem": q.stem, "options": json.loads(q.options_json or "[]"),
+                 "picked_idx": d.picked_idx, "correct_idx": d.correct_idx, "explanation": q.explanation or ""}
+                for d, q in details
+            ],
+        }
+
+    @app.get("/before/recent")
+    def before_recent(profile_id: int, limit: int = 10, db: Session = Depends(get_db)):
+        A = models.QuizAttempt
+        attempts = db.query(A).filter(A.child_id == profile_id).order_by(A.taken_at.desc(), A.id.desc()).limit(limit).all()
+        return [
+            {"id": a.id, "subject": a.subject, "topic": a.topic, "bloom_level": a.bloom_level, "score": a.score,
+             "taken_at": a.taken_at.isoformat() if a.taken_at else None}
+            for a in attempts
+        ]
+
+    @app.get("/typed/attempt/{attempt_id}", response_model=quiz.AttemptOut)
+    def typed_attempt(attempt_id: int, db: Session = Depends(get_db)):
+        return orjson.loads(quiz.get_attempt(attempt_id, db=db).body)
+
+    @app.get("/typed/recent", response_model=list[quiz.AttemptRow])
+    def typed_recent(profile_id: int, limit: int = 10, db: Session = Depends(get_db)):
+        return orjson.loads(quiz.recent_attempts(profile_id, limit=limit, db=db).body)
+
+    app.include_router(quiz.router)
+    app.dependency_overrides[get_db] = override
+    return app
+
+
+def rps(client: TestClient, url: str, seconds: float) -> tuple[float, bytes]:
+    body = client.get(url).content
+    n, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        client.get(url)
+        n += 1
+    return n / (time.perf_counter() - start), body
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--seconds", type=float, default=3.0, help="per measurement")
+    args = ap.parse_args()
+
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='serialize-'), 'bench.db')}",
+                           connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    upgrade(engine)
+    Session = sessionmaker(bind=engine)
+    attempt_id, profile_id = seed(Session)
+
+    def override():
+        with Session() as db:
+            yield db
+
+    client = TestClient(legacy_app(override))
+    print(f"attempt with {DETAILS} answers; recent page of 50 ({args.seconds:.0f}s per measurement)\n")
+    for name, path in (("/quiz/attempt/{id}", f"attempt/{attempt_id}"),
+                       ("/quiz/recent?limit=50", f"recent?profile_id={profile_id}&limit=50")):
+        before, b0 = rps(client, f"/before/{path}", args.seconds)
+        typed, b1 = rps(client, f"/typed/{path}", args.seconds)
+        fast, b2 = rps(client, f"/quiz/{path}", args.seconds)
+        same = json.loads(b0) == json.loads(b1) == json.loads(b2)
+        print(f"  {name:<22} before {before:7.0f} req/s   typed {typed:7.0f} req/s   orjson {fast:7.0f} req/s"
+              f"   ({fast / before:.2f}x)   same JSON: {same}")
+
+
+if __name__ == "__main__":
+    main()
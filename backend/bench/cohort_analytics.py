@@ -0,0 +1,135 @@
+# backend/bench/cohort_analytics.py
+"""
+Cohort score report (Grade 5, one term, per subject/topic/Bloom level:
+attempts, children, mean and median score, answer accuracy):
+  * orm:      QuizAttempt and QuizAttemptDetail entities read through the
+              ORM, grouped in Python dicts, statistics.median per group
+  * columnar: backend.analytics.score_report (Arrow batches, NumPy
+              bincount group-by, lexsort percentiles)
+  * cached:   analytics.run for the same parameters a second time (Parquet
+              read from the on-disk result cache)
+plus the mastery report over topic_mastery. Both score variants must agree.
+
+    python -m backend.bench.cohort_analytics --attempts 200000
+"""
+import argparse, datetime, os, random, statistics, tempfile, time
+from collections import defaultdict
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from .. import analytics, mastery, models
+from ..catalog import catalog
+from ..database import Base
+from ..migrations import upgrade
+from ..question_bank import BLOOM_LEVELS
+
+DETAILS = 10
+TERM = (datetime.date(2026, 1, 5), datetime.date(2026, 3, 27))
+
+
+def seed(Session, n_attempts: int, n_children: int, rng: random.Random) -> None:
+    grades = {c: rng.choice((4, 5, 6)) for c in range(1, n_children + 1)}
+    topics = {g: [t for s in catalog.subjects for t in catalog.topics_for(g, s)] for g in (4, 5, 6)}
+    start = datetime.datetime(2025, 9, 1)
+    with Session() as db:
+        db.add(models.Parent(id=1, full_name="Bench", email="bench@example.com", hashed_password="x"))
+        db.execute(insert(models.ChildProfile), [{"id": c, "name": f"C{c}", "grade": f"Grade {g}", "parent_id": 1}
+                                                 for c, g in grades.items()])
+        db.execute(insert(models.Question), [{"content_hash": str(q), "stem": f"Q{q}", "options_json": "[]",
+                                              "explanation": ""} for q in range(1, 501)])
+        for lo in range(0, n_attempts, 20_000):
+            attempts, details = [], []
+            for attempt_id in range(lo + 1, min(lo + 20_000, n_attempts) + 1):
+                child = rng.randint(1, n_children)
+                t = rng.choice(topics[grades[child]])
+                right = [rng.random() < 0.65 for _ in range(DETAILS)]
+                attempts.append({"id": attempt_id, "child_id": child, "subject": t.subject, "topic": t.name,
+                                 "bloom_level": rng.choice(BLOOM_LEVELS), "score": sum(right) / DETAILS,
+                                 "taken_at": start + datetime.timedelta(  # ids follow time, as submits do
+                                     seconds=attempt_id * 300 * 86400 // n_attempts + rng.randrange(3600))})
+                details += [{"attempt_id": attempt_id, "question_index": i, "question_id": rng.randint(1, 500),
+                             "picked_idx": 0 if ok else 1, "correct_idx": 0} for i, ok in enumerate(right)]
+            db.execute(insert(models.QuizAttempt), attempts)
+            db.execute(insert(models.QuizAttemptDetail), details)
+        db.commit()
+        mastery.rebuild(db)
+
+
+def orm_report(db, grade: int, since: datetime.date, until: datetime.date) -> list[dict]:
+    A, D = models.QuizAttempt, models.QuizAttemptDetail
+    grades = {c.id: c.grade for c in db.query(models.ChildProfile)}
+    lo, hi = datetime.datetime.combine(since, datetime.time()), datetime.datetime.combine(until, datetime.time())
+    attempts = [a for a in db.query(A).filter(A.taken_at >= lo, A.taken_at < hi + datetime.timedelta(days=1))
+                if grades.get(a.child_id) == f"Grade {grade}"]
+    ids = {a.id for a in attempts}
+    by_attempt = defaultdict(lambda: [0, 0])
+    for d in db.query(D).filter(D.attempt_id.between(min(ids, default=0), max(ids, default=0))):
+        if d.attempt_id in ids and d.correct_idx is not None and d.correct_idx >= 0:
+            by_attempt[d.attempt_id][0] += 1
+            by_attempt[d.attempt_id][1] += d.picked_idx == d.correct_idx
+    groups = defaultdict(list)
+    for a in attempts:
+        groups[(a.subject, a.topic, a.bloom_level)].append(a)
+    rows = []
+    for (subject, topic, bloom), members in sorted(groups.items()):
+        answered = sum(by_attempt[a.id][0] for a in members)
+        rows.append({"subject": subject, "topic": topic, "bloom": bloom, "attempts": len(members),
+                     "children": len({a.child_id for a in members}),
+                     "mean_score": statistics.fmean(a.score for a in members),
+                     "p50_score": statistics.median(a.score for a in members),
+                     "accuracy": sum(by_attempt[a.id][1] for a in members) / answered if answered else None})
+    return rows
+
+
+def same(orm_rows: list[dict], rows: list[dict]) -> bool:
+    if len(orm_rows) != len(rows):
+        return False
+    for a, b in zip(orm_rows, rows):
+        for k, v in a.items():
+            if isinstance(v, float) and abs(v - b[k]) > 1e-3 or not isinstance(v, float) and v != b[k]:
+                return False
+    return True
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--attempts", type=int, default=200_000)
+    ap.add_argument("--children", type=int, default=5_000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="analytics-")
+    analytics.ANALYTICS_CACHE_DIR = os.path.join(workdir, "cache")
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    Base.metadata.create_all(bind=engine)
+    upgrade(engine)
+    Session = sessionmaker(bind=engine)
+    seed(Session, args.attempts, args.children, random.Random(args.seed))
+    print(f"{args.attempts} attempts x {DETAILS} answers, {args.children} children; "
+          f"report: Grade 5, {TERM[0]}..{TERM[1]}, by subject/topic/Bloom\n")
+
+    params = dict(grade=5, since=TERM[0], until=TERM[1], group_by=("subject", "topic", "bloom"))
+    with Session() as db:
+        start = time.perf_counter()
+        orm_rows = orm_report(db, 5, *TERM)
+        orm_s = time.perf_counter() - start
+    with Session() as db:
+        start = time.perf_counter()
+        first = analytics.run(db, "scores", **params)
+        columnar_s = time.perf_counter() - start
+        start = time.perf_counter()
+        again = analytics.run(db, "scores", **params)
+        cached_s = time.perf_counter() - start
+        start = time.perf_counter()
+        m = analytics.run(db, "mastery", **params)
+        mastery_s = time.perf_counter() - start
+    ok = same(orm_rows, first["rows"]) and again["cached"] and again["rows"] == first["rows"]
+    print(f"  scores   orm {orm_s:7.2f}s   columnar {columnar_s:7.2f}s ({orm_s / columnar_s:.0f}x)"
+          f"   cached {cached_s * 1000:6.1f}ms   {len(first['rows'])} groups, same result: {ok}")
+    print(f"  mastery  columnar {mastery_s:7.2f}s   {len(m['rows'])} groups")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
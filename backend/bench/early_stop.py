@@ -0,0 +1,113 @@
+# backend/bench/early_stop.py
+"""
+Replays fake token streams through ArrayStopTracker (the early-stopping
+logic used by QuizStoppingCriteria in the engine notebook) on CPU.
+
+First runs a few fixed scenarios (array closes, target reached, brackets
+inside strings, "[]", invalid items, truncated output) and prints PASS/FAIL.
+Then measures how many tokens early stopping saves on synthetic model
+output that keeps talking after the array, or writes more than `target`
+items, under a max_new_tokens budget.
+
+    python -m backend.bench.early_stop --trials 500 --max-new-tokens 1200
+"""
+import argparse, json, random, re, statistics
+
+from ..engine_stream import ArrayStopTracker
+from .mock_engine import make_items
+
+SUBJECT, GRADE, TOPIC = "Science", 5, "Plants"
+TRAILERS = [
+    "\n\nI hope these questions help your learners revise! Let me know if you need more.",
+    "\n\nNote: the answers are spread across A-D and the Bloom levels are mixed as requested. " * 4,
+    "",
+]
+
+
+def fake_tokens(text: str) -> list[str]:
+    """Roughly what a BPE tokenizer hands the stopping criterion: short word pieces."""
+    return re.findall(r"\s*[^\s]{1,4}|\s+", text)
+
+
+def run(tokens: list[str], target: int = 15, max_new_tokens: int | None = None) -> tuple[ArrayStopTracker, int]:
+    """Feed tokens one at a time like model.generate would; return the tracker and tokens decoded."""
+    tracker = ArrayStopTracker(SUBJECT, GRADE, TOPIC, target=target)
+    used = 0
+    for tok in tokens[:max_new_tokens]:
+        used += 1
+        tracker.feed(tok)
+        if tracker.done:
+            break
+    return tracker, used
+
+
+def scenarios() -> bool:
+    rng = random.Random(0)
+    items = make_items(rng, SUBJECT, GRADE, TOPIC, 20)
+    array = json.dumps(items[:12])
+    tricky = dict(items[0], question='Which of these is "[a plant]" {not an animal}?')
+    bad = dict(items[1], grade="five")
+
+    cases = []
+    text = array + TRAILERS[1]
+    tracker, used = run(fake_tokens(text))
+    cases.append(("stops when the array closes", tracker.parser.closed and len(tracker.items) == 12
+                  and "".join(fake_tokens(text)[:used]).rstrip().endswith("]")))
+
+    tracker, used = run(fake_tokens(json.dumps(items)), target=15)
+    cases.append(("stops at the 15th valid item", len(tracker.items) == 15 and not tracker.parser.closed
+                  and used < len(fake_tokens(json.dumps(items)))))
+
+    tracker, _ = run(fake_tokens("Sure! [" + json.dumps(tricky) + ", " + json.dumps(items[1]) + "]"))
+    cases.append(("ignores brackets inside strings", len(tracker.items) == 2 and tracker.parser.closed))
+
+    tracker, used = run(fake_tokens("[]\n\nThat topic is outside CBC Grades 4-6." ))
+    cases.append(("stops on an empty array", tracker.done and not tracker.items and used <= 2))
+
+    tracker, _ = run(fake_tokens(json.dumps([bad, items[2], {"question": "?"}])))
+    cases.append(("skips items that fail validate_item", len(tracker.items) == 1 and tracker.rejected == 2))
+
+    truncated = fake_tokens(array)[:-40]
+    tracker, used = run(truncated)
+    cases.append(("keeps finished items from truncated output", not tracker.done and used == len(truncated)
+                  and 0 < len(tracker.items) < 12))
+
+    ok = True
+    for label, passed in cases:
+        ok &= passed
+        print(f"  {'PASS' if passed else 'FAIL'}  {label}")
+    return ok
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--trials", type=int, default=500)
+    ap.add_argument("--max-new-tokens", type=int, default=1200)
+    ap.add_argument("--target", type=int, default=15)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    print("Scenarios")
+    ok = scenarios()
+
+    rng = random.Random(args.seed)
+    full, early, kept = [], [], []
+    for _ in range(args.trials):
+        items = make_items(rng, SUBJECT, GRADE, TOPIC, rng.randint(10, 20))
+        text = json.dumps(items, indent=1) + rng.choice(TRAILERS) * rng.randint(1, 6)
+        tokens = fake_tokens(text)
+        full.append(min(len(tokens), args.max_new_tokens))
+        tracker, used = run(tokens, args.target, args.max_new_tokens)
+        early.append(used)
+        kept.append(len(tracker.items))
+
+    saved = 1 - sum(early) / sum(full)
+    print(f"\n{args.trials} synthetic generations (10-20 items + trailing chatter, max_new_tokens {args.max_new_tokens})")
+    print(f"  tokens decoded without stopping  mean {statistics.mean(full):7.1f}")
+    print(f"  tokens decoded with stopping     mean {statistics.mean(early):7.1f}   ({saved:.1%} fewer)")
+    print(f"  valid items returned             mean {statistics.mean(kept):7.1f}   max {max(kept)}")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# backend/bench/engine_concurrency.py
+"""
+How many concurrent /generate requests can one uvicorn worker hold open?
+
+Starts a slow stand-in engine and two tiny backends on localhost:
+  * before: sync handler + requests.post (the original generate_quiz)
+  * after:  async handler + pooled EngineClient
+
+then fires N simultaneous requests at each backend and reports the peak
+number of generations the engine saw in flight.
+
+    python -m backend.bench.engine_concurrency --requests 200 --delay 3
+"""
+import argparse, asyncio, threading, time
+
+import httpx
+import requests
+import uvicorn
+from fastapi import FastAPI
+
+from ..engine_client import EngineClient
+
+ENGINE_PORT, BEFORE_PORT, AFTER_PORT = 8911, 8912, 8913
+
+
+# -------------------------------------------------------------
+# SLOW STAND-IN ENGINE
+# -------------------------------------------------------------
+def make_engine(delay: float) -> FastAPI:
+    engine_app = FastAPI()
+    engine_app.state.inflight = 0
+    engine_app.state.peak = 0
+
+    @engine_app.post("/generate")
+    async def generate(payload: dict):
+        engine_app.state.inflight += 1
+        engine_app.state.peak = max(engine_app.state.peak, engine_app.state.inflight)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            engine_app.state.inflight -= 1
+        return {"metadata": payload, "questions": []}
+
+    return engine_app
+
+
+# -------------------------------------------------------------
+# BACKENDS UNDER TEST
+# -------------------------------------------------------------
+def make_before(engine_url: str) -> FastAPI:
+    before = FastAPI()
+
+    @before.post("/quiz/generate")
+    def generate_quiz(payload: dict):
+        r = requests.post(f"{engine_url}/generate", json=payload, timeout=1000)
+        r.raise_for_status()
+        return r.json()
+
+    return before
+
+
+def make_after(engine_url: str, concurrency: int) -> FastAPI:
+    after = FastAPI()
+    client = EngineClient(engine_url, max_connections=concurrency, max_concurrency=concurrency)
+
+    @after.post("/quiz/generate")
+    async def generate_quiz(payload: dict):
+        return await client.generate(payload)
+
+    return after
+
+
+def serve(app: FastAPI, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def fire(port: int, n: int) -> float:
+    limits = httpx.Limits(max_connections=n)
+    async with httpx.AsyncClient(timeout=None, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            client.post(f"http://127.0.0.1:{port}/quiz/generate", json={"topic": "Fractions", "i": i})
+            for i in range(n)
+        ])
+        return time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--delay", type=float, default=3.0, help="seconds the engine takes per quiz")
+    args = ap.parse_args()
+
+    engine_app = make_engine(args.delay)
+    engine_url = f"http://127.0.0.1:{ENGINE_PORT}"
+    serve(engine_app, ENGINE_PORT)
+    serve(make_before(engine_url), BEFORE_PORT)
+    serve(make_after(engine_url, args.requests), AFTER_PORT)
+
+    print(f"{args.requests} concurrent requests, engine delay {args.delay}s")
+    for label, port in (("before (sync + requests.post)", BEFORE_PORT), ("after (async + EngineClient)", AFTER_PORT)):
+        engine_app.state.peak = 0
+        elapsed = asyncio.run(fire(port, args.requests))
+        print(f"  {label:32s} peak in flight: {engine_app.state.peak:4d}   wall: {elapsed:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# backend/bench/history_pages.py
+"""
+Quiz history reads for one child with a long history:
+  * the subject picker: /quiz/recent?limit=200 (old) vs /quiz/history/summary
+  * page cost by depth: keyset pages (/quiz/recent?before=cursor) vs the
+    same page fetched with OFFSET, at the first page and deep in the history
+
+    python -m backend.bench.history_pages --attempts 100000
+"""
+import argparse, datetime, os, random, tempfile, time
+
+import orjson
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from .. import models
+from ..database import Base
+from ..migrations import upgrade
+from ..routes.quiz import history_summary, recent_attempts
+
+SUBJECTS = ["Mathematics", "Science", "English", "Kiswahili"]
+PAGE = 25
+
+
+def timed(fn, repeat: int = 20) -> float:
+    """Best-of-`repeat` milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--attempts", type=int, default=100_000, help="attempts by the benchmarked child")
+    ap.add_argument("--others", type=int, default=200_000, help="attempts by other children")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='history-'), 'bench.db')}")
+    Base.metadata.create_all(bind=engine)
+    upgrade(engine)
+    start = datetime.datetime(2024, 1, 1)
+    rows = [
+        {"child_id": 1 if i < args.attempts else rng.randint(2, 1000), "subject": rng.choice(SUBJECTS),
+         "topic": f"Topic {rng.randrange(12)}", "bloom_level": "Apply", "score": rng.random(),
+         "taken_at": start + datetime.timedelta(seconds=rng.randrange(60_000_000))}
+        for i in range(args.attempts + args.others)
+    ]
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.execute(insert(models.QuizAttempt), rows)
+        db.commit()
+
+    subject = SUBJECTS[0]
+    n_subject = sum(r["child_id"] == 1 and r["subject"] == subject for r in rows)
+    with Session() as db:
+        print(f"child 1: {args.attempts} attempts ({n_subject} in {subject}); {args.others} by other children\n")
+        old = timed(lambda: recent_attempts(1, limit=200, db=db))
+        new = timed(lambda: history_summary(1, db=db))
+        print(f"  subject picker   /recent?limit=200 {old:7.2f}ms   /history/summary {new:7.2f}ms"
+              f"   (summary sees all {args.attempts} attempts, not the last 200)")
+
+        # Walk to ~90% depth with cursors, remembering the cursor at that page
+        depth = (n_subject * 9 // 10) // PAGE
+        cursor = None
+        for _ in range(depth):
+            cursor = recent_attempts(1, subject=subject, limit=PAGE, before=cursor, db=db).headers["X-Next-Cursor"]
+        A = models.QuizAttempt
+        by_offset = lambda offset: (db.query(A).filter(A.child_id == 1, A.subject == subject)
+                                    .order_by(A.taken_at.desc(), A.id.desc()).offset(offset).limit(PAGE).all())
+        assert [a.id for a in by_offset(depth * PAGE)] == \
+            [a["id"] for a in orjson.loads(recent_attempts(1, subject=subject, limit=PAGE, before=cursor, db=db).body)]
+
+        first = timed(lambda: recent_attempts(1, subject=subject, limit=PAGE, db=db))
+        deep = timed(lambda: recent_attempts(1, subject=subject, limit=PAGE, before=cursor, db=db))
+        off_first = timed(lambda: by_offset(0))
+        off_deep = timed(lambda: by_offset(depth * PAGE))
+        print(f"  page {1:>5}        keyset {first:7.2f}ms   OFFSET {off_first:7.2f}ms")
+        print(f"  page {depth + 1:>5}        keyset {deep:7.2f}ms   OFFSET {off_deep:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+# backend/bench/load_test.py
+"""
+End-to-end load test of the quiz generation path.
+
+Starts the mock engine (backend.bench.mock_engine) and the real backend
+(uvicorn backend.main:app, with a throwaway SQLite database) as separate
+processes. It then runs N concurrent "students". Each one picks a catalog
+topic, requests a quiz, optionally submits an attempt, thinks for a while
+and repeats. Reports throughput, p50/p95/p99 latency, error rates, where
+quizzes came from (bank / engine / template) and what the engine saw.
+
+    python -m backend.bench.load_test --students 50 --duration 60 \\
+        --latency lognormal:2:0.5 --slots 2 --malformed-rate 0.05 --failure-rate 0.02
+
+Point --backend-url / --engine-url at running servers to skip spawning them.
+"""
+import argparse, asyncio, json, os, random, subprocess, sys, tempfile, time
+from collections import Counter
+
+import httpx
+
+from ..catalog import catalog, Topic
+from ..math_generator import supports
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# -------------------------------------------------------------
+# PROCESSES
+# -------------------------------------------------------------
+def spawn(args: list[str], env: dict, cwd: str) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, *args], env={**os.environ, **env}, cwd=cwd)
+
+
+def wait_ready(url: str, proc: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"{url} exited with code {proc.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise SystemExit(f"{url} did not come up within {timeout:.0f}s")
+
+
+# -------------------------------------------------------------
+# STUDENTS
+# -------------------------------------------------------------
+class Results:
+    def __init__(self):
+        self.latencies: list[float] = []      # successful quizzes, seconds
+        self.first_question: list[float] = []  # stream mode: time to first question
+        self.statuses: Counter = Counter()
+        self.sources: Counter = Counter()
+        self.questions = 0
+
+    def ok(self) -> int:
+        return self.statuses["200"]
+
+    def total(self) -> int:
+        return sum(self.statuses.values())
+
+
+def load_topics(include_templates: bool, subjects: list[str] | None) -> list[Topic]:
+    return [
+        t for t in catalog.topics
+        if (not subjects or t.subject in subjects) and (include_templates or not supports(t.subject, t.name))
+    ]
+
+
+async def take_quiz(client: httpx.AsyncClient, body: dict, stream: bool, res: Results) -> list[dict] | None:
+    start = time.perf_counter()
+    if not stream:
+        r = await client.post("/quiz/generate", json=body)
+        if r.status_code != 200:
+            res.statuses[str(r.status_code)] += 1
+            return None
+        quiz = r.json()
+        res.latencies.append(time.perf_counter() - start)
+        res.statuses["200"] += 1
+        res.sources[quiz["metadata"].get("source", "?")] += 1
+        return quiz["questions"]
+
+    questions, source, failed = [], "?", None
+    async with client.stream("POST", "/quiz/generate/stream", json=body) as r:
+        if r.status_code != 200:
+            res.statuses[str(r.status_code)] += 1
+            return None
+        async for line in r.aiter_lines():
+            if not line:
+                continue
+            msg = json.loads(line)
+            if msg["type"] == "metadata":
+                source = msg.get("source", "?")
+            elif msg["type"] == "question":
+                if not questions:
+                    res.first_question.append(time.perf_counter() - start)
+                questions.append(msg["question"])
+            elif msg["type"] == "error":
+                failed = "stream-error"
+    if failed or not questions:
+        res.statuses[failed or "empty"] += 1
+        return None
+    res.latencies.append(time.perf_counter() - start)
+    res.statuses["200"] += 1
+    res.sources[source] += 1
+    return questions
+
+
+async def student(sid: int, client: httpx.AsyncClient, topics: list[Topic], args, deadline: float, res: Results) -> None:
+    rng = random.Random(args.seed * 100_003 + sid)
+    done = 0
+    while time.monotonic() < deadline and (not args.quizzes or done < args.quizzes):
+        topic = rng.choice(topics)
+        body = {"profile_id": sid, "grade": topic.grade, "subject": topic.subject, "topic": topic.name}
+        try:
+            questions = await take_quiz(client, body, args.stream, res)
+        except (httpx.HTTPError, ValueError) as e:
+            res.statuses[e.__class__.__name__] += 1
+            questions = None
+        done += 1
+        if questions:
+            res.questions += len(questions)
+            if args.submit:
+                picks = [rng.randrange(len(q["options"]) or 1) for q in questions]
+                await client.post("/quiz/submit", json={
+                    **{k: body[k] for k in ("profile_id", "subject", "topic")},
+                    "bloom_level": questions[0].get("bloom"),
+                    "score": sum(p == q["answer_idx"] for p, q in zip(picks, questions)) / len(questions),
+                    "details": [
+                        {"question_index": i, "stem": q["stem"], "options": q["options"],
+                         "picked_idx": p, "correct_idx": q["answer_idx"], "explanation": q.get("explanation")}
+                        for i, (q, p) in enumerate(zip(questions, picks))
+                    ],
+                })
+        if args.think:
+            await asyncio.sleep(rng.expovariate(1 / args.think))
+
+
+def pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else float("nan")
+
+
+def report(label: str, values: list[float]) -> None:
+    print(f"  {label:<22} p50 {pct(values, 0.5):7.2f}s   p95 {pct(values, 0.95):7.2f}s   "
+          f"p99 {pct(values, 0.99):7.2f}s   max {max(values, default=float('nan')):7.2f}s")
+
+
+async def run(args, backend_url: str, engine_url: str, topics: list[Topic]) -> None:
+    res = Results()
+    limits = httpx.Limits(max_connections=args.students)
+    async with httpx.AsyncClient(base_url=backend_url, timeout=args.timeout, limits=limits) as client:
+        start = time.monotonic()
+        deadline = start + args.duration
+        await asyncio.gather(*(student(sid, client, topics, args, deadline, res) for sid in range(1, args.students + 1)))
+        elapsed = time.monotonic() - start
+        metrics = (await client.get("/quiz/metrics")).json()
+        try:
+            engine_stats = (await client.get(f"{engine_url}/stats")).json()
+        except (httpx.HTTPError, ValueError):
+            engine_stats = None  # a real engine has no /stats
+
+    total = res.total()
+    print(f"\n{args.students} students, {elapsed:.1f}s, mode={'stream' if args.stream else 'generate'}")
+    print(f"  quizzes                {total} requested, {res.ok()} ok, {res.questions} questions")
+    print(f"  throughput             {res.ok() / elapsed:.2f} quizzes/s")
+    print(f"  error rate             {(total - res.ok()) / max(total, 1):.1%}   "
+          + ", ".join(f"{k}: {v}" for k, v in sorted(res.statuses.items()) if k != "200"))
+    print("  sources                " + ", ".join(f"{k}: {v}" for k, v in res.sources.most_common()))
+    report("quiz latency", res.latencies)
+    if args.stream:
+        report("first question", res.first_question)
+    print(f"  singleflight           {json.dumps(metrics.get('singleflight', {}))}")
+    if engine_stats:
+        print(f"  engine                 {json.dumps(engine_stats)}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--students", type=int, default=20)
+    ap.add_argument("--duration", type=float, default=30, help="seconds to keep students working")
+    ap.add_argument("--quizzes", type=int, default=0, help="stop each student after this many quizzes (0 = no limit)")
+    ap.add_argument("--think", type=float, default=1.0, help="mean seconds between a student's quizzes")
+    ap.add_argument("--stream", action="store_true", help="use /quiz/generate/stream instead of /quiz/generate")
+    ap.add_argument("--submit", action="store_true", help="submit an attempt after every quiz")
+    ap.add_argument("--subjects", nargs="*", help="only these catalog subjects")
+    ap.add_argument("--include-templates", action="store_true", help="also pick topics served by math_generator")
+    ap.add_argument("--timeout", type=float, default=300)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--backend-url", help="use a running backend instead of spawning one")
+    ap.add_argument("--engine-url", help="use a running engine instead of spawning the mock")
+    ap.add_argument("--backend-port", type=int, default=8921)
+    ap.add_argument("--engine-port", type=int, default=8922)
+    # Passed through to the mock engine
+    ap.add_argument("--latency", default="lognormal:2:0.5")
+    ap.add_argument("--slots", type=int, default=2)
+    ap.add_argument("--malformed-rate", type=float, default=0.0)
+    ap.add_argument("--failure-rate", type=float, default=0.0)
+    args = ap.parse_args()
+
+    topics = load_topics(args.include_templates, args.subjects)
+    if not topics:
+        raise SystemExit("No catalog topics match")
+
+    procs = []
+    workdir = tempfile.mkdtemp(prefix="quiz-load-")
+    env = {"PYTHONPATH": REPO_ROOT}
+    try:
+        engine_url = args.engine_url
+        if not engine_url:
+            engine_url = f"http://127.0.0.1:{args.engine_port}"
+            procs.append(spawn([
+                "-m", "backend.bench.mock_engine", "--port", str(args.engine_port),
+                "--latency", args.latency, "--slots", str(args.slots),
+                "--malformed-rate", str(args.malformed_rate), "--failure-rate", str(args.failure_rate),
+                "--seed", str(args.seed),
+            ], env, workdir))
+            wait_ready(f"{engine_url}/health", procs[-1])
+
+        backend_url = args.backend_url
+        if not backend_url:
+            backend_url = f"http://127.0.0.1:{args.backend_port}"
+            # Fresh SQLite file in workdir (database.py uses ./app.db)
+            procs.append(spawn(
+                ["-m", "uvicorn", "backend.main:app", "--port", str(args.backend_port), "--log-level", "warning"],
+                {**env, "QUIZ_ENGINE_URLS": engine_url}, workdir,
+            ))
+            wait_ready(f"{backend_url}/quiz/metrics", procs[-1])
+
+        asyncio.run(run(args, backend_url, engine_url, topics))
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait()
+
+
+if __name__ == "__main__":
+    main()
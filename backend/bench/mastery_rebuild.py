@@ -0,0 +1,120 @@
+# backend/bench/mastery_rebuild.py
+"""
+Knowledge-tracing batch recompute on a synthetic attempts table.
+
+Builds a throwaway SQLite database with --children simulated learners,
+each taking quizzes on a few topics at rising Bloom levels, with per-
+question details (10 answers per attempt; some attempts score-only).
+Then:
+  1. checks that mastery.rebuild() reproduces, to float precision, the
+     rows /quiz/submit maintained online for a sample of attempts,
+  2. times the full rebuild (read in chunks, NumPy replay, bulk insert).
+
+    python -m backend.bench.mastery_rebuild --children 2000 --attempts 50
+"""
+import argparse, datetime, os, random, tempfile, time
+
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from .. import models, mastery
+from ..database import Base
+from ..question_bank import BLOOM_LEVELS
+
+TOPICS = [("Mathematics", "Fractions"), ("Mathematics", "Money"), ("Science", "Plants"), ("English", "Reading")]
+
+
+class Answer:
+    """The fields mastery.observations reads from an AnswerDetail."""
+    def __init__(self, question_index: int, picked_idx: int, correct_idx: int):
+        self.question_index, self.picked_idx, self.correct_idx = question_index, picked_idx, correct_idx
+
+
+def simulate(rng: random.Random, children: int, attempts: int):
+    """Yield (attempt row, answers) in time order."""
+    start = datetime.datetime(2026, 1, 1)
+    skill = {c: rng.uniform(0.3, 0.9) for c in range(1, children + 1)}
+    for n in range(attempts * children):
+        child = rng.randint(1, children)
+        subject, topic = rng.choice(TOPICS)
+        bloom = rng.choice(BLOOM_LEVELS[:4])
+        p = min(0.98, skill[child] + 0.004 * n / children)
+        answers = [Answer(i, 0 if rng.random() < p else 1, 0) for i in range(10)]
+        if rng.random() < 0.1:
+            answers = []  # score-only submission
+        score = sum(a.picked_idx == a.correct_idx for a in answers) / 10 if answers else round(p, 1)
+        yield dict(id=n + 1, child_id=child, subject=subject, topic=topic, bloom_level=bloom, score=score,
+                   taken_at=start + datetime.timedelta(minutes=n)), answers
+
+
+def seed(Session, rows, online: bool = False) -> dict:
+    """Insert attempts and details in bulk; with online=True also apply mastery.record per attempt."""
+    estimates = {}
+    attempts, details = [], []
+    with Session() as db:
+        for row, answers in rows:
+            attempts.append(row)
+            details += [dict(attempt_id=row["id"], question_index=a.question_index,
+                             picked_idx=a.picked_idx, correct_idx=a.correct_idx) for a in answers]
+            if online:
+                m = mastery.record(db, models.QuizAttempt(**row), mastery.observations(answers, row["score"]))
+                estimates[(m.child_id, m.subject, m.topic, m.bloom)] = m.p_mastery
+            if len(details) >= 100_000:
+                db.execute(insert(models.QuizAttempt), attempts)
+                db.execute(insert(models.QuizAttemptDetail), details)
+                attempts, details = [], []
+        if attempts:
+            db.execute(insert(models.QuizAttempt), attempts)
+        if details:
+            db.execute(insert(models.QuizAttemptDetail), details)
+        db.commit()
+    return estimates
+
+
+def scratch_db(name: str):
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='mastery-'), name)}")
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--children", type=int, default=2000)
+    ap.add_argument("--attempts", type=int, default=50, help="attempts per child")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    # 1. Online updates == batch replay
+    _, Session = scratch_db("check.db")
+    online = seed(Session, simulate(random.Random(args.seed), 50, 40), online=True)
+    with Session() as db:
+        mastery.rebuild(db)
+        batch = {(r.child_id, r.subject, r.topic, r.bloom): r.p_mastery for r in db.query(models.TopicMastery)}
+    worst = max(abs(online[k] - batch.get(k, float("nan"))) for k in online)
+    same = online.keys() == batch.keys() and worst < 1e-9
+    print(f"Online vs batch: {len(online)} estimates, max difference {worst:.1e}  {'PASS' if same else 'FAIL'}")
+
+    # 2. Full rebuild
+    engine, Session = scratch_db("bench.db")
+    start = time.perf_counter()
+    seed(Session, simulate(random.Random(args.seed), args.children, args.attempts))
+    print(f"\nSeeded {args.children * args.attempts} attempts in {time.perf_counter() - start:.1f}s")
+    with Session() as db:
+        t0 = time.perf_counter()
+        keys, key_idx, outcomes = mastery._load(db)
+        t1 = time.perf_counter()
+        p, counts = mastery.replay(key_idx, outcomes, len(keys))
+        t2 = time.perf_counter()
+        rows = mastery.rebuild(db)
+        t3 = time.perf_counter()
+    print(f"  observations          {len(outcomes)} over {len(keys)} (child, topic, bloom) keys, longest {counts.max()}")
+    print(f"  read (chunked)        {t1 - t0:6.2f}s")
+    print(f"  NumPy replay          {t2 - t1:6.2f}s")
+    print(f"  full rebuild          {t3 - t2:6.2f}s   ({rows} rows written)")
+    print(f"  mastered (p >= {mastery.KT_MASTERED})  {np.mean(p >= mastery.KT_MASTERED):.1%} of keys")
+    raise SystemExit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# backend/bench/micro_batch.py
+"""
+Micro-batching in the engine notebook, measured on a tiny causal LM on CPU.
+
+Loads the generation code straight from notebooks/smlmodel.ipynb (prompt,
+early stopping, prefix cache, _batch_inputs, _generate_batch, MicroBatcher)
+with a byte-level tokenizer and a small randomly initialised Llama standing
+in for Mistral, then:
+  1. checks that a padded batch (prefix cache shared across rows) decodes
+     exactly what each prompt decodes on its own (greedy),
+  2. fires N concurrent requests, each running its own single-sequence
+     generate (the old threaded Flask behaviour) vs through MicroBatcher,
+  3. times a lone request both ways (the cost of the collection window).
+
+Needs torch and transformers (engine-side packages, not in
+backend/requirements.txt).
+
+    python -m backend.bench.micro_batch --requests 16 --batch-size 4 --max-wait 0.05
+"""
+import argparse, contextlib, copy, json, os, queue, random, re, statistics, threading, time
+from concurrent.futures import Future
+
+import torch
+from transformers import (BatchEncoding, DynamicCache, LlamaConfig, LlamaForCausalLM, StoppingCriteria,
+                          StoppingCriteriaList, TextIteratorStreamer)
+from transformers.utils import logging as hf_logging
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+NOTEBOOK = os.path.join(REPO_ROOT, "notebooks", "smlmodel.ipynb")
+CATALOG = os.path.join(REPO_ROOT, "backend", "data", "cbc_topics.jsonl")
+
+
+class ByteTokenizer:
+    """Byte-level stand-in for the Mistral tokenizer (same call/decode surface the notebook uses)."""
+    bos_token_id, pad_token_id, eos_token_id = 256, 257, 257
+
+    def __call__(self, text: str, return_tensors: str | None = None) -> BatchEncoding:
+        ids = [self.bos_token_id] + list(text.encode("utf-8"))
+        if return_tensors == "pt":
+            return BatchEncoding({"input_ids": torch.tensor([ids]), "attention_mask": torch.ones(1, len(ids), dtype=torch.long)})
+        return BatchEncoding({"input_ids": ids})
+
+    def decode(self, ids, skip_special_tokens: bool = True) -> str:
+        ids = ids.tolist() if hasattr(ids, "tolist") else ids
+        return bytes(i for i in ids if i < 256).decode("utf-8", errors="replace")
+
+
+def load_engine(model, tokenizer) -> dict:
+    """Execute the notebook's generation code (prompt .. routes) against the stand-ins."""
+    nb = json.load(open(NOTEBOOK, encoding="utf-8"))
+    src = "".join("".join(c["source"]) for c in nb["cells"] if c["cell_type"] == "code")
+    start = src.index('SYSTEM_PROMPT_BATCH = """')
+    end = src.index("# 3. Flask App Routes")
+    ns = dict(
+        torch=torch, json=json, re=re, time=time, copy=copy, queue=queue, Thread=threading.Thread, Lock=threading.Lock, Future=Future,
+        StoppingCriteria=StoppingCriteria, StoppingCriteriaList=StoppingCriteriaList, DynamicCache=DynamicCache,
+        TextIteratorStreamer=TextIteratorStreamer, tokenizer=tokenizer, model=model, print=lambda *a, **k: None,
+    )
+    exec(compile(src[start:end].rsplit("\n# ----", 1)[0], NOTEBOOK, "exec"), ns)
+    return ns
+
+
+def fire(fn, requests: list[tuple]) -> tuple[float, list[float]]:
+    """Run fn(req) for every request on its own thread; return wall time and per-request latencies."""
+    latencies = [0.0] * len(requests)
+
+    def one(i, req):
+        t = time.perf_counter()
+        fn(req)
+        latencies[i] = time.perf_counter() - t
+
+    threads = [threading.Thread(target=one, args=(i, r)) for i, r in enumerate(requests)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, latencies
+
+
+def pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=16)
+    ap.add_argument("--batch-size", type=int, default=4)
+    ap.add_argument("--max-wait", type=float, default=0.05)
+    ap.add_argument("--new-tokens", type=int, default=48)
+    ap.add_argument("--hidden", type=int, default=256)
+    ap.add_argument("--layers", type=int, default=4)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    hf_logging.set_verbosity_error()
+    torch.manual_seed(args.seed)
+    tok = ByteTokenizer()
+    model = LlamaForCausalLM(LlamaConfig(
+        vocab_size=258, hidden_size=args.hidden, intermediate_size=args.hidden * 3,
+        num_hidden_layers=args.layers, num_attention_heads=4, num_key_value_heads=4,
+        max_position_embeddings=4096, bos_token_id=tok.bos_token_id, eos_token_id=None, pad_token_id=tok.pad_token_id,
+    )).eval()
+    engine = load_engine(model, tok)
+
+    rows = [json.loads(l) for l in open(CATALOG, encoding="utf-8") if l.strip()]
+    rng = random.Random(args.seed)
+    requests = [(r["subject"], r["grade"], r["topics"], 15, args.new_tokens) for r in rng.choices(rows, k=args.requests)]
+
+    # 1. Batched decoding matches single-sequence decoding
+    sample = requests[: args.batch_size]
+    prompts = [tok(engine["build_prompt"](s, g, t))["input_ids"] for s, g, t, _, _ in sample]
+    greedy = dict(max_new_tokens=16, do_sample=False, pad_token_id=tok.pad_token_id)
+    with torch.no_grad():
+        ids, mask, cache = engine["_batch_inputs"](prompts)
+        batched = model.generate(input_ids=ids, attention_mask=mask, past_key_values=cache, **greedy)[:, ids.shape[1]:]
+        same = 0
+        for p, row in zip(prompts, batched):
+            x = torch.tensor([p])
+            single = model.generate(input_ids=x, attention_mask=torch.ones_like(x), **greedy)[0, len(p):]
+            same += torch.equal(single, row)
+    print(f"Prefix cache: {len(engine['PREFIX_IDS'])} tokens; batched == single-sequence output for {same}/{len(prompts)} prompts"
+          f" (notebook's own check_batched_generation: {engine['SHARE_PREFIX_IN_BATCH']})")
+
+    # 2. Concurrent load
+    batcher = engine["MicroBatcher"](args.batch_size, args.max_wait)
+    runs = {  # label -> (call, GPU_LOCK); "before" has no lock, like the old threaded Flask handlers
+        "before (one generate per request)": (lambda req: engine["_generate_batch"]([req]), contextlib.nullcontext()),
+        f"after  (MicroBatcher, size {args.batch_size}, wait {args.max_wait * 1000:.0f} ms)":
+            (lambda req: batcher.submit(*req), engine["GPU_LOCK"]),
+    }
+    print(f"\n{args.requests} concurrent requests, {args.new_tokens} new tokens each")
+    for label, (fn, lock) in runs.items():
+        engine["GPU_LOCK"] = lock
+        wall, lat = fire(fn, requests)
+        print(f"  {label:<44} {args.requests / wall:5.2f} quizzes/s   p50 {pct(lat, 0.5):6.2f}s   p95 {pct(lat, 0.95):6.2f}s")
+    print(f"  batches run: {batcher.batches} for {batcher.requests} requests")
+
+    # 3. A lone request
+    print("\nSingle request")
+    for label, (fn, lock) in runs.items():
+        engine["GPU_LOCK"] = lock
+        times = [fire(fn, [requests[0]])[0] for _ in range(3)]
+        print(f"  {label:<44} {statistics.median(times):6.2f}s")
+    raise SystemExit(0 if same == len(prompts) and engine["SHARE_PREFIX_IN_BATCH"] else 1)
+
+
+if __name__ == "__main__":
+    main()
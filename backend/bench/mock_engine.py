@@ -0,0 +1,220 @@
+# backend/bench/mock_engine.py
+"""
+Local stand-in for the Colab quiz engine (notebooks/smlmodel.ipynb).
+
+Speaks the same contract: GET /health, POST /generate ({"metadata",
+"questions", "elapsed"} or 500 {"error"}) and POST /generate_stream (raw
+model text). It never touches a GPU. Instead it reproduces the engine's
+behaviour:
+  * latency drawn from a distribution (fixed / uniform / lognormal / exp),
+  * a limited number of GPU slots, so concurrent generations queue,
+  * token-by-token streaming spread over the sampled latency,
+  * a malformed-JSON rate (the notebook retries once, then returns 500),
+  * a failure rate (500 up front or, when streaming, a dropped connection).
+
+    python -m backend.bench.mock_engine --port 5000 --latency lognormal:20:0.5 \\
+        --malformed-rate 0.05 --failure-rate 0.02
+"""
+import argparse, asyncio, json, math, random, re, time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LETTERS = ["A", "B", "C", "D"]
+WORDS = ("river farm market school water maize goat matatu rain forest sun soil "
+         "plant animal energy shop road village lake hill shamba tea").split()
+
+
+def parse_latency(spec: str):
+    """
+    "fixed:S", "uniform:LO:HI", "lognormal:MEDIAN:SIGMA" or "exp:MEAN"
+    (seconds) -> function(rng) returning one latency sample.
+    """
+    kind, *args = spec.split(":")
+    vals = [float(a) for a in args]
+    if kind == "fixed" and len(vals) == 1:
+        return lambda rng: vals[0]
+    if kind == "uniform" and len(vals) == 2:
+        return lambda rng: rng.uniform(vals[0], vals[1])
+    if kind == "lognormal" and len(vals) == 2:
+        return lambda rng: rng.lognormvariate(math.log(vals[0]), vals[1])
+    if kind == "exp" and len(vals) == 1:
+        return lambda rng: rng.expovariate(1 / vals[0])
+    raise ValueError(f"Bad latency spec: {spec!r}")
+
+
+def make_items(rng: random.Random, subject: str, grade: int, topic: str, n: int) -> list[dict]:
+    items = []
+    for i in range(n):
+        a, b = rng.sample(WORDS, 2)
+        options = [f"The {w}" for w in rng.sample(WORDS, 4)]
+        items.append({
+            "subject": subject,
+            "grade": grade,
+            "topic": topic,
+            "bloom_level": rng.randint(1, 6),
+            "question": f"Question {i + 1} on {topic}: how does the {a} near the {b} help a family in Grade {grade}?",
+            "options": dict(zip(LETTERS, options)),
+            "answer": rng.choice(LETTERS),
+            "rationale": f"The {a} and the {b} are linked in {topic}.",
+        })
+    return items
+
+
+def corrupt(text: str, rng: random.Random) -> str:
+    """Break the JSON the way a sampling model does: drop a quote or the closing bracket."""
+    if rng.random() < 0.5:
+        quotes = [m.start() for m in re.finditer('"', text)]
+        i = rng.choice(quotes)
+        return text[:i] + text[i + 1:]
+    return text.rstrip().rstrip("]")
+
+
+class MockEngine:
+    def __init__(self, latency: str = "lognormal:20:0.5", slots: int = 1, items: tuple[int, int] = (10, 15),
+                 malformed_rate: float = 0.0, failure_rate: float = 0.0, chunk_chars: int = 4,
+                 prose_rate: float = 0.2, seed: int | None = None):
+        self.sample_latency = parse_latency(latency)
+        self.latency_spec = latency
+        self.items = items
+        self.malformed_rate = malformed_rate
+        self.failure_rate = failure_rate
+        self.chunk_chars = chunk_chars
+        self.prose_rate = prose_rate
+        self.rng = random.Random(seed)
+        self._slots = asyncio.Semaphore(slots)
+        self.slots = slots
+        self.counts = {"generate": 0, "generate_stream": 0, "failed": 0, "malformed": 0, "ok": 0}
+        self.inflight = 0
+        self.peak_inflight = 0
+
+    def model_text(self, subject: str, grade: int, topic: str) -> tuple[str, bool]:
+        """One decode: optional prose, the JSON array, maybe corrupted."""
+        items = make_items(self.rng, subject, grade, topic, self.rng.randint(*self.items))
+        text = json.dumps(items, ensure_ascii=False, indent=1)
+        if self.rng.random() < self.prose_rate:
+            text = "Here is the quiz:\n" + text
+        malformed = self.rng.random() < self.malformed_rate
+        return (corrupt(text, self.rng) if malformed else text), malformed
+
+    async def _decode(self, seconds: float) -> None:
+        async with self._slots:
+            self.inflight += 1
+            self.peak_inflight = max(self.peak_inflight, self.inflight)
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                self.inflight -= 1
+
+    def stats(self) -> dict:
+        return {**self.counts, "inflight": self.inflight, "peak_inflight": self.peak_inflight,
+                "slots": self.slots, "latency": self.latency_spec}
+
+
+def _grade(data: dict) -> int:
+    return int(re.search(r"\d+", str(data.get("grade"))).group())
+
+
+def make_app(engine: MockEngine) -> FastAPI:
+    app = FastAPI(title="Mock quiz engine")
+    app.state.engine = engine
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok", "model": "mock", "device": "cpu"}
+
+    @app.get("/stats")
+    def stats():
+        return engine.stats()
+
+    @app.post("/generate")
+    async def generate(request: Request):
+        data = await request.json()
+        subject, topic, grade = data.get("subject"), data.get("topic"), _grade(data)
+        engine.counts["generate"] += 1
+        start = time.time()
+        if engine.rng.random() < engine.failure_rate:
+            await engine._decode(engine.sample_latency(engine.rng) * engine.rng.random())
+            engine.counts["failed"] += 1
+            return JSONResponse({"error": "CUDA out of memory"}, status_code=500)
+
+        for _ in range(2):  # same retry budget as the notebook's generate_quiz
+            await engine._decode(engine.sample_latency(engine.rng))
+            text, malformed = engine.model_text(subject, grade, topic)
+            if not malformed:
+                break
+            engine.counts["malformed"] += 1
+        else:
+            return JSONResponse({"error": "Failed to parse a valid JSON array for quiz."}, status_code=500)
+
+        engine.counts["ok"] += 1
+        questions = json.loads(text[text.index("["):])
+        return {
+            "metadata": {"subject": subject, "grade": grade, "topic": topic, "bloom_level": data.get("bloom_level")},
+            "questions": questions,
+            "elapsed": time.time() - start,
+        }
+
+    @app.post("/generate_stream")
+    async def generate_stream(request: Request):
+        data = await request.json()
+        engine.counts["generate_stream"] += 1
+        fails = engine.rng.random() < engine.failure_rate
+        if fails and engine.rng.random() < 0.5:
+            engine.counts["failed"] += 1
+            return JSONResponse({"error": "CUDA out of memory"}, status_code=500)
+
+        text, malformed = engine.model_text(data.get("subject"), _grade(data), data.get("topic"))
+        engine.counts["malformed" if malformed else "ok"] += 1
+        chunks = [text[i:i + engine.chunk_chars] for i in range(0, len(text), engine.chunk_chars)]
+        per_chunk = engine.sample_latency(engine.rng) / max(len(chunks), 1)
+        cut_at = engine.rng.randrange(len(chunks)) if fails else None
+
+        async def tokens():
+            async with engine._slots:
+                engine.inflight += 1
+                engine.peak_inflight = max(engine.peak_inflight, engine.inflight)
+                try:
+                    for i, chunk in enumerate(chunks):
+                        if i == cut_at:
+                            engine.counts["failed"] += 1
+                            raise ConnectionResetError("mock engine dropped the stream")
+                        await asyncio.sleep(per_chunk)
+                        yield chunk
+                finally:
+                    engine.inflight -= 1
+
+        return StreamingResponse(tokens(), media_type="text/plain")
+
+    return app
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=5000)
+    ap.add_argument("--latency", default="lognormal:20:0.5", help="fixed:S | uniform:LO:HI | lognormal:MEDIAN:SIGMA | exp:MEAN")
+    ap.add_argument("--slots", type=int, default=1, help="generations the 'GPU' runs at once")
+    ap.add_argument("--items", default="10:15", help="min:max questions per quiz")
+    ap.add_argument("--malformed-rate", type=float, default=0.0)
+    ap.add_argument("--failure-rate", type=float, default=0.0)
+    ap.add_argument("--chunk-chars", type=int, default=4, help="characters per streamed token")
+    ap.add_argument("--seed", type=int, default=None)
+    return ap
+
+
+def main() -> None:
+    import uvicorn
+
+    args = build_parser().parse_args()
+    lo, hi = (int(x) for x in args.items.split(":"))
+    engine = MockEngine(
+        latency=args.latency, slots=args.slots, items=(lo, hi),
+        malformed_rate=args.malformed_rate, failure_rate=args.failure_rate,
+        chunk_chars=args.chunk_chars, seed=args.seed,
+    )
+    uvicorn.run(make_app(engine), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
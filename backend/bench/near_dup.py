@@ -0,0 +1,121 @@
+# backend/bench/near_dup.py
+"""
+Near-duplicate lookups on a synthetic question corpus.
+
+Builds a NearDupIndex over N random questions, then times lookups for
+  * exact repeats,
+  * reworded repeats (function words swapped, options reordered),
+  * one-word edits (a content word replaced),
+  * fresh questions (should not match),
+against a brute-force NumPy scan over every stored fingerprint.
+
+    python -m backend.bench.near_dup --items 1000000 --queries 2000
+"""
+import argparse, random, statistics, time
+
+import numpy as np
+
+from ..dedup import NearDupIndex, fingerprint, distance, NEAR_DUP_DISTANCE
+
+VOCAB_SIZE = 5000
+FUNCTION_SWAPS = {"a": "the", "the": "a", "of": "for", "for": "of", "is": "are", "are": "is"}
+FILLERS = ["a", "the", "of", "for", "is", "are"]
+
+
+def make_question(rng: random.Random, vocab: list[str]) -> tuple[list[str], list[str]]:
+    words = []
+    for _ in range(rng.randint(8, 16)):
+        words.append(rng.choice(FILLERS) if rng.random() < 0.3 else rng.choice(vocab))
+    options = [" ".join(rng.choices(vocab, k=rng.randint(1, 3))) for _ in range(4)]
+    return words, options
+
+
+def fp_of(words: list[str], options: list[str]) -> int:
+    return fingerprint(" ".join(words) + "?", tuple(options))
+
+
+def reworded(rng, words, options):
+    return [FUNCTION_SWAPS.get(w, w) for w in words], rng.sample(options, len(options))
+
+
+def one_word_edit(rng, words, options, vocab):
+    content = [i for i, w in enumerate(words) if w not in FUNCTION_SWAPS] or [0]
+    edited = list(words)
+    edited[rng.choice(content)] = rng.choice(vocab)
+    return edited, options
+
+
+def timed(fn, items) -> tuple[list, list[float]]:
+    results, times = [], []
+    for it in items:
+        start = time.perf_counter()
+        results.append(fn(it))
+        times.append(time.perf_counter() - start)
+    return results, times
+
+
+def pct(times: list[float], q: float) -> float:
+    ordered = sorted(times)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e6
+
+
+def report(label: str, hits: list[bool], times: list[float]) -> None:
+    print(f"  {label:<18} match rate {sum(hits) / len(hits):6.1%}   "
+          f"p50 {pct(times, 0.5):7.1f} us   p99 {pct(times, 0.99):7.1f} us")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--items", type=int, default=200_000)
+    ap.add_argument("--queries", type=int, default=2000)
+    ap.add_argument("--distance", type=int, default=NEAR_DUP_DISTANCE)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    vocab = [f"w{i}" for i in range(VOCAB_SIZE)]
+
+    print(f"Fingerprinting {args.items} questions ...")
+    start = time.perf_counter()
+    corpus = [make_question(rng, vocab) for _ in range(args.items)]
+    fps = [fp_of(w, o) for w, o in corpus]
+    fp_secs = time.perf_counter() - start
+    fingerprint.cache_clear()
+
+    start = time.perf_counter()
+    index = NearDupIndex(args.distance)
+    for i, fp in enumerate(fps):
+        index.add(fp, i)
+    build_secs = time.perf_counter() - start
+    print(f"  fingerprints {fp_secs:.1f} s ({fp_secs / args.items * 1e6:.0f} us each), "
+          f"index build {build_secs:.1f} s, {len(index)} items, max distance {args.distance}")
+
+    picks = [corpus[rng.randrange(args.items)] for _ in range(args.queries)]
+    cases = {
+        "exact repeat": [fp_of(w, o) for w, o in picks],
+        "reworded repeat": [fp_of(*reworded(rng, w, o)) for w, o in picks],
+        "one-word edit": [fp_of(*one_word_edit(rng, w, o, vocab)) for w, o in picks],
+        "fresh question": [fp_of(*make_question(rng, vocab)) for _ in range(args.queries)],
+    }
+
+    print("\nBanded index (NearDupIndex.contains)")
+    for label, queries in cases.items():
+        hits, times = timed(index.contains, queries)
+        report(label, hits, times)
+
+    print("\nBrute-force NumPy scan over all fingerprints")
+    stored = np.array(fps, dtype=np.uint64)
+    def scan(fp: int) -> bool:
+        return bool((np.bitwise_count(stored ^ np.uint64(fp)) <= args.distance).any())
+    for label, queries in cases.items():
+        sample = queries[: max(args.queries // 10, 50)]
+        hits, times = timed(scan, sample)
+        report(label, hits, times)
+
+    dists = [distance(fp_of(*reworded(rng, w, o)), fp_of(w, o)) for w, o in picks[:500]]
+    edits = [distance(fp_of(*one_word_edit(rng, w, o, vocab)), fp_of(w, o)) for w, o in picks[:500]]
+    print(f"\nMedian bit distance: reworded {statistics.median(dists)}, one-word edit {statistics.median(edits)}")
+
+
+if __name__ == "__main__":
+    main()
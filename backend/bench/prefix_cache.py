@@ -0,0 +1,120 @@
+# backend/bench/prefix_cache.py
+"""
+Prefix KV-cache reuse, measured on a tiny causal LM on CPU.
+
+Uses the engine notebook's own SYSTEM_PROMPT_BATCH / USER_TEMPLATE_BATCH,
+a byte-level tokenizer and a small randomly initialised Llama. The prefix
+is found the same way as in the notebook: the longest shared token prefix
+of two rendered prompts, minus one token. For a set of catalog topics it
+compares:
+  * full:   model.generate on the whole prompt (what the engine did before)
+  * cached: model.generate resuming from a copy of the prefilled prefix cache
+and reports prompt tokens prefilled per quiz, prefill and generate time,
+and whether greedy outputs are identical.
+
+Needs torch and transformers (engine-side packages, not in
+backend/requirements.txt).
+
+    python -m backend.bench.prefix_cache --quizzes 20 --new-tokens 32
+"""
+import argparse, copy, json, os, random, re, statistics, time
+
+import torch
+from transformers import DynamicCache, LlamaConfig, LlamaForCausalLM
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+NOTEBOOK = os.path.join(REPO_ROOT, "notebooks", "smlmodel.ipynb")
+CATALOG = os.path.join(REPO_ROOT, "backend", "data", "cbc_topics.jsonl")
+BOS = 256
+
+
+def notebook_prompts() -> tuple[str, str]:
+    """SYSTEM_PROMPT_BATCH and USER_TEMPLATE_BATCH as defined in the notebook."""
+    nb = json.load(open(NOTEBOOK, encoding="utf-8"))
+    src = "".join("".join(c["source"]) for c in nb["cells"] if c["cell_type"] == "code")
+    found = dict(re.findall(r'^(SYSTEM_PROMPT_BATCH|USER_TEMPLATE_BATCH) = """(.*?)"""', src, flags=re.S | re.M))
+    return found["SYSTEM_PROMPT_BATCH"], found["USER_TEMPLATE_BATCH"]
+
+
+def encode(text: str) -> list[int]:
+    """Byte-level tokenizer with a BOS id, standing in for the Mistral tokenizer."""
+    return [BOS] + list(text.encode("utf-8"))
+
+
+def shared_prefix(a: list[int], b: list[int]) -> list[int]:
+    n = 0
+    while n < min(len(a), len(b)) and a[n] == b[n]:
+        n += 1
+    return a[:max(n - 1, 0)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--quizzes", type=int, default=20)
+    ap.add_argument("--new-tokens", type=int, default=32)
+    ap.add_argument("--hidden", type=int, default=256)
+    ap.add_argument("--layers", type=int, default=4)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    torch.manual_seed(args.seed)
+    torch.set_num_threads(max(1, min(4, os.cpu_count() or 1)))
+    model = LlamaForCausalLM(LlamaConfig(
+        vocab_size=BOS + 1, hidden_size=args.hidden, intermediate_size=args.hidden * 3,
+        num_hidden_layers=args.layers, num_attention_heads=4, num_key_value_heads=4,
+        max_position_embeddings=4096, bos_token_id=BOS, eos_token_id=None, pad_token_id=0,
+    )).eval()
+
+    system, user = notebook_prompts()
+    render = lambda s, g, t: f"[INST] {system}\n\n{user.format(subject=s, grade=g, topic=t)} [/INST]"
+
+    prefix = shared_prefix(encode(render("Mathematics", 4, "Fractions")), encode(render("Science", 6, "Human Body")))
+    cache = DynamicCache()
+    with torch.no_grad():
+        _, startup = timed(lambda: model(input_ids=torch.tensor([prefix]), past_key_values=cache, use_cache=True))
+    print(f"Prefix: {len(prefix)} tokens prefilled once at startup ({startup * 1000:.0f} ms)")
+
+    rows = [json.loads(l) for l in open(CATALOG, encoding="utf-8") if l.strip()]
+    picks = random.Random(args.seed).sample(rows, min(args.quizzes, len(rows)))
+
+    gen = dict(max_new_tokens=args.new_tokens, do_sample=False, pad_token_id=0)
+    full_tokens, cached_tokens = [], []
+    full_prefill, cached_prefill, full_gen, cached_gen = [], [], [], []
+    identical = 0
+    with torch.no_grad():
+        for row in picks:
+            ids = encode(render(row["subject"], row["grade"], row["topics"]))
+            assert ids[:len(prefix)] == prefix
+            x = torch.tensor([ids])
+            full_tokens.append(len(ids))
+            cached_tokens.append(len(ids) - len(prefix))
+
+            _, t = timed(lambda: model(input_ids=x, use_cache=True))
+            full_prefill.append(t)
+            _, t = timed(lambda: model(input_ids=x[:, len(prefix):], past_key_values=copy.deepcopy(cache), use_cache=True))
+            cached_prefill.append(t)
+
+            out_full, t = timed(lambda: model.generate(input_ids=x, attention_mask=torch.ones_like(x), **gen))
+            full_gen.append(t)
+            out_cached, t = timed(lambda: model.generate(
+                input_ids=x, attention_mask=torch.ones_like(x), past_key_values=copy.deepcopy(cache), **gen))
+            cached_gen.append(t)
+            identical += torch.equal(out_full, out_cached)
+
+    ms = lambda xs: statistics.mean(xs) * 1000
+    print(f"\n{len(picks)} quizzes, {args.new_tokens} new tokens each (greedy)")
+    print(f"  prompt tokens prefilled   full {statistics.mean(full_tokens):7.1f}   cached {statistics.mean(cached_tokens):7.1f}"
+          f"   ({1 - sum(cached_tokens) / sum(full_tokens):.1%} fewer)")
+    print(f"  prefill time              full {ms(full_prefill):7.1f} ms   cached {ms(cached_prefill):7.1f} ms")
+    print(f"  generate time             full {ms(full_gen):7.1f} ms   cached {ms(cached_gen):7.1f} ms")
+    print(f"  identical outputs         {identical}/{len(picks)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# backend/bench/question_dedup.py
+"""
+On-disk size of quiz_attempt_details before and after migration 3 (answered
+question text moved into the content-addressed questions table).
+
+Builds a database in the old layout (stem, options_json and explanation on
+every detail row): N attempts of 10 answers drawn from a pool of distinct
+questions, so retakes and classmates repeat the same text. Then runs
+migrations.upgrade(), checks that /quiz/attempt/{id} returns exactly what
+the old columns held, and prints file sizes (both files VACUUMed).
+
+    python -m backend.bench.question_dedup --attempts 20000 --questions 3000
+"""
+import argparse, json, os, random, tempfile, time
+
+import orjson
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from .. import models
+from ..database import Base
+from ..migrations import upgrade
+from ..routes.quiz import get_attempt
+
+QUIZ_SIZE = 10
+WORDS = ("plant leaf root stem water sunlight fraction half quarter whole number shilling coins "
+         "market mango farmer river energy soil seed metre litre kilogram shape angle triangle "
+         "rectangle area perimeter table chart children school teacher morning evening").split()
+LEGACY_DETAILS = (
+    "CREATE TABLE quiz_attempt_details (id INTEGER NOT NULL PRIMARY KEY, "
+    "attempt_id INTEGER REFERENCES quiz_attempts (id) ON DELETE CASCADE, question_index INTEGER, "
+    "stem VARCHAR, options_json VARCHAR, picked_idx INTEGER, correct_idx INTEGER, explanation VARCHAR)"
+)
+
+
+def sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize()
+
+
+def seed_legacy(engine, attempts: int, n_questions: int, rng: random.Random) -> None:
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE quiz_attempt_details"))
+        conn.execute(text(LEGACY_DETAILS))
+        conn.execute(text("CREATE INDEX ix_quiz_attempt_details_attempt_id ON quiz_attempt_details (attempt_id)"))
+    pool = [
+        (sentence(rng, rng.randint(10, 20)) + "?",
+         json.dumps([sentence(rng, rng.randint(1, 4)) for _ in range(4)]),
+         sentence(rng, rng.randint(15, 30)) + ".")
+        for _ in range(n_questions)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(models.QuizAttempt), [
+            {"id": i + 1, "child_id": rng.randint(1, 500), "subject": "Science", "topic": "Plants",
+             "bloom_level": "Apply", "score": 0.5} for i in range(attempts)
+        ])
+        for lo in range(0, attempts, 5000):
+            rows = []
+            for attempt_id in range(lo + 1, min(lo + 5000, attempts) + 1):
+                for q, (stem, options_json, explanation) in enumerate(rng.sample(pool, QUIZ_SIZE)):
+                    rows.append((attempt_id, q, stem, options_json, rng.randrange(4), 0, explanation))
+            conn.connection.driver_connection.executemany(
+                "INSERT INTO quiz_attempt_details (attempt_id, question_index, stem, options_json, picked_idx, "
+                "correct_idx, explanation) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+def legacy_attempt(engine, attempt_id: int) -> list[dict]:
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT question_index, stem, options_json, picked_idx, correct_idx, explanation "
+            "FROM quiz_attempt_details WHERE attempt_id = :a ORDER BY question_index"), {"a": attempt_id})
+        return [{"question_index": r[0], "stem": r[1], "options": json.loads(r[2] or "[]"),
+                 "picked_idx": r[3], "correct_idx": r[4], "explanation": r[5] or ""} for r in rows]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--attempts", type=int, default=20_000)
+    ap.add_argument("--questions", type=int, default=3_000, help="distinct questions in the pool")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix="questions-")
+    path = os.path.join(workdir, "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    seed_legacy(engine, args.attempts, args.questions, rng)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM")
+    before = os.path.getsize(path)
+    sample = rng.sample(range(1, args.attempts + 1), 50)
+    expected = {a: legacy_attempt(engine, a) for a in sample}
+
+    start = time.perf_counter()
+    applied = upgrade(engine)
+    elapsed = time.perf_counter() - start
+    after = os.path.getsize(path)
+
+    with sessionmaker(bind=engine)() as db:
+        same = all(orjson.loads(get_attempt(a, db=db).body)["details"] == expected[a] for a in sample)
+        n_questions = db.query(models.Question).count()
+    print(f"{args.attempts} attempts x {QUIZ_SIZE} answers, {args.questions} distinct questions in the pool")
+    print(f"  migrations {applied} in {elapsed:.1f}s -> {n_questions} questions rows")
+    print(f"  app.db before  {before / 2**20:8.1f} MiB")
+    print(f"  app.db after   {after / 2**20:8.1f} MiB   ({100 * (1 - after / before):.0f}% smaller)")
+    print(f"  /quiz/attempt/{{id}} unchanged on {len(sample)} sampled attempts: {same}")
+    raise SystemExit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# backend/bench/submit_batch.py
+"""
+Per-row ORM submits vs /quiz/submit/batch's bulk write path.
+
+Generates N attempts (10 answered questions each, spread over a few
+hundred children and topics) and saves them into fresh SQLite files:
+  * per-row:  the previous /quiz/submit body, one attempt per transaction,
+              db.add for the attempt and for every detail row
+  * per-row, one transaction: the same adds, a single commit at the end
+  * batch:    submissions.save_attempts in QUIZ_SUBMIT_BATCH_MAX chunks
+              (executemany inserts, one transaction per chunk)
+then re-sends every batch to time the idempotent retry path.
+learner_stats / topic_mastery / review_schedule are updated in all modes.
+
+    python -m backend.bench.submit_batch --attempts 10000
+"""
+import argparse, datetime, json, os, random, tempfile, time, uuid
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from .. import models, questions, learner_stats, mastery, review, submissions
+from ..database import Base
+from ..migrations import upgrade
+from ..routes.quiz import AnswerDetail, SubmitPayload
+
+TOPICS = [("Mathematics", "Fractions"), ("Mathematics", "Money"), ("Science", "Plants"), ("English", "Reading")]
+
+
+def make_payloads(n: int, rng: random.Random) -> list[SubmitPayload]:
+    start = datetime.datetime(2026, 1, 1)
+    out = []
+    for i in range(n):
+        subject, topic = rng.choice(TOPICS)
+        picks = [rng.randrange(4) for _ in range(10)]
+        out.append(SubmitPayload(
+            profile_id=rng.randint(1, 300), subject=subject, topic=topic, bloom_level="Apply",
+            score=sum(p == 0 for p in picks) / 10, client_key=str(uuid.UUID(int=rng.getrandbits(128))),
+            taken_at=start + datetime.timedelta(minutes=i),
+            details=[AnswerDetail(question_index=q, stem=f"{topic} question {rng.randrange(500)}?",
+                                  options=["A", "B", "C", "D"], picked_idx=p, correct_idx=0, explanation="Because.")
+                     for q, p in enumerate(picks)],
+        ))
+    return out
+
+
+def per_row_submit(db, p: SubmitPayload) -> None:
+    """The /quiz/submit body before batching: db.add per row."""
+    attempt = models.QuizAttempt(child_id=p.profile_id, subject=p.subject, topic=p.topic,
+                                 bloom_level=p.bloom_level or "Unknown", score=p.score, taken_at=p.taken_at)
+    db.add(attempt)
+    db.flush()
+    question_ids = questions.ids(db, [(d.stem, json.dumps(d.options), d.explanation or "") for d in p.details])
+    for d, question_id in zip(p.details, question_ids):
+        db.add(models.QuizAttemptDetail(
+            attempt_id=attempt.id, question_index=d.question_index, question_id=question_id,
+            picked_idx=d.picked_idx, correct_idx=d.correct_idx,
+        ))
+    learner_stats.record(db, attempt)
+    mastery.record(db, attempt, mastery.observations(p.details, p.score))
+    review.record(db, attempt)
+
+
+def fresh_session():
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='submit-'), 'bench.db')}")
+    Base.metadata.create_all(bind=engine)
+    upgrade(engine)
+    return sessionmaker(bind=engine)()
+
+
+def counts(db) -> tuple[int, int]:
+    return db.query(func.count(models.QuizAttempt.id)).scalar(), db.query(func.count(models.QuizAttemptDetail.id)).scalar()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--attempts", type=int, default=10_000)
+    ap.add_argument("--batch-size", type=int, default=submissions.SUBMIT_BATCH_MAX)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    payloads = make_payloads(args.attempts, random.Random(args.seed))
+    batches = [payloads[i:i + args.batch_size] for i in range(0, len(payloads), args.batch_size)]
+    print(f"{args.attempts} attempts x 10 answers\n")
+
+    db = fresh_session()
+    start = time.perf_counter()
+    for p in payloads:
+        per_row_submit(db, p)
+        db.commit()
+    per_row = time.perf_counter() - start
+    print(f"  per-row adds, commit per attempt    {per_row:7.2f}s   {args.attempts / per_row:8.0f} attempts/s   rows {counts(db)}")
+
+    db = fresh_session()
+    start = time.perf_counter()
+    for p in payloads:
+        per_row_submit(db, p)
+    db.commit()
+    one_tx = time.perf_counter() - start
+    print(f"  per-row adds, one transaction       {one_tx:7.2f}s   {args.attempts / one_tx:8.0f} attempts/s   rows {counts(db)}")
+
+    db = fresh_session()
+    start = time.perf_counter()
+    for batch in batches:
+        submissions.save_attempts(db, batch)
+    bulk = time.perf_counter() - start
+    print(f"  batch of {args.batch_size:<4} (bulk inserts)        {bulk:7.2f}s   {args.attempts / bulk:8.0f} attempts/s   rows {counts(db)}")
+
+    start = time.perf_counter()
+    dupes = sum(r["status"] == "duplicate" for batch in batches for r in submissions.save_attempts(db, batch))
+    retry = time.perf_counter() - start
+    print(f"  retry every batch                   {retry:7.2f}s   {dupes} duplicates, rows {counts(db)}")
+    print(f"\n  bulk vs per-row commits: {per_row / bulk:.1f}x faster; vs one-transaction adds: {one_tx / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# backend/bench/submit_queue.py
+"""
+A class submitting at once: per-request transactions vs the write-behind
+queue (backend/submit_queue.py), plus a crash-recovery check.
+
+  * direct: T threads each save their attempts the way synchronous
+            /quiz/submit does (own session, one transaction per attempt),
+            all contending for SQLite's writer lock
+  * queue:  the same threads call SubmitQueue.enqueue (spool + fsync) and
+            one writer group-commits; "durable" is when the last attempt
+            is in the database
+  * crash:  attempts are spooled with no writer running, the process
+            "dies" (plus a torn half-written line), and a new queue replays
+            the spool; replaying the same spool again must save nothing
+
+    python -m backend.bench.submit_queue --threads 32 --per-thread 20
+"""
+import argparse, os, random, shutil, statistics, tempfile, threading, time
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from .. import models, submissions
+from ..database import Base
+from ..migrations import upgrade
+from ..submit_queue import SubmitQueue, PENDING
+from .submit_batch import make_payloads
+
+
+def scratch_db():
+    workdir = tempfile.mkdtemp(prefix="submit-queue-")
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    upgrade(engine)
+    return workdir, sessionmaker(bind=engine)
+
+
+def attempts_saved(Session) -> int:
+    with Session() as db:
+        return db.query(func.count(models.QuizAttempt.id)).scalar()
+
+
+def run_threads(work, chunks) -> tuple[list[float], int, float]:
+    """Run work(payload) for every payload, one thread per chunk. Returns latencies, errors, wall time."""
+    latencies, errors, lock = [], [0], threading.Lock()
+
+    def one(chunk):
+        for p in chunk:
+            start = time.perf_counter()
+            try:
+                work(p)
+            except OperationalError:
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=one, args=(c,)) for c in chunks]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0], time.perf_counter() - start
+
+
+def report(name: str, latencies: list[float], errors: int, wall: float, extra: str = "") -> None:
+    q = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0] * 99
+    print(f"  {name:<8} ack p50 {q[49] * 1000:7.1f}ms  p99 {q[98] * 1000:7.1f}ms  max {max(latencies) * 1000:7.1f}ms"
+          f"  errors {errors:3d}  wall {wall:6.2f}s{extra}")
+
+
+def wait_done(q: SubmitQueue, ids: list[str], timeout: float = 120) -> None:
+    deadline = time.monotonic() + timeout
+    while any(q.status(i)["status"] == PENDING for i in ids):
+        if time.monotonic() > deadline:
+            raise SystemExit("submit queue did not drain")
+        time.sleep(0.01)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--threads", type=int, default=32)
+    ap.add_argument("--per-thread", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    payloads = make_payloads(args.threads * args.per_thread, random.Random(args.seed))
+    chunks = [payloads[i::args.threads] for i in range(args.threads)]
+    print(f"{args.threads} concurrent clients x {args.per_thread} submits (10 answers each)\n")
+
+    _, Session = scratch_db()
+
+    def direct(p):
+        with Session() as db:
+            submissions.save_attempts(db, [p])
+
+    latencies, errors, wall = run_threads(direct, chunks)
+    report("direct", latencies, errors, wall, f"  saved {attempts_saved(Session)}")
+
+    workdir, Session = scratch_db()
+    q = SubmitQueue(os.path.join(workdir, "spool.jsonl"), Session)
+    q.start()
+    ids = []
+    latencies, errors, wall = run_threads(lambda p: ids.append(q.enqueue(p)), chunks)
+    start = time.perf_counter()
+    wait_done(q, ids)
+    durable = wall + time.perf_counter() - start
+    q.stop()
+    report("queue", latencies, errors, wall, f"  all committed at {durable:.2f}s, saved {attempts_saved(Session)}")
+
+    # Crash: spooled and acknowledged, but the writer never ran
+    workdir, Session = scratch_db()
+    spool = os.path.join(workdir, "spool.jsonl")
+    dead = SubmitQueue(spool, Session)
+    dead._spool = open(spool, "a", encoding="utf-8")
+    acked = [dead.enqueue(p) for p in payloads[:200]]
+    dead._spool.write('{"pending_id": "torn", "payl')
+    dead._spool.close()
+    shutil.copy(spool, spool + ".copy")
+
+    revived = SubmitQueue(spool, Session)
+    recovered = revived.start()
+    wait_done(revived, acked)
+    revived.stop()
+    after_recovery = attempts_saved(Session)
+
+    shutil.copy(spool + ".copy", spool)  # died again after committing, before the spool was emptied
+    again = SubmitQueue(spool, Session)
+    again.start()
+    wait_done(again, acked)
+    again.stop()
+    ok = after_recovery == len(acked) == attempts_saved(Session)
+    print(f"  crash    {len(acked)} acknowledged, {recovered} replayed, {after_recovery} saved; "
+          f"second replay saved {attempts_saved(Session) - after_recovery} more -> {'OK' if ok else 'FAIL'}")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
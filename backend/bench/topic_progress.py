@@ -0,0 +1,76 @@
+# backend/bench/topic_progress.py
+"""
+The topic grid for one child (every topic of their grade), with many
+children's summaries in the database:
+  * per topic: learner_stats.get + mastery.levels per catalog topic, the
+               way a page would build it from the existing helpers
+  * aggregate: progress._build, one GROUP BY over the child's rows
+  * cached:    /quiz/progress answered from the per-child cache
+
+    python -m backend.bench.topic_progress --children 2000
+"""
+import argparse, datetime, os, random, tempfile, time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from .. import learner_stats, mastery, models, progress
+from ..catalog import catalog
+from ..database import Base
+from ..migrations import upgrade
+from ..question_bank import BLOOM_LEVELS
+from .history_pages import timed
+
+GRADE = 5
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--children", type=int, default=2000)
+    ap.add_argument("--studied", type=float, default=0.6, help="share of topics each child has attempted")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='progress-'), 'bench.db')}")
+    Base.metadata.create_all(bind=engine)
+    upgrade(engine)
+    topics = [t for s in catalog.subjects for t in catalog.topics_for(GRADE, s)]
+    now = datetime.datetime.utcnow()
+    stats, levels, schedule = [], [], []
+    for child in range(1, args.children + 1):
+        for t in topics:
+            if rng.random() > args.studied:
+                continue
+            key = {"child_id": child, "subject": t.subject, "topic": t.name}
+            stats.append({**key, "attempts": rng.randint(1, 20), "window_json": "[]", "ewma_score": rng.random(),
+                          "last_taken_at": now - datetime.timedelta(days=rng.randrange(90))})
+            levels += [{**key, "bloom": b, "p_mastery": rng.random(), "observations": 10}
+                       for b in rng.sample(BLOOM_LEVELS, rng.randint(1, 3))]
+            schedule.append({**key, "due_at": now + datetime.timedelta(days=rng.randrange(-10, 30)),
+                             "interval_days": 3.0, "ease": 2.5})
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        for model, rows in ((models.LearnerStats, stats), (models.TopicMastery, levels),
+                            (models.ReviewSchedule, schedule)):
+            db.execute(insert(model), rows)
+        db.commit()
+
+    child = args.children // 2
+    with Session() as db:
+        def per_topic():
+            for t in topics:
+                learner_stats.get(db, child, t.subject, t.name)
+                mastery.levels(db, child, t.subject, t.name)
+
+        print(f"{args.children} children, {len(stats)} learner_stats rows; grid of {len(topics)} Grade {GRADE} topics\n")
+        naive = timed(per_topic)
+        built = timed(lambda: progress._build(db, child, GRADE))
+        progress.cache.get(db, child, GRADE)
+        cached = timed(lambda: progress.progress(db, child, GRADE))
+        print(f"  per topic {naive:7.2f}ms ({2 * len(topics)} queries)   aggregate {built:7.2f}ms (1 query)"
+              f"   cached {cached:7.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
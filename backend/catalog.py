@@ -0,0 +1,117 @@
+# backend/catalog.py
+import os, re, json, hashlib, difflib
+
+# -------------------------------------------------------------
+# CBC TOPIC CATALOG
+# -------------------------------------------------------------
+# data/cbc_topics.jsonl is the one list of Grade 4-6 topics. It is loaded
+# once into an index keyed by normalized (grade, subject, topic), so
+# "Position and Direction", "position & direction" and
+# "Measurement – Length" all find their canonical entry. Requests for
+# anything that does not resolve are rejected before any engine call.
+CATALOG_PATH = os.path.join(os.path.dirname(__file__), "data", "cbc_topics.jsonl")
+CATALOG_FUZZY_CUTOFF = float(os.getenv("CATALOG_FUZZY_CUTOFF", 0.85))
+
+SUBJECT_ALIASES = {
+    "math": "Mathematics",
+    "maths": "Mathematics",
+    "integrated science": "Science",
+    "science and technology": "Science",
+}
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_STRAND_SEP = re.compile(r"\s+[–—-]\s+|:\s*")  # "Strand – Topic", "Strand: Topic"
+
+
+def normalize(text) -> str:
+    """Case/punctuation-insensitive form used for every catalog lookup."""
+    return _NON_WORD.sub(" ", str(text).lower().replace("&", " and ")).strip()
+
+
+def parse_grade(grade) -> int | None:
+    m = re.search(r"\d+", str(grade))
+    return int(m.group()) if m else None
+
+
+class Topic:
+    __slots__ = ("grade", "subject", "name", "aliases")
+
+    def __init__(self, grade: int, subject: str, name: str, aliases: list[str]):
+        self.grade, self.subject, self.name, self.aliases = grade, subject, name, aliases
+
+    @property
+    def key(self) -> tuple:
+        return (self.grade, normalize(self.subject), normalize(self.name))
+
+    def __repr__(self) -> str:
+        return f"Topic({self.grade}, {self.subject!r}, {self.name!r})"
+
+
+class Catalog:
+    def __init__(self, topics: list[Topic]):
+        self.topics = topics
+        self.subjects = sorted({t.subject for t in topics})
+        self._subjects = {normalize(s): s for s in self.subjects}
+        self._subjects.update({normalize(a): s for a, s in SUBJECT_ALIASES.items()})
+        self._index: dict[tuple, Topic] = {}
+        self._by_group: dict[tuple, list[Topic]] = {}
+        for t in topics:
+            self._index[t.key] = t
+            self._by_group.setdefault((t.grade, t.subject), []).append(t)
+        for t in topics:
+            for alias in t.aliases:
+                self._index.setdefault((t.grade, normalize(t.subject), normalize(alias)), t)
+        self.etag = '"' + hashlib.sha256(json.dumps(self.to_dict(), sort_keys=True).encode()).hexdigest()[:16] + '"'
+
+    @classmethod
+    def load(cls, path: str = CATALOG_PATH) -> "Catalog":
+        topics = []
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    row = json.loads(line)
+                    topics.append(Topic(int(row["grade"]), row["subject"], row["topics"], row.get("aliases", [])))
+        return cls(topics)
+
+    def subject(self, subject) -> str | None:
+        """Canonical subject name, or None."""
+        return self._subjects.get(normalize(subject))
+
+    def topics_for(self, grade: int, subject: str) -> list[Topic]:
+        return self._by_group.get((grade, subject), [])
+
+    def resolve(self, grade, subject, topic) -> Topic | None:
+        """
+        Find the catalog entry for a (grade, subject, topic) as typed anywhere
+        in the app: exact or alias match on normalized keys, then the last part
+        of "Strand – Topic" names, then a close fuzzy match within the same
+        grade and subject. None means out of scope.
+        """
+        g, s = parse_grade(grade), self.subject(subject)
+        if g is None or s is None:
+            return None
+        s_key = normalize(s)
+        wanted = normalize(topic)
+        hit = self._index.get((g, s_key, wanted))
+        if hit:
+            return hit
+        parts = _STRAND_SEP.split(str(topic))
+        if len(parts) > 1:
+            hit = self._index.get((g, s_key, normalize(parts[-1])))
+            if hit:
+                return hit
+        names = {normalize(t.name): t for t in self.topics_for(g, s)}
+        for t in self.topics_for(g, s):
+            names.update({normalize(a): t for a in t.aliases})
+        close = difflib.get_close_matches(wanted, names, n=1, cutoff=CATALOG_FUZZY_CUTOFF)
+        return names[close[0]] if close else None
+
+    def to_dict(self) -> dict:
+        """{"Grade 4": {"Mathematics": ["Whole Numbers", ...], ...}, ...}"""
+        out: dict[str, dict[str, list[str]]] = {}
+        for t in self.topics:
+            out.setdefault(f"Grade {t.grade}", {}).setdefault(t.subject, []).append(t.name)
+        return out
+
+
+catalog = Catalog.load()
@@ -0,0 +1,120 @@
+# backend/dedup.py
+import os, re, hashlib
+from functools import lru_cache
+
+import numpy as np
+
+# -------------------------------------------------------------
+# NEAR-DUPLICATE QUESTION DETECTION
+# -------------------------------------------------------------
+# Each question (stem + options) gets a 64-bit SimHash fingerprint: texts
+# that share most of their word shingles land a few bits apart. Two
+# questions count as near-duplicates when their fingerprints differ in at
+# most QUIZ_NEAR_DUP_DISTANCE bits.
+#
+# The index splits fingerprints into DISTANCE + 1 bands and files every
+# item under each band value. If two fingerprints differ in <= DISTANCE
+# bits, at least one band must match exactly (pigeonhole), so a lookup only
+# compares against the few items sharing a band instead of the whole corpus.
+NEAR_DUP_DISTANCE = int(os.getenv("QUIZ_NEAR_DUP_DISTANCE", 3))
+FINGERPRINT_BITS = 64
+
+_WORD = re.compile(r"[a-z0-9]+")
+_MASK = (1 << FINGERPRINT_BITS) - 1
+_BIT = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+# Function words carry no meaning for duplicate detection ("a plant" vs "the plant")
+_STOPWORDS = frozenset(
+    "a an the of to in on at for from by with and or is are was were be it its this that "
+    "these those which what who how does do did has have".split()
+)
+
+
+def _features(stem: str, options: tuple[str, ...]) -> list[str]:
+    words = [w for w in _WORD.findall(stem.lower()) if w not in _STOPWORDS]
+    feats = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    # Options are compared as a set: reordering A-D is still a duplicate
+    feats.extend("o:" + " ".join(_WORD.findall(o.lower())) for o in sorted(options))
+    return feats
+
+
+def _hash64(feat: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feat.encode(), digest_size=8).digest(), "little")
+
+
+@lru_cache(maxsize=1 << 16)
+def fingerprint(stem: str, options: tuple[str, ...] = ()) -> int:
+    """64-bit SimHash of a question stem and its options."""
+    feats = _features(stem, options)
+    if not feats:
+        return 0
+    hashes = np.fromiter((_hash64(f) for f in feats), dtype=np.uint64, count=len(feats))
+    ones = ((hashes[:, None] >> _BIT) & np.uint64(1)).sum(axis=0)
+    return int((((2 * ones) > len(feats)).astype(np.uint64) << _BIT).sum())
+
+
+def question_fingerprint(q: dict) -> int:
+    """Fingerprint of a UI-shaped question ({"stem", "options", ...})."""
+    return fingerprint((q.get("stem") or "").strip(), tuple(str(o) for o in q.get("options") or ()))
+
+
+def distance(a: int, b: int) -> int:
+    return ((a ^ b) & _MASK).bit_count()
+
+
+class NearDupIndex:
+    """Banded SimHash index: add fingerprints, ask for near matches."""
+
+    def __init__(self, max_distance: int = NEAR_DUP_DISTANCE):
+        self.max_distance = max_distance
+        n_bands = max_distance + 1
+        width = FINGERPRINT_BITS // n_bands
+        # The last band takes any leftover bits
+        self._bands = [
+            (i * width, (1 << (width if i < n_bands - 1 else FINGERPRINT_BITS - i * width)) - 1)
+            for i in range(n_bands)
+        ]
+        self._tables: list[dict[int, list]] = [{} for _ in self._bands]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, fp: int, item_id=None) -> None:
+        entry = (fp, item_id)
+        for (shift, mask), table in zip(self._bands, self._tables):
+            table.setdefault(fp >> shift & mask, []).append(entry)
+        self._size += 1
+
+    def matches(self, fp: int) -> list:
+        """Ids of stored items within max_distance bits of `fp`."""
+        found, seen = [], set()
+        for (shift, mask), table in zip(self._bands, self._tables):
+            for other, item_id in table.get(fp >> shift & mask, ()):
+                if (other, item_id) not in seen and distance(fp, other) <= self.max_distance:
+                    seen.add((other, item_id))
+                    found.append(item_id)
+        return found
+
+    def contains(self, fp: int) -> bool:
+        """True if any stored item is a near-duplicate of `fp`."""
+        for (shift, mask), table in zip(self._bands, self._tables):
+            for other, _ in table.get(fp >> shift & mask, ()):
+                if distance(fp, other) <= self.max_distance:
+                    return True
+        return False
+
+    def add_if_new(self, fp: int, item_id=None) -> bool:
+        """Add `fp` unless it is a near-duplicate; returns whether it was added."""
+        if self.contains(fp):
+            return False
+        self.add(fp, item_id)
+        return True
+
+
+def unique_questions(questions: list[dict], index: NearDupIndex | None = None) -> list[dict]:
+    """
+    Drop questions that near-duplicate an earlier one in the list (or one
+    already in `index`). Kept questions are added to `index` when given.
+    """
+    index = index if index is not None else NearDupIndex()
+    return [q for q in questions if index.add_if_new(question_fingerprint(q))]
@@ -0,0 +1,108 @@
+# backend/engine_client.py
+import os, asyncio
+
+import httpx
+
+# -------------------------------------------------------------
+# QUIZ ENGINE CLIENT CONFIGURATION
+# -------------------------------------------------------------
+# One shared AsyncClient keeps connections to the Colab/Ngrok engine alive
+# between quizzes, so only the first request pays for TCP + TLS setup.
+# The semaphore bounds how many generations we push at the (single GPU)
+# engine at once; extra callers wait on the event loop, not on a thread.
+QUIZ_ENGINE_URL = os.getenv("QUIZ_ENGINE_URL")
+# Several engines can be listed (comma-separated); see engine_pool.py
+QUIZ_ENGINE_URLS = [u.strip() for u in (os.getenv("QUIZ_ENGINE_URLS") or QUIZ_ENGINE_URL or "").split(",") if u.strip()]
+QUIZ_API_KEY = os.getenv("QUIZ_API_KEY")
+ENGINE_CONNECT_TIMEOUT = float(os.getenv("QUIZ_ENGINE_CONNECT_TIMEOUT", 10))
+ENGINE_READ_TIMEOUT = float(os.getenv("QUIZ_ENGINE_READ_TIMEOUT", 1000))
+ENGINE_MAX_CONNECTIONS = int(os.getenv("QUIZ_ENGINE_MAX_CONNECTIONS", 32))
+ENGINE_MAX_CONCURRENCY = int(os.getenv("QUIZ_ENGINE_MAX_CONCURRENCY", 16))
+
+
+class EngineError(Exception):
+    """Raised when the quiz engine cannot be reached or returns an error."""
+
+
+class EngineClient:
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str | None = None,
+        connect_timeout: float = ENGINE_CONNECT_TIMEOUT,
+        read_timeout: float = ENGINE_READ_TIMEOUT,
+        max_connections: int = ENGINE_MAX_CONNECTIONS,
+        max_concurrency: int = ENGINE_MAX_CONCURRENCY,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"X-API-Key": api_key} if api_key else {},
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    async def generate(self, payload: dict) -> dict:
+        """POST /generate and return the engine's JSON body."""
+        async with self._semaphore:
+            try:
+                r = await self._http.post("/generate", json=payload)
+                r.raise_for_status()
+                return r.json()
+            except (httpx.HTTPError, ValueError) as e:
+                raise EngineError(str(e) or e.__class__.__name__) from e
+
+    async def stream_generate(self, payload: dict):
+        """POST /generate_stream and yield decoded text chunks as they arrive."""
+        async with self._semaphore:
+            try:
+                async with self._http.stream("POST", "/generate_stream", json=payload) as r:
+                    r.raise_for_status()
+                    async for chunk in r.aiter_text():
+                        yield chunk
+            except httpx.HTTPError as e:
+                raise EngineError(str(e) or e.__class__.__name__) from e
+
+    async def health(self, timeout: float) -> None:
+        """GET /health; raises EngineError unless the engine answers without a 5xx."""
+        try:
+            r = await self._http.get("/health", timeout=timeout)
+        except httpx.HTTPError as e:
+            raise EngineError(str(e) or e.__class__.__name__) from e
+        if r.status_code >= 500:
+            raise EngineError(f"health check returned {r.status_code}")
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+# -------------------------------------------------------------
+# SHARED CLIENT
+# -------------------------------------------------------------
+_client = None
+
+
+def get_engine_client():
+    """
+    Return the process-wide engine pool (see engine_pool.EnginePool),
+    creating it on first use. It has the same interface as EngineClient.
+    """
+    global _client
+    if not QUIZ_ENGINE_URLS:
+        raise EngineError("Quiz engine URL not configured")
+    if _client is None:
+        from .engine_pool import EnginePool
+        _client = EnginePool(QUIZ_ENGINE_URLS, QUIZ_API_KEY)
+    return _client
+
+
+async def close_engine_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
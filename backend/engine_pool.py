@@ -0,0 +1,259 @@
+# backend/engine_pool.py
+import os, asyncio, time
+from collections import deque
+
+import httpx
+
+from .engine_client import EngineClient, EngineError
+
+# -------------------------------------------------------------
+# ENGINE POOL CONFIGURATION
+# -------------------------------------------------------------
+# QUIZ_ENGINE_URLS lists several engine endpoints (comma-separated), e.g. a
+# couple of Colab notebooks behind their own Ngrok tunnels. Each endpoint
+# gets its own pooled EngineClient plus latency/error tracking and a
+# circuit breaker, so a restarting notebook is skipped instead of hanging
+# every request until its read timeout. Only failures that say the endpoint
+# is unavailable (connect/read errors, timeouts, dropped streams, 502/503/504
+# from the tunnel) count toward opening the circuit; a 500 for output the
+# notebook could not parse, a 4xx or an unreadable body is an answer, not an
+# outage.
+ENGINE_FAILURE_THRESHOLD = int(os.getenv("QUIZ_ENGINE_FAILURE_THRESHOLD", 3))
+ENGINE_OPEN_SECONDS = float(os.getenv("QUIZ_ENGINE_OPEN_SECONDS", 30))
+ENGINE_HEALTH_INTERVAL = float(os.getenv("QUIZ_ENGINE_HEALTH_INTERVAL", 15))
+ENGINE_HEALTH_TIMEOUT = float(os.getenv("QUIZ_ENGINE_HEALTH_TIMEOUT", 5))
+ENGINE_HEDGE = os.getenv("QUIZ_ENGINE_HEDGE", "0").lower() in ("1", "true", "yes")
+ENGINE_HEDGE_MIN_DELAY = float(os.getenv("QUIZ_ENGINE_HEDGE_MIN_DELAY", 5))
+ENGINE_HEDGE_DEFAULT_DELAY = float(os.getenv("QUIZ_ENGINE_HEDGE_DEFAULT_DELAY", 120))
+
+UNAVAILABLE_STATUSES = {502, 503, 504}
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def is_unavailable(e: EngineError) -> bool:
+    """Whether an EngineError means the endpoint could not serve the request at all."""
+    cause = e.__cause__
+    if isinstance(cause, httpx.HTTPStatusError):
+        return cause.response.status_code in UNAVAILABLE_STATUSES
+    return isinstance(cause, httpx.TransportError)
+
+
+class Endpoint:
+    """One engine URL with its client, latency window and circuit state."""
+
+    def __init__(self, url: str, client: EngineClient, window: int = 100):
+        self.url = url
+        self.client = client
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)  # True = success
+        self.ewma: float | None = None
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    # ---- stats ----
+    def p95(self) -> float | None:
+        if len(self.latencies) < 5:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    # ---- circuit ----
+    def available(self, now: float) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and now - self.opened_at >= ENGINE_OPEN_SECONDS:
+            self.state = HALF_OPEN
+        return self.state == HALF_OPEN and not self._probing
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.outcomes.append(True)
+        self.ewma = latency if self.ewma is None else 0.8 * self.ewma + 0.2 * latency
+        self.consecutive_failures = 0
+        self.state = CLOSED
+
+    def record_failure(self) -> None:
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= ENGINE_FAILURE_THRESHOLD:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def record_error(self, e: EngineError) -> None:
+        """Count `e` against the circuit if it is an availability failure; otherwise the endpoint answered."""
+        if is_unavailable(e):
+            self.record_failure()
+        else:
+            self.consecutive_failures = 0
+            self.state = CLOSED
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "ewma_latency": self.ewma,
+            "p95_latency": self.p95(),
+            "error_rate": round(self.error_rate(), 3),
+            "consecutive_failures": self.consecutive_failures,
+            "samples": len(self.outcomes),
+        }
+
+
+class EnginePool:
+    """
+    Routes generations to the fastest healthy endpoint, fails over to the
+    next one on error and, when hedging is on, sends a second copy to the
+    runner-up once the first has taken longer than its p95 latency.
+    Exposes the same generate/stream_generate/aclose interface as EngineClient.
+    """
+
+    def __init__(self, urls: list[str], api_key: str | None = None, hedge: bool = ENGINE_HEDGE, **client_kwargs):
+        if not urls:
+            raise EngineError("Quiz engine URL not configured")
+        self.endpoints = [Endpoint(u.rstrip("/"), EngineClient(u, api_key, **client_kwargs)) for u in urls]
+        self.hedge = hedge
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._health_task: asyncio.Task | None = None
+
+    def ranked(self) -> list[Endpoint]:
+        """Available endpoints, mostly-failing ones last, then fastest first (untried first)."""
+        now = time.monotonic()
+        ready = [e for e in self.endpoints if e.available(now)]
+        return sorted(ready, key=lambda e: (e.error_rate() > 0.5, e.ewma or 0.0))
+
+    async def _call(self, ep: Endpoint, payload: dict) -> dict:
+        probing = ep.state == HALF_OPEN
+        ep._probing = ep._probing or probing
+        start = time.monotonic()
+        try:
+            result = await ep.client.generate(payload)
+        except EngineError as e:
+            ep.record_error(e)
+            raise
+        else:
+            ep.record_success(time.monotonic() - start)
+            return result
+        finally:
+            if probing:
+                ep._probing = False
+
+    def _hedge_delay(self, ep: Endpoint) -> float:
+        p95 = ep.p95()
+        return ENGINE_HEDGE_DEFAULT_DELAY if p95 is None else max(p95, ENGINE_HEDGE_MIN_DELAY)
+
+    async def generate(self, payload: dict) -> dict:
+        candidates = self.ranked()
+        if not candidates:
+            raise EngineError("No healthy quiz engine endpoint available")
+        if self.hedge and len(candidates) >= 2:
+            return await self._generate_hedged(candidates, payload)
+        return await self._failover(candidates, payload)
+
+    async def _failover(self, candidates: list[Endpoint], payload: dict,
+                        last_error: EngineError | None = None) -> dict:
+        """Try `candidates` in order; raise the last error if every one fails."""
+        for ep in candidates:
+            try:
+                return await self._call(ep, payload)
+            except EngineError as e:
+                last_error = e
+        raise last_error
+
+    async def _generate_hedged(self, candidates: list[Endpoint], payload: dict) -> dict:
+        primary, backup = candidates[0], candidates[1]
+        first = asyncio.ensure_future(self._call(primary, payload))
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self._hedge_delay(primary))
+            if first in done:
+                if first.exception() is None:
+                    return first.result()
+                # Failed before the hedge delay: plain failover, not a hedge
+                return await self._failover(candidates[1:], payload, first.exception())
+
+            # Primary is slow: race it against the backup
+            self.hedged += 1
+            second = asyncio.ensure_future(self._call(backup, payload))
+            pending = {first, second}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if t.exception() is None:
+                        if t is second:
+                            self.hedge_wins += 1
+                        return t.result()
+                    error = t.exception()
+        finally:
+            for t in pending:
+                t.cancel()
+        # Both failed: the remaining endpoints, one at a time
+        return await self._failover(candidates[2:], payload, error)
+
+    async def stream_generate(self, payload: dict):
+        """Stream from the best endpoint; fail over only before the first chunk."""
+        candidates = self.ranked()
+        if not candidates:
+            raise EngineError("No healthy quiz engine endpoint available")
+        last_error: EngineError | None = None
+        for ep in candidates:
+            start, started = time.monotonic(), False
+            try:
+                async for chunk in ep.client.stream_generate(payload):
+                    started = True
+                    yield chunk
+            except EngineError as e:
+                ep.record_error(e)
+                if started:
+                    raise
+                last_error = e
+                continue
+            ep.record_success(time.monotonic() - start)
+            return
+        raise last_error
+
+    # ---- health checks ----
+    async def check_health(self) -> None:
+        """GET /health on every endpoint. Any non-5xx reply counts as alive."""
+        async def probe(ep: Endpoint):
+            try:
+                await ep.client.health(ENGINE_HEALTH_TIMEOUT)
+                alive = True
+            except EngineError:
+                alive = False
+            if not alive:
+                ep.record_failure()
+            elif ep.state == OPEN:
+                ep.state = HALF_OPEN  # let the next generation probe it
+        await asyncio.gather(*(probe(ep) for ep in self.endpoints))
+
+    async def _health_loop(self, interval: float) -> None:
+        while True:
+            await self.check_health()
+            await asyncio.sleep(interval)
+
+    def start_health_checks(self, interval: float = ENGINE_HEALTH_INTERVAL) -> None:
+        if self._health_task is None and interval > 0:
+            self._health_task = asyncio.ensure_future(self._health_loop(interval))
+
+    def stats(self) -> dict:
+        return {
+            "endpoints": [ep.to_dict() for ep in self.endpoints],
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+    async def aclose(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        await asyncio.gather(*(ep.client.aclose() for ep in self.endpoints))
@@ -0,0 +1,157 @@
+# backend/engine_stream.py
+import json
+
+# -------------------------------------------------------------
+# INCREMENTAL PARSING OF STREAMED ENGINE OUTPUT
+# -------------------------------------------------------------
+# The engine's /generate_stream endpoint sends raw model text as it is
+# decoded. The model is prompted to return one JSON array of question
+# objects, so instead of waiting for the closing "]" (extract_json_array in
+# the notebook) we hand out each object as soon as its closing brace
+# arrives.
+#
+# The engine notebook (notebooks/smlmodel.ipynb) runs in Colab without this
+# package, so it carries a verbatim copy of everything below this banner
+# for its early stopping; backend/tests/test_engine_stream.py fails if the
+# two drift apart.
+
+REQ_KEYS = {"subject", "grade", "topic", "bloom_level", "question", "options", "answer", "rationale"}
+
+
+class JsonArrayStream:
+    """
+    Feed text chunks in, get complete top-level array elements out.
+    Like extract_json_array, the array starts at the first "[" followed
+    (after whitespace) by "{"; leading prose is skipped.
+    """
+    def __init__(self):
+        self.state = "seek"   # seek -> maybe -> open <-> item -> closed
+        self.bad_items = 0
+        self._buf: list[str] = []
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+
+    @property
+    def closed(self) -> bool:
+        return self.state == "closed"
+
+    def feed(self, text: str) -> list[dict]:
+        out = []
+        for ch in text:
+            state = self.state
+            if state == "item":
+                self._buf.append(ch)
+                if self._in_str:
+                    if self._esc:
+                        self._esc = False
+                    elif ch == "\\":
+                        self._esc = True
+                    elif ch == '"':
+                        self._in_str = False
+                elif ch == '"':
+                    self._in_str = True
+                elif ch in "{[":
+                    self._depth += 1
+                elif ch in "}]":
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._finish_item(out)
+            elif state == "open":
+                if ch == "{":
+                    self._start_item()
+                elif ch == "]":
+                    self.state = "closed"
+            elif state == "seek":
+                if ch == "[":
+                    self.state = "maybe"
+            elif state == "maybe":
+                if ch == "{":
+                    self._start_item()
+                elif ch == "]":
+                    self.state = "closed"  # "[]": topic out of scope
+                elif not ch.isspace():
+                    self.state = "maybe" if ch == "[" else "seek"
+        return out
+
+    def _start_item(self) -> None:
+        self.state = "item"
+        self._buf = ["{"]
+        self._depth = 1
+        self._in_str = self._esc = False
+
+    def _finish_item(self, out: list) -> None:
+        self.state = "open"
+        try:
+            obj = json.loads("".join(self._buf))
+        except ValueError:
+            obj = None
+        self._buf = []
+        if isinstance(obj, dict):
+            out.append(obj)
+        else:
+            self.bad_items += 1
+
+
+def validate_item(it: dict, subject: str, grade: int, topic: str):
+    """
+    Check one generated item against the requested subject, grade and topic
+    (compared exactly) and the question schema. Returns (ok, reason); a
+    non-numeric grade fails the item instead of raising.
+    """
+    if not isinstance(it, dict):
+        return False, "Not a JSON object"
+    missing = REQ_KEYS - set(it.keys())
+    if missing:
+        return False, f"Missing keys: {missing}"
+    try:
+        same_grade = int(it.get("grade")) == int(grade)
+    except (TypeError, ValueError):
+        same_grade = False
+    if it.get("subject") != subject or not same_grade or it.get("topic") != topic:
+        return False, "Mismatched subject/grade/topic"
+    bl = it.get("bloom_level")
+    if not isinstance(bl, int) or not (1 <= bl <= 6):
+        return False, "Invalid bloom_level"
+    opts = it.get("options")
+    if not isinstance(opts, dict) or set(opts.keys()) != {"A", "B", "C", "D"}:
+        return False, "Options must be A,B,C,D"
+    if any((not isinstance(v, str) or not v.strip()) for v in opts.values()):
+        return False, "Empty option text"
+    if it.get("answer") not in {"A", "B", "C", "D"}:
+        return False, "Answer must be A/B/C/D"
+    if not isinstance(it.get("question"), str) or not it["question"].strip():
+        return False, "Empty question"
+    return True, "ok"
+
+
+class ArrayStopTracker:
+    """
+    Early-stopping state for one generation: feed decoded text as it is
+    produced; `done` turns True once the top-level array has closed or
+    `target` items have passed validate_item. QuizStoppingCriteria in the
+    engine notebook runs one per sequence inside model.generate.
+    """
+    def __init__(self, subject: str, grade: int, topic: str, target: int = 15):
+        self.subject, self.grade, self.topic = subject, grade, topic
+        self.target = target
+        self.parser = JsonArrayStream()
+        self.items: list[dict] = []
+        self.rejected = 0
+
+    @property
+    def done(self) -> bool:
+        return self.parser.closed or len(self.items) >= self.target
+
+    def feed(self, text: str) -> list[dict]:
+        """Return the items from `text` that passed validation (up to `target`)."""
+        fresh = []
+        for it in self.parser.feed(text):
+            if len(self.items) >= self.target:
+                break
+            if validate_item(it, self.subject, self.grade, self.topic)[0]:
+                self.items.append(it)
+                fresh.append(it)
+            else:
+                self.rejected += 1
+        return fresh
@@ -0,0 +1,260 @@
+# backend/item_stats.py
+import os, json, hashlib, datetime
+
+import numpy as np
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import Session
+
+from . import models
+
+# -------------------------------------------------------------
+# ITEM CALIBRATION
+# -------------------------------------------------------------
+# Identical questions (same stem, options and answer key, whitespace
+# aside) are grouped under one item_key. For every item with at least ITEM_MIN_RESPONSES
+# answers a two-parameter IRT model, P(correct) = sigmoid(a * (ability - b)),
+# is fitted jointly with one ability per child by alternating Newton steps
+# (all items, then all children, each as one set of NumPy bincounts). Pick
+# counts per option show dead or misleading distractors. Results go to
+# item_stats; the question bank stops serving items flagged as broken.
+#
+#     python -m backend.item_stats calibrate
+ITEM_MIN_RESPONSES = int(os.getenv("ITEM_MIN_RESPONSES", 30))
+ITEM_TOO_EASY = float(os.getenv("ITEM_TOO_EASY", 0.95))
+ITEM_TOO_HARD = float(os.getenv("ITEM_TOO_HARD", 0.25))
+ITEM_MIN_DISCRIMINATION = float(os.getenv("ITEM_MIN_DISCRIMINATION", 0.2))
+# A wrong option taking this share of all picks looks like a wrong answer key
+ITEM_DISTRACTOR_SHARE = float(os.getenv("ITEM_DISTRACTOR_SHARE", 0.5))
+FIT_ROUNDS = 50
+FIT_TOLERANCE = 1e-4
+READ_CHUNK = 100_000
+TEXT_LOOKUP_CHUNK = 500  # question ids per IN query, under SQLite's bound-parameter limit
+MAX_OPTIONS = 6
+
+# Flags that mean the item itself is faulty, not just easy or hard
+BROKEN_FLAGS = {"low_discrimination", "distractor_dominates"}
+
+
+def item_key(stem: str, options, correct_idx: int | None) -> str:
+    """
+    Stable id for a question's content and answer key: the same text with
+    a different correct option is a different item.
+    """
+    canonical = json.dumps([" ".join(str(stem or "").split()), [" ".join(str(o).split()) for o in options or []],
+                            correct_idx])
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:20]
+
+
+def is_broken():
+    """SQL condition on item_stats: calibration flagged the item as broken."""
+    padded = "," + models.ItemStats.flags + ","
+    return or_(*(padded.like(f"%,{flag},%") for flag in sorted(BROKEN_FLAGS)))
+
+
+def flagged(db: Session, keys) -> set[str]:
+    """The subset of `keys` whose calibration marked the item as broken."""
+    keys = list(set(keys))
+    if not keys:
+        return set()
+    rows = db.query(models.ItemStats.item_key).filter(models.ItemStats.item_key.in_(keys), is_broken())
+    return {k for k, in rows}
+
+
+# -------------------------------------------------------------
+# LOADING
+# -------------------------------------------------------------
+class Responses:
+    """Every scored answer as parallel compact arrays, plus one record per distinct item."""
+
+    def __init__(self):
+        self.items: list[dict] = []      # item index -> {"key", "stem", "options_json", "correct_idx"}
+        self.child = np.empty(0, dtype=np.int32)
+        self.item = np.empty(0, dtype=np.int32)
+        self.correct = np.empty(0, dtype=np.int8)
+        self.picked = np.empty(0, dtype=np.int8)
+        self.n_children = 0
+
+
+def load(db: Session) -> Responses:
+    """
+    Read quiz_attempt_details in READ_CHUNK-row chunks (DBAPI cursor, no
+    ORM rows); question text is read once per distinct question, with one
+    IN query per chunk for the questions that chunk sees first. Only the
+    small per-item records and four compact arrays are kept, never the
+    detail rows themselves.
+    """
+    out = Responses()
+    by_question: dict[tuple, int] = {}  # (questions.id, correct_idx) -> item index
+    by_key: dict[str, int] = {}         # item_key -> item index
+    text: dict[int, tuple] = {}         # questions.id -> (stem, options_json)
+    children: dict[int, int] = {}
+    parts = {"child": [], "item": [], "correct": [], "picked": []}
+
+    raw = db.connection().connection
+    cursor = raw.cursor()
+    cursor.execute(
+        "SELECT a.child_id, d.question_id, d.picked_idx, d.correct_idx "
+        "FROM quiz_attempt_details d JOIN quiz_attempts a ON a.id = d.attempt_id "
+        "WHERE d.correct_idx >= 0"
+    )
+    while chunk := cursor.fetchmany(READ_CHUNK):
+        new = list({r[1] for r in chunk} - text.keys())
+        for lo in range(0, len(new), TEXT_LOOKUP_CHUNK):
+            ids = new[lo:lo + TEXT_LOOKUP_CHUNK]
+            lookup = raw.execute(f"SELECT id, stem, options_json FROM questions WHERE id IN ({','.join('?' * len(ids))})", ids)
+            text.update((qid, (stem, options_json)) for qid, stem, options_json in lookup)
+        child, item = [], []
+        for child_id, question_id, _, correct_idx in chunk:
+            idx = by_question.get((question_id, correct_idx))
+            if idx is None:
+                stem, options_json = text.get(question_id, (None, None))
+                key = item_key(stem, json.loads(options_json or "[]"), correct_idx)
+                idx = by_key.get(key)
+                if idx is None:
+                    idx = by_key[key] = len(out.items)
+                    out.items.append({"key": key, "stem": stem, "options_json": options_json, "correct_idx": correct_idx})
+                by_question[question_id, correct_idx] = idx
+            child.append(children.setdefault(child_id, len(children)))
+            item.append(idx)
+        answers = np.array([(r[2] if r[2] is not None else -1, r[3]) for r in chunk], dtype=np.int64)
+        picked = np.where((answers[:, 0] >= 0) & (answers[:, 0] < MAX_OPTIONS), answers[:, 0], -1)
+        parts["child"].append(np.array(child, dtype=np.int32))
+        parts["item"].append(np.array(item, dtype=np.int32))
+        parts["correct"].append((answers[:, 0] == answers[:, 1]).astype(np.int8))
+        parts["picked"].append(picked.astype(np.int8))
+    cursor.close()
+
+    for name, arrays in parts.items():
+        if arrays:
+            setattr(out, name, np.concatenate(arrays))
+    out.n_children = len(children)
+    return out
+
+
+# -------------------------------------------------------------
+# FITTING
+# -------------------------------------------------------------
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+
+def fit_2pl(child: np.ndarray, item: np.ndarray, y: np.ndarray, n_children: int, n_items: int,
+            rounds: int = FIT_ROUNDS, ridge: float = 1.0, tol: float = FIT_TOLERANCE) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Joint maximum a-posteriori 2PL fit in slope/intercept form
+    (z = a * ability + c, b = -c / a), with weak priors a ~ N(1, 1),
+    c ~ N(0, 1) and ability ~ N(0, 1). Stops after `rounds` or once no
+    item parameter moves by more than `tol`. Returns (a, b, ability).
+    """
+    y = y.astype(np.float64)
+    n_child = np.bincount(child, minlength=n_children)
+    right = np.bincount(child, weights=y, minlength=n_children)
+    theta = np.log((right + 0.5) / (n_child - right + 0.5))
+    theta = (theta - theta.mean()) / (theta.std() or 1.0)
+    a = np.ones(n_items)
+    c = np.zeros(n_items)
+
+    for _ in range(rounds):
+        # Items: one 2x2 Newton step each, solved in closed form
+        t = theta[child]
+        p = _sigmoid(a[item] * t + c[item])
+        r, w = y - p, p * (1 - p)
+        ga = np.bincount(item, r * t, n_items) - ridge * (a - 1)
+        gc = np.bincount(item, r, n_items) - ridge * c
+        haa = np.bincount(item, w * t * t, n_items) + ridge
+        hac = np.bincount(item, w * t, n_items)
+        hcc = np.bincount(item, w, n_items) + ridge
+        det = haa * hcc - hac * hac
+        a_new = np.clip(a + (hcc * ga - hac * gc) / det, -3, 4)
+        c_new = np.clip(c + (haa * gc - hac * ga) / det, -10, 10)
+        moved = max(np.abs(a_new - a).max(initial=0), np.abs(c_new - c).max(initial=0))
+        a, c = a_new, c_new
+        if moved < tol:
+            break
+
+        # Children: one Newton step on ability each, then fix the scale
+        ai = a[item]
+        p = _sigmoid(ai * t + c[item])
+        g = np.bincount(child, (y - p) * ai, n_children) - theta
+        h = np.bincount(child, p * (1 - p) * ai * ai, n_children) + 1
+        theta = theta + g / h
+        theta = (theta - theta.mean()) / (theta.std() or 1.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        b = np.where(np.abs(a) > 0.05, -c / a, np.nan)
+    return a, b, theta
+
+
+def _flags(p_correct: float, a: float, picks: np.ndarray, correct_idx: int) -> list[str]:
+    flags = []
+    if p_correct >= ITEM_TOO_EASY:
+        flags.append("too_easy")
+    if p_correct <= ITEM_TOO_HARD:
+        flags.append("too_hard")
+    if a < ITEM_MIN_DISCRIMINATION:
+        flags.append("low_discrimination")
+    if 0 <= correct_idx < len(picks):
+        wrong = np.delete(picks, correct_idx)
+        if wrong.max(initial=0) > max(picks[correct_idx], ITEM_DISTRACTOR_SHARE * picks.sum()):
+            flags.append("distractor_dominates")
+    return flags
+
+
+def calibrate(db: Session) -> int:
+    """Rebuild item_stats from every scored answer. Returns items written."""
+    data = load(db)
+    n_items = len(data.items)
+    responses = np.bincount(data.item, minlength=n_items)
+    p_correct = np.bincount(data.item, data.correct.astype(np.float64), n_items) / np.maximum(responses, 1)
+    picks = np.zeros((n_items, MAX_OPTIONS), dtype=np.int64)
+    answered = data.picked >= 0
+    np.add.at(picks, (data.item[answered], data.picked[answered]), 1)
+
+    a = b = np.full(n_items, np.nan)
+    eligible = responses >= ITEM_MIN_RESPONSES
+    if eligible.any():
+        keep = eligible[data.item]
+        fit_a, fit_b, _ = fit_2pl(data.child[keep], data.item[keep], data.correct[keep], data.n_children, n_items)
+        a, b = np.where(eligible, fit_a, np.nan), np.where(eligible, fit_b, np.nan)
+
+    now = datetime.datetime.utcnow()
+    db.query(models.ItemStats).delete(synchronize_session=False)
+    rows = []
+    for i, meta in enumerate(data.items):
+        n_options = len(json.loads(meta["options_json"] or "[]")) or MAX_OPTIONS
+        counts = picks[i, :min(n_options, MAX_OPTIONS)]
+        rows.append({
+            "item_key": meta["key"],
+            "stem": meta["stem"],
+            "options_json": meta["options_json"],
+            "correct_idx": meta["correct_idx"],
+            "responses": int(responses[i]),
+            "p_correct": float(p_correct[i]),
+            "difficulty": None if np.isnan(b[i]) else float(b[i]),
+            "discrimination": None if np.isnan(a[i]) else float(a[i]),
+            "picks_json": json.dumps(counts.tolist()),
+            "flags": ",".join(_flags(p_correct[i], a[i], counts, meta["correct_idx"])) if eligible[i] else "",
+            "updated_at": now,
+        })
+        if len(rows) == READ_CHUNK:
+            db.execute(insert(models.ItemStats), rows)
+            rows = []
+    if rows:
+        db.execute(insert(models.ItemStats), rows)
+    db.commit()
+    return n_items
+
+
+if __name__ == "__main__":
+    import argparse, time
+    from .database import SessionLocal, engine, Base
+
+    ap = argparse.ArgumentParser(description="Calibrate item statistics from quiz_attempt_details.")
+    ap.add_argument("command", choices=["calibrate"])
+    args = ap.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        n = calibrate(db)
+    print(f"Calibrated {n} items in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,139 @@
+# backend/jobs.py
+import os, asyncio, time, uuid
+
+# -------------------------------------------------------------
+# GENERATION JOB CONFIGURATION
+# -------------------------------------------------------------
+# Quiz generation can take minutes, which is longer than many school
+# connections stay up. Jobs let the client submit once, disconnect, and
+# come back for the result (kept for QUIZ_JOB_RESULT_TTL seconds).
+JOB_WORKERS = int(os.getenv("QUIZ_JOB_WORKERS", 4))
+JOB_RESULT_TTL = int(os.getenv("QUIZ_JOB_RESULT_TTL", 1800))
+
+QUEUED, RUNNING, DONE, ERROR = "queued", "running", "done", "error"
+
+
+class Job:
+    def __init__(self, dedupe_key: tuple | None, fn):
+        self.id = uuid.uuid4().hex
+        self.dedupe_key = dedupe_key
+        self.fn = fn
+        self.status = QUEUED
+        self.result: dict | None = None
+        self.error: str | None = None
+        self.status_code: int | None = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.version = 0  # bumped on every change
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, ERROR)
+
+    def _set(self, status: str, **fields) -> None:
+        self.status = status
+        for k, v in fields.items():
+            setattr(self, k, v)
+        self.updated_at = time.time()
+        self.version += 1
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def wait_changed(self, timeout: float, seen: int | None = None) -> bool:
+        """
+        Wait until the job changes after `version` was `seen` (default: now);
+        False on timeout. Passing the version read before a pause means a
+        change made during the pause is not missed.
+        """
+        if seen is not None and self.version != seen:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def to_dict(self) -> dict:
+        out = {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+        if self.status == DONE:
+            out["result"] = self.result
+        if self.status == ERROR:
+            out["error"] = self.error
+            out["status_code"] = self.status_code
+        return out
+
+
+class JobManager:
+    """In-process job store with an asyncio worker pool."""
+
+    def __init__(self, workers: int = JOB_WORKERS, ttl: int = JOB_RESULT_TTL):
+        self.workers = workers
+        self.ttl = ttl
+        self._jobs: dict[str, Job] = {}
+        self._active: dict[tuple, Job] = {}  # dedupe_key -> queued/running job
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def _ensure_workers(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, fn, dedupe_key: tuple | None = None) -> Job:
+        """
+        Queue `fn` (a zero-argument coroutine function). If a job with the same
+        dedupe key is still queued or running, that job is returned instead.
+        """
+        self._purge()
+        if dedupe_key is not None and dedupe_key in self._active:
+            return self._active[dedupe_key]
+        self._ensure_workers()
+        job = Job(dedupe_key, fn)
+        self._jobs[job.id] = job
+        if dedupe_key is not None:
+            self._active[dedupe_key] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        self._purge()
+        return self._jobs.get(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            job._set(RUNNING)
+            try:
+                job._set(DONE, result=await job.fn())
+            except asyncio.CancelledError:
+                job._set(ERROR, error="Server shutting down", status_code=503)
+                raise
+            except Exception as e:
+                job._set(ERROR, error=str(getattr(e, "detail", e)), status_code=getattr(e, "status_code", 500))
+            finally:
+                job.fn = None
+                if self._active.get(job.dedupe_key) is job:
+                    del self._active[job.dedupe_key]
+                self._queue.task_done()
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self.ttl
+        expired = [jid for jid, j in self._jobs.items() if j.finished and j.updated_at < cutoff]
+        for jid in expired:
+            del self._jobs[jid]
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+jobs = JobManager()
@@ -0,0 +1,134 @@
+# backend/learner_stats.py
+import os, json, datetime
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models
+
+# -------------------------------------------------------------
+# LEARNER STATS
+# -------------------------------------------------------------
+# One learner_stats row per (child, subject, topic) holds what adaptive
+# generation needs: total attempts, the last LEARNER_WINDOW scores, an
+# exponentially weighted score and the last Bloom level. /quiz/submit
+# updates the row in the same transaction as the attempt, so reading a
+# child's history is a single primary-key lookup instead of a sort over
+# quiz_attempts. `python -m backend.learner_stats rebuild` recomputes every
+# row from the raw attempts.
+LEARNER_WINDOW = int(os.getenv("LEARNER_STATS_WINDOW", 5))
+LEARNER_EWMA_ALPHA = float(os.getenv("LEARNER_STATS_EWMA_ALPHA", 0.3))
+REBUILD_CHUNK = 1000
+
+
+def get(db: Session, child_id: int, subject: str, topic: str) -> models.LearnerStats | None:
+    return db.get(models.LearnerStats, (child_id, subject, topic))
+
+
+def _apply(stats: models.LearnerStats, score: float, bloom: str | None, taken_at: datetime.datetime) -> None:
+    window = json.loads(stats.window_json or "[]")
+    window = (window + [score])[-LEARNER_WINDOW:]
+    stats.window_json = json.dumps(window)
+    stats.attempts = (stats.attempts or 0) + 1
+    if stats.ewma_score is None:
+        stats.ewma_score = score
+    else:
+        stats.ewma_score = LEARNER_EWMA_ALPHA * score + (1 - LEARNER_EWMA_ALPHA) * stats.ewma_score
+    stats.last_bloom = bloom
+    stats.last_taken_at = taken_at
+    stats.updated_at = datetime.datetime.utcnow()
+
+
+def record(db: Session, attempt: models.QuizAttempt) -> models.LearnerStats:
+    """
+    Fold a new attempt into its stats row. Does not commit: call it before
+    the commit that saves the attempt so both land together.
+    """
+    stats = get(db, attempt.child_id, attempt.subject, attempt.topic)
+    if stats is None:
+        stats = models.LearnerStats(child_id=attempt.child_id, subject=attempt.subject, topic=attempt.topic,
+                                    attempts=0, window_json="[]")
+        try:
+            with db.begin_nested():
+                db.add(stats)
+        except IntegrityError:
+            # A concurrent submit for the same key created the row first
+            stats = get(db, attempt.child_id, attempt.subject, attempt.topic)
+    taken_at = attempt.taken_at or datetime.datetime.utcnow()
+    if stats.last_taken_at and taken_at < stats.last_taken_at:
+        # An offline upload older than what we have: count it, but it is not
+        # "recent" (the nightly rebuild places it properly)
+        stats.attempts = (stats.attempts or 0) + 1
+        return stats
+    _apply(stats, attempt.score, attempt.bloom_level, taken_at)
+    return stats
+
+
+def summary(stats: models.LearnerStats | None) -> dict:
+    """
+    The history dict choose_bloom and the engine prompt expect. As before,
+    "attempts" counts the recent attempts avg_score covers (at most
+    LEARNER_STATS_WINDOW); "total_attempts" is the lifetime count.
+    """
+    if stats is None or not stats.attempts:
+        return {"attempts": 0, "total_attempts": 0, "avg_score": None, "ewma_score": None, "last_bloom": None}
+    window = json.loads(stats.window_json or "[]")
+    return {
+        "attempts": len(window),
+        "total_attempts": stats.attempts,
+        "avg_score": sum(window) / len(window) if window else None,
+        "ewma_score": stats.ewma_score,
+        "last_bloom": stats.last_bloom,
+    }
+
+
+def rebuild(db: Session, child_id: int | None = None) -> int:
+    """Recompute stats rows from quiz_attempts (one child, or everyone). Returns rows written."""
+    A = models.QuizAttempt
+    old = db.query(models.LearnerStats)
+    attempts = db.query(A).order_by(A.child_id, A.subject, A.topic, A.taken_at, A.id)
+    if child_id is not None:
+        old = old.filter(models.LearnerStats.child_id == child_id)
+        attempts = attempts.filter(A.child_id == child_id)
+    old.delete(synchronize_session=False)
+
+    rows: dict[tuple, models.LearnerStats] = {}
+    written = 0
+    current = None
+    for a in attempts.yield_per(REBUILD_CHUNK):
+        key = (a.child_id, a.subject, a.topic)
+        if key != current:
+            if len(rows) >= REBUILD_CHUNK:
+                db.add_all(rows.values())
+                db.flush()
+                written += len(rows)
+                rows = {}
+            current = key
+            rows[key] = models.LearnerStats(child_id=a.child_id, subject=a.subject, topic=a.topic,
+                                            attempts=0, window_json="[]")
+        _apply(rows[key], a.score, a.bloom_level, a.taken_at)
+    db.add_all(rows.values())
+    db.commit()
+    return written + len(rows)
+
+
+def backfill_if_empty(db: Session) -> int:
+    """Build the table once for databases that have attempts from before it existed."""
+    if db.query(models.LearnerStats).first() is None and db.query(models.QuizAttempt).first() is not None:
+        return rebuild(db)
+    return 0
+
+
+if __name__ == "__main__":
+    import argparse
+    from .database import SessionLocal, engine, Base
+
+    ap = argparse.ArgumentParser(description="Maintain the learner_stats table.")
+    sub = ap.add_subparsers(dest="command", required=True)
+    rb = sub.add_parser("rebuild", help="recompute stats from quiz_attempts")
+    rb.add_argument("--child", type=int, help="only this child profile id")
+    args = ap.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        print(f"Rebuilt {rebuild(db, args.child)} learner_stats rows")
@@ -7,7 +7,7 @@ import requests
 import os
 
 
-from .database import engine, Base
+from .database import engine, Base, SessionLocal
 from .auth import routes as auth_routes
 from . import models
 
@@ -16,6 +16,14 @@ from . import models
 # ==========================
 Base.metadata.create_all(bind=engine)
 
+from . import migrations, learner_stats, mastery, review
+migrations.upgrade(engine)  # indexes and other changes create_all cannot make to existing tables
+with SessionLocal() as _db:
+    # Databases with attempts from before these tables existed
+    learner_stats.backfill_if_empty(_db)
+    mastery.backfill_if_empty(_db)
+    review.backfill_if_empty(_db)
+
 # ==========================
 #   Create FastAPI App
 # ==========================
@@ -40,8 +48,50 @@ app.include_router(auth_routes.router)
 #   Include Quiz Routes
 # ==========================
 from .routes import quiz as quiz_routes
+from .engine_client import close_engine_client, get_engine_client, QUIZ_ENGINE_URLS
+from .jobs import jobs
+from .submit_queue import submit_queue, WRITE_BEHIND
 app.include_router(quiz_routes.router)
 
+# ==========================
+#   Include Catalog Routes
+# ==========================
+from .routes import catalog as catalog_routes
+app.include_router(catalog_routes.router)
+
+# ==========================
+#   Include Admin Routes
+# ==========================
+from .routes import admin as admin_routes
+app.include_router(admin_routes.router)
+
+
+@app.on_event("startup")
+async def start_engine_health_checks():
+    """Probe every configured quiz engine so dead endpoints are skipped early."""
+    if QUIZ_ENGINE_URLS:
+        get_engine_client().start_health_checks()
+
+
+@app.on_event("startup")
+def start_submit_queue():
+    """Replay spooled submissions and start the group-commit writer."""
+    if WRITE_BEHIND:
+        submit_queue.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_engine_client():
+    """Stop generation workers and close pooled connections to the quiz engine."""
+    await jobs.stop()
+    await close_engine_client()
+
+
+@app.on_event("shutdown")
+def stop_submit_queue():
+    """Commit queued submissions before the process exits."""
+    submit_queue.stop()
+
 
 
 # ==========================
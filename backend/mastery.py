@@ -0,0 +1,214 @@
+# backend/mastery.py
+import os, datetime
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models
+from .question_bank import BLOOM_LEVELS
+
+# -------------------------------------------------------------
+# KNOWLEDGE TRACING (Bayesian Knowledge Tracing)
+# -------------------------------------------------------------
+# topic_mastery keeps P(mastered) for every (child, subject, topic, Bloom
+# level). Each answered question is one observation: the estimate is
+# conditioned on right/wrong (allowing for slips and lucky guesses), then
+# nudged by the chance of learning from the attempt. Attempts submitted
+# without per-question details count as one soft observation equal to
+# their score. /quiz/submit updates the rows online; rebuild() replays the
+# whole attempts table, advancing every sequence one step at a time as a
+# NumPy vector op.
+KT_P_INIT = float(os.getenv("KT_P_INIT", 0.3))
+KT_P_TRANSIT = float(os.getenv("KT_P_TRANSIT", 0.1))
+KT_P_SLIP = float(os.getenv("KT_P_SLIP", 0.1))
+KT_P_GUESS = float(os.getenv("KT_P_GUESS", 0.25))  # four options
+KT_MASTERED = float(os.getenv("KT_MASTERED", 0.85))
+REBUILD_CHUNK = 50_000
+
+_BLOOMS = {b.lower(): b for b in BLOOM_LEVELS}
+
+
+def bloom_name(level) -> str | None:
+    """Canonical Bloom level, or None for "Unknown" and other labels."""
+    return _BLOOMS.get(str(level or "").strip().lower())
+
+
+def step(p, correct):
+    """One BKT update. Works on floats and on NumPy arrays alike; `correct` may be fractional."""
+    right = p * (1 - KT_P_SLIP) / (p * (1 - KT_P_SLIP) + (1 - p) * KT_P_GUESS)
+    wrong = p * KT_P_SLIP / (p * KT_P_SLIP + (1 - p) * (1 - KT_P_GUESS))
+    posterior = correct * right + (1 - correct) * wrong
+    return posterior + (1 - posterior) * KT_P_TRANSIT
+
+
+def observations(details, score: float) -> list[float]:
+    """1.0/0.0 per answered question that has a known answer; [score] when there are none."""
+    seen = [
+        1.0 if d.picked_idx == d.correct_idx else 0.0
+        for d in sorted(details or [], key=lambda d: d.question_index)
+        if d.correct_idx is not None and d.correct_idx >= 0
+    ]
+    return seen or [float(score)]
+
+
+def levels(db: Session, child_id: int, subject: str, topic: str) -> dict[str, float]:
+    """{bloom: P(mastered)} for the levels a child has been observed at on a topic."""
+    rows = db.query(models.TopicMastery).filter_by(child_id=child_id, subject=subject, topic=topic)
+    return {r.bloom: r.p_mastery for r in rows}
+
+
+def next_bloom(estimates: dict[str, float]) -> str:
+    """
+    Lowest Bloom level not yet mastered. Mastery of a higher level counts
+    for the levels below it, so a child who only ever took "Apply" quizzes
+    is not sent back to "Remember".
+    """
+    effective, best = {}, 0.0
+    for bloom in reversed(BLOOM_LEVELS):
+        best = max(best, estimates.get(bloom, KT_P_INIT))
+        effective[bloom] = best
+    for bloom in BLOOM_LEVELS:
+        if effective[bloom] < KT_MASTERED:
+            return bloom
+    return BLOOM_LEVELS[-1]
+
+
+def record(db: Session, attempt: models.QuizAttempt, seen: list[float]) -> models.TopicMastery | None:
+    """Apply one attempt's observations to its mastery row. Does not commit."""
+    bloom = bloom_name(attempt.bloom_level)
+    if bloom is None:
+        return None
+    pk = (attempt.child_id, attempt.subject, attempt.topic, bloom)
+    row = db.get(models.TopicMastery, pk)
+    if row is None:
+        row = models.TopicMastery(child_id=pk[0], subject=pk[1], topic=pk[2], bloom=bloom,
+                                  p_mastery=KT_P_INIT, observations=0)
+        try:
+            with db.begin_nested():
+                db.add(row)
+        except IntegrityError:
+            row = db.get(models.TopicMastery, pk)  # created by a concurrent submit
+    p = row.p_mastery
+    for correct in seen:
+        p = step(p, correct)
+    row.p_mastery = float(p)
+    row.observations += len(seen)
+    row.updated_at = datetime.datetime.utcnow()
+    return row
+
+
+# -------------------------------------------------------------
+# BATCH RECOMPUTE: python -m backend.mastery rebuild
+# -------------------------------------------------------------
+def _load(db: Session) -> tuple[list[tuple], np.ndarray, np.ndarray]:
+    """
+    Every observation in time order as (distinct keys, key index per row,
+    outcome per row). Attempts are read in (taken_at, id) order and details
+    in table order, in chunks; details are then placed after their attempt
+    with a NumPy sort instead of a join + sort in SQLite.
+    """
+    key_ids: dict[tuple, int] = {}
+    attempt_ids, attempt_keys, scores = [], [], []
+    cursor = db.connection().connection.cursor()  # plain DBAPI rows: ~3x faster than Result rows here
+    cursor.execute("SELECT id, child_id, subject, topic, bloom_level, score FROM quiz_attempts ORDER BY taken_at, id")
+    while chunk := cursor.fetchmany(REBUILD_CHUNK):
+        for attempt_id, child_id, subject, topic, level, score in chunk:
+            bloom = bloom_name(level)
+            if bloom is not None:
+                attempt_ids.append(attempt_id)
+                attempt_keys.append(key_ids.setdefault((child_id, subject, topic, bloom), len(key_ids)))
+                scores.append(score if score is not None else np.nan)
+    attempt_ids = np.array(attempt_ids, dtype=np.int64)
+    attempt_keys = np.array(attempt_keys, dtype=np.int64)
+    scores = np.array(scores, dtype=np.float64)
+
+    chunks = [np.empty((0, 3))]
+    cursor.execute("SELECT attempt_id, question_index, picked_idx = correct_idx FROM quiz_attempt_details "
+                   "WHERE correct_idx >= 0")
+    while chunk := cursor.fetchmany(REBUILD_CHUNK):
+        chunks.append(np.array(chunk, dtype=np.float64))
+    cursor.close()
+    d_attempt, d_index, d_correct = np.concatenate(chunks).T
+
+    # Position of each detail's attempt in time order (details of skipped attempts drop out)
+    by_id = np.argsort(attempt_ids)
+    known = np.zeros(len(d_attempt), dtype=bool)
+    pos = np.zeros(len(d_attempt), dtype=np.int64)
+    if len(by_id):
+        pos = np.minimum(np.searchsorted(attempt_ids[by_id], d_attempt), len(by_id) - 1)
+        known = attempt_ids[by_id][pos] == d_attempt
+    rank = by_id[pos[known]]
+
+    # Attempts with no usable details are one observation of their score
+    has_details = np.zeros(len(attempt_ids), dtype=bool)
+    has_details[rank] = True
+    bare = np.flatnonzero(~has_details & ~np.isnan(scores))
+
+    order_rank = np.concatenate((rank, bare))
+    order_index = np.concatenate((d_index[known], np.zeros(len(bare))))
+    outcomes = np.concatenate((d_correct[known], scores[bare]))
+    order = np.lexsort((order_index, order_rank))
+    return list(key_ids), attempt_keys[order_rank[order]], outcomes[order]
+
+
+def replay(key_idx: np.ndarray, outcomes: np.ndarray, n_keys: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Run BKT over all sequences at once. Observations are regrouped by their
+    position within their own sequence, so step r updates every key that
+    has an r-th observation in a single vector op. Returns (P(mastered),
+    observation count) per key.
+    """
+    counts = np.bincount(key_idx, minlength=n_keys)
+    by_key = np.argsort(key_idx, kind="stable")            # time order kept within each key
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rank = np.empty_like(key_idx)
+    rank[by_key] = np.arange(len(key_idx)) - starts[key_idx[by_key]]
+    by_rank = np.argsort(rank, kind="stable")
+    bounds = np.searchsorted(rank[by_rank], np.arange(counts.max(initial=0) + 1))
+
+    p = np.full(n_keys, KT_P_INIT)
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        rows = by_rank[lo:hi]
+        k = key_idx[rows]
+        p[k] = step(p[k], outcomes[rows])
+    return p, counts
+
+
+def rebuild(db: Session) -> int:
+    """Recompute topic_mastery from every attempt. Returns rows written."""
+    keys, key_idx, outcomes = _load(db)
+    p, counts = replay(key_idx, outcomes, len(keys))
+    now = datetime.datetime.utcnow()
+    db.query(models.TopicMastery).delete(synchronize_session=False)
+    for lo in range(0, len(keys), REBUILD_CHUNK):
+        db.execute(insert(models.TopicMastery), [
+            {"child_id": c, "subject": s, "topic": t, "bloom": b,
+             "p_mastery": float(p[i]), "observations": int(counts[i]), "updated_at": now}
+            for i, (c, s, t, b) in enumerate(keys[lo:lo + REBUILD_CHUNK], start=lo)
+        ])
+    db.commit()
+    return len(keys)
+
+
+def backfill_if_empty(db: Session) -> int:
+    """Build the table once for databases that have attempts from before it existed."""
+    if db.query(models.TopicMastery).first() is None and db.query(models.QuizAttempt).first() is not None:
+        return rebuild(db)
+    return 0
+
+
+if __name__ == "__main__":
+    import argparse, time
+    from .database import SessionLocal, engine, Base
+
+    ap = argparse.ArgumentParser(description="Maintain the topic_mastery table.")
+    ap.add_argument("command", choices=["rebuild"])
+    args = ap.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        n = rebuild(db)
+    print(f"Rebuilt {n} topic_mastery rows in {time.perf_counter() - start:.2f}s")
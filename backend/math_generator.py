@@ -0,0 +1,340 @@
+# backend/math_generator.py
+import random
+from decimal import Decimal
+from fractions import Fraction
+from math import lcm
+
+# -------------------------------------------------------------
+# PARAMETRIC MATHEMATICS QUESTIONS (no LLM needed)
+# -------------------------------------------------------------
+# Arithmetic topics are templates: pick numbers, compute the answer, and
+# derive distractors from the mistakes pupils actually make (forgetting to
+# carry, adding denominators, giving the total instead of the change...).
+# Every topic maker returns a "fact" dict which the Bloom-level wrappers
+# below turn into MCQs, in the same shape adapt_model_to_ui returns.
+
+BLOOM_LEVELS = ["Remember", "Understand", "Apply", "Analyze", "Evaluate", "Create"]
+NAMES = ["Achieng", "Kamau", "Wanjiku", "Otieno", "Njeri", "Mutua", "Chebet", "Kiprono", "Akinyi", "Wafula"]
+GRADE_LIMIT = {4: 10_000, 5: 100_000, 6: 1_000_000}  # CBC number range per grade
+
+
+def _n(x) -> str:
+    return f"{x:,}"
+
+
+def _frac(f: Fraction) -> str:
+    if f.denominator == 1:
+        return str(f.numerator)
+    whole, rest = divmod(f.numerator, f.denominator)
+    return f"{whole} {rest}/{f.denominator}" if whole else f"{rest}/{f.denominator}"
+
+
+def _ksh(x) -> str:
+    return f"KSh {x:,}"
+
+
+def _clock(minutes: int) -> str:
+    minutes %= 24 * 60
+    h, m = divmod(minutes, 60)
+    suffix = "am" if h < 12 else "pm"
+    return f"{(h % 12) or 12}:{m:02d} {suffix}"
+
+
+def _duration(minutes: int) -> str:
+    h, m = divmod(minutes, 60)
+    parts = ([f"{h} hour{'s' if h != 1 else ''}"] if h else []) + ([f"{m} minutes"] if m else [])
+    return " ".join(parts) or "0 minutes"
+
+
+# -------------------------------------------------------------
+# TOPIC MAKERS: (rng, grade) -> fact
+# -------------------------------------------------------------
+def _addition(rng, grade):
+    lim = GRADE_LIMIT[grade]
+    a, b = rng.randint(lim // 10, lim // 2), rng.randint(lim // 10, lim // 2)
+    ans, name = a + b, rng.choice(NAMES)
+    return {
+        "expr": f"{_n(a)} + {_n(b)}", "value": _n(ans),
+        "wrong": [_n(ans - 10), _n(ans + 10), _n(ans - 100), _n(abs(a - b)), _n(ans + 1)],
+        "how": f"Add place by place and carry tens: {_n(a)} + {_n(b)} = {_n(ans)}.",
+        "story": f"{name} counted {_n(a)} bananas at the market and {_n(b)} more arrived. How many bananas are there now?",
+        "wrong_exprs": [f"{_n(a)} − {_n(b)}", f"{_n(a)} × {_n(b)}", f"{_n(b)} − {_n(a)}"],
+        "missing": (f"{_n(a)} + ___ = {_n(ans)}", _n(b), [_n(ans + b), _n(b + 10), _n(b - 10), _n(a)]),
+    }
+
+
+def _subtraction(rng, grade):
+    lim = GRADE_LIMIT[grade]
+    a = rng.randint(lim // 4, lim - 1)
+    b = rng.randint(lim // 20, a * 3 // 4)
+    ans = a - b
+    return {
+        "expr": f"{_n(a)} − {_n(b)}", "value": _n(ans),
+        "wrong": [_n(ans + 10), _n(ans - 10), _n(a + b), _n(ans + 100), _n(ans + 1)],
+        "how": f"Subtract place by place, borrowing where needed: {_n(a)} − {_n(b)} = {_n(ans)}.",
+        "story": f"A school library had {_n(a)} books and gave {_n(b)} to a new school. How many books are left?",
+        "wrong_exprs": [f"{_n(a)} + {_n(b)}", f"{_n(b)} − {_n(a)}", f"{_n(a)} × {_n(b)}"],
+        "missing": (f"{_n(a)} − ___ = {_n(ans)}", _n(b), [_n(a + ans), _n(b + 10), _n(b - 10), _n(ans)]),
+    }
+
+
+def _multiplication(rng, grade):
+    a = rng.randint(12, 99) if grade == 4 else rng.randint(100, 999)
+    b = rng.randint(2, 9) if grade < 6 else rng.randint(11, 49)
+    ans = a * b
+    return {
+        "expr": f"{_n(a)} × {b}", "value": _n(ans),
+        "wrong": [_n(a * (b - 1)), _n(a * (b + 1)), _n(a + b), _n(ans + 10), _n(ans - 10)],
+        "how": f"{b} groups of {_n(a)}: {_n(a)} × {b} = {_n(ans)}.",
+        "story": f"Each crate holds {_n(a)} eggs. How many eggs are there in {b} crates?",
+        "wrong_exprs": [f"{_n(a)} + {b}", f"{_n(a)} − {b}", f"{_n(a)} ÷ {b}"],
+        "missing": (f"{_n(a)} × ___ = {_n(ans)}", str(b), [str(b + 1), str(b - 1), _n(ans - a), str(b * 10)]),
+    }
+
+
+def _division(rng, grade):
+    b = {4: rng.randint(2, 9), 5: rng.randint(2, 12)}.get(grade, rng.randint(11, 25))
+    q = rng.randint(12, 99) if grade == 4 else rng.randint(100, 999)
+    a = b * q
+    return {
+        "expr": f"{_n(a)} ÷ {b}", "value": _n(q),
+        "wrong": [_n(q + 1), _n(q - 1), _n(a - b), _n(q * 10), _n(a * b)],
+        "how": f"Share {_n(a)} into {b} equal groups: {_n(a)} ÷ {b} = {_n(q)}.",
+        "story": f"{_n(a)} pupils are shared equally among {b} buses. How many pupils ride in each bus?",
+        "wrong_exprs": [f"{_n(a)} × {b}", f"{_n(a)} − {b}", f"{_n(a)} + {b}"],
+        "missing": (f"___ ÷ {b} = {_n(q)}", _n(a), [_n(a + b), _n(a - b), _n(q + b), _n(a + q)]),
+    }
+
+
+def _fractions(rng, grade):
+    if grade == 4:
+        d1 = d2 = rng.randint(3, 12)
+        n1 = rng.randint(1, d1 - 2)
+        n2 = rng.randint(1, d1 - 1 - n1)
+    else:
+        while True:
+            d1, d2 = rng.sample([2, 3, 4, 5, 6, 8, 10, 12], 2)
+            n1, n2 = rng.randint(1, d1 - 1), rng.randint(1, d2 - 1)
+            if Fraction(n1, d1) + Fraction(n2, d2) <= 1:
+                break
+    f1, f2 = Fraction(n1, d1), Fraction(n2, d2)
+    ans, name = f1 + f2, rng.choice(NAMES)
+    s1, s2 = f"{n1}/{d1}", f"{n2}/{d2}"
+    common = lcm(d1, d2)
+    total = n1 * (common // d1) + n2 * (common // d2)  # numerator of the sum over `common`
+    return {
+        "expr": f"{s1} + {s2}", "value": _frac(ans),
+        "wrong": [f"{n1 + n2}/{d1 + d2}", _frac(f1 * f2), f"{total + 1}/{common}",
+                  _frac(abs(f1 - f2)) if f1 != f2 else f"{n1 + n2}/{d1 * d2}", f"{n1 * n2}/{common}"],
+        "how": f"Use a common denominator of {common}, then add numerators: {s1} + {s2} = {_frac(ans)}.",
+        "story": f"{name} ate {s1} of a chapati in the morning and {s2} of it in the evening. What fraction was eaten altogether?",
+        "wrong_exprs": [f"{s1} − {s2}", f"{s1} × {s2}", f"{s1} ÷ {s2}"],
+        "missing": (f"{s1} + ___ = {_frac(ans)}", s2, [f"{n2 + 1}/{d2}", _frac(ans), f"{n2}/{d1 + d2}", s1 if s1 != s2 else f"{n2}/{d2 * 2}"]),
+    }
+
+
+def _decimals(rng, grade):
+    places = {4: 1, 5: 2}.get(grade, 3)
+    unit = Decimal(1).scaleb(-places)
+    a = Decimal(rng.randint(10 ** places, 50 * 10 ** places)) * unit
+    b = Decimal(rng.randint(10 ** places, 50 * 10 ** places)) * unit
+    ans = a + b
+    return {
+        "expr": f"{a} + {b}", "value": str(ans),
+        "wrong": [str(a + b * 10), str(ans + 1), str(ans - unit * 10), str(abs(a - b)), str(ans + unit)],
+        "how": f"Line up the decimal points, then add: {a} + {b} = {ans}.",
+        "story": f"A jerrican holds {a} litres of water and a bucket holds {b} litres. How many litres are there altogether?",
+        "wrong_exprs": [f"{a} − {b}", f"{a} × {b}", f"{b} − {a}"],
+        "missing": (f"{a} + ___ = {ans}", str(b), [str(b + 1), str(ans), str(b * 10), str(b + unit)]),
+    }
+
+
+def _money(rng, grade):
+    price = rng.choice([15, 20, 25, 35, 45, 50, 65, 80]) * (1 if grade == 4 else rng.choice([1, 2, 5]))
+    qty = rng.randint(2, 9)
+    total = price * qty
+    note = next(n for n in (100, 200, 500, 1000, 2000, 5000, 10_000) if n > total)
+    change, name = note - total, rng.choice(NAMES)
+    return {
+        "expr": f"{_ksh(note)} − ({qty} × {_ksh(price)})", "value": _ksh(change),
+        "wrong": [_ksh(total), _ksh(note - price), _ksh(change + price), _ksh(change + 10), _ksh(note + total)],
+        "how": f"Cost is {qty} × {_ksh(price)} = {_ksh(total)}; change is {_ksh(note)} − {_ksh(total)} = {_ksh(change)}.",
+        "story": f"{name} bought {qty} exercise books at {_ksh(price)} each and paid with a {_ksh(note)} note. How much change did {name} get?",
+        "wrong_exprs": [f"{_ksh(note)} − {_ksh(price)}", f"{qty} × {_ksh(price)}", f"{_ksh(note)} + ({qty} × {_ksh(price)})"],
+        "missing": (f"{qty} × ___ = {_ksh(total)}", _ksh(price), [_ksh(price + 5), _ksh(total - qty), _ksh(price * 2), _ksh(change)]),
+    }
+
+
+def _time(rng, grade):
+    start_m = rng.choice(range(15, 60, 5))
+    start = rng.randint(6, 14) * 60 + start_m
+    # minutes always carry into the next hour, the step pupils get wrong
+    dur = rng.randint(0, 1 if grade == 4 else 3) * 60 + rng.choice(range(60 - start_m, 60, 5))
+    end = start + dur
+    h, m = divmod(dur, 60)
+    return {
+        "expr": f"{_clock(start)} + {_duration(dur)}", "value": _clock(end),
+        "wrong": [_clock(end - 60), _clock(end + 60), _clock(end - 10), _clock(start + h * 100 + m), _clock(end + 40)],
+        "how": f"Count on {_duration(dur)} from {_clock(start)}; 60 minutes make an hour, so it ends at {_clock(end)}.",
+        "story": f"A matatu left Nakuru at {_clock(start)} and the journey took {_duration(dur)}. At what time did it arrive?",
+        "wrong_exprs": [f"{_clock(start)} − {_duration(dur)}", f"{_clock(end)} + {_duration(dur)}", f"{_clock(start)} + {_duration(dur + 60)}"],
+        "missing": (f"{_clock(start)} + ___ = {_clock(end)}", _duration(dur),
+                    [_duration(dur + 60), _duration(dur - 10), _duration(dur + 40), _duration(m * 60 + h) if m * 60 + h != dur else _duration(dur + 15)]),
+    }
+
+
+def _area(rng, grade):
+    unit = "cm" if grade == 4 else "m"
+    l, w = rng.randint(6, 25 if grade == 4 else 60), rng.randint(3, 15 if grade == 4 else 40)
+    if l == w:
+        l += 1
+    ans = l * w
+    place = "exercise book cover" if unit == "cm" else "school garden"
+    return {
+        "expr": f"{l} {unit} × {w} {unit}", "value": f"{_n(ans)} {unit}²",
+        "wrong": [f"{2 * (l + w)} {unit}²", f"{l + w} {unit}²", f"{_n(2 * ans)} {unit}²", f"{_n(ans + l)} {unit}²", f"{_n(ans - w)} {unit}²"],
+        "how": f"Area of a rectangle is length × width: {l} × {w} = {_n(ans)} {unit}².",
+        "story": f"A rectangular {place} is {l} {unit} long and {w} {unit} wide. What is its area?",
+        "wrong_exprs": [f"2 × ({l} {unit} + {w} {unit})", f"{l} {unit} + {w} {unit}", f"{l} {unit} × {w} {unit} × 2"],
+        "missing": (f"{l} {unit} × ___ = {_n(ans)} {unit}²", f"{w} {unit}",
+                    [f"{w + 1} {unit}", f"{l} {unit}", f"{ans - l} {unit}", f"{w * 2} {unit}"]),
+    }
+
+
+TOPIC_MAKERS = {
+    "addition": _addition,
+    "subtraction": _subtraction,
+    "multiplication": _multiplication,
+    "division": _division,
+    "fractions": _fractions,
+    "decimals": _decimals,
+    "money": _money,
+    "time": _time,
+    "area": _area,
+}
+
+
+def _maker_for(subject: str, topic: str):
+    if str(subject).strip().lower() not in ("mathematics", "math", "maths"):
+        return None
+    t = " ".join(str(topic).split()).lower()
+    # Frontend labels such as "Measurement – Area" carry a prefix
+    return TOPIC_MAKERS.get(t) or TOPIC_MAKERS.get(t.replace("-", "–").split("–")[-1].strip())
+
+
+def supports(subject: str, topic: str) -> bool:
+    """True when a topic can be served by templates instead of the LLM."""
+    return _maker_for(subject, topic) is not None
+
+
+# -------------------------------------------------------------
+# BLOOM-LEVEL WRAPPERS: fact -> (stem, correct, wrong options, rationale)
+# -------------------------------------------------------------
+def _remember(rng, fact, others):
+    return f"Work out {fact['expr']}.", fact["value"], fact["wrong"], fact["how"]
+
+
+def _understand(rng, fact, others):
+    return (f"Which number sentence solves this? {fact['story']}", fact["expr"],
+            fact["wrong_exprs"], f"The story needs {fact['expr']}. {fact['how']}")
+
+
+def _apply(rng, fact, others):
+    return fact["story"], fact["value"], fact["wrong"], fact["how"]
+
+
+def _analyze(rng, fact, others):
+    stem, value, wrong = fact["missing"]
+    return f"What goes in the blank? {stem}", value, wrong, f"Work backwards from the result. {fact['how']}"
+
+
+def _evaluate(rng, fact, others):
+    wrong = [w for w in dict.fromkeys(fact["wrong"]) if w != fact["value"]]
+    name, claimed = rng.choice(NAMES), wrong[0]
+    return (f"{name} says {fact['expr']} = {claimed}. Is {name} correct?",
+            f"No, it is {fact['value']}",
+            [f"Yes, {name} is correct", f"No, it is {wrong[1]}", f"No, it is {wrong[2]}"],
+            fact["how"])
+
+
+def _create(rng, fact, others):
+    return (f"Which problem could you write for {fact['expr']}?", fact["story"],
+            [o["story"] for o in others], f"Only this story is solved by {fact['expr']}.")
+
+
+BLOOM_WRAPPERS = {
+    "Remember": _remember, "Understand": _understand, "Apply": _apply,
+    "Analyze": _analyze, "Evaluate": _evaluate, "Create": _create,
+}
+
+
+def _value(option: str):
+    """Numeric value of a plain number or fraction ("3/12" == "1/4"), else the text itself."""
+    try:
+        return Fraction(option)
+    except (ValueError, ZeroDivisionError):
+        return option
+
+
+def _options(rng, correct: str, wrong: list[str]) -> tuple[list[str], int]:
+    picked, values = [], {_value(correct)}
+    for w in wrong:
+        if _value(w) not in values and not w.startswith("-") and "KSh -" not in w:
+            picked.append(w)
+            values.add(_value(w))
+        if len(picked) == 3:
+            break
+    if len(picked) < 3:
+        raise ValueError("not enough distinct distractors")
+    options = picked + [correct]
+    rng.shuffle(options)
+    return options, options.index(correct)
+
+
+def generate_quiz(grade: int, subject: str, topic: str, bloom: str, n: int = 10, seed: int | None = None) -> dict:
+    """
+    Build `n` MCQs for a supported topic. The same seed always gives the
+    same quiz. Raises ValueError for unsupported topics.
+    """
+    maker = _maker_for(subject, topic)
+    if maker is None:
+        raise ValueError(f"No template for {subject} / {topic}")
+    grade = min(max(int(grade), 4), 6)
+    bloom = bloom if bloom in BLOOM_WRAPPERS else "Understand"
+    wrap = BLOOM_WRAPPERS[bloom]
+    rng = random.Random(seed)
+
+    questions, seen = [], set()
+    for _ in range(n * 20):
+        if len(questions) == n:
+            break
+        fact = maker(rng, grade)
+        others = [maker(rng, grade) for _ in range(3)] if bloom == "Create" else []
+        stem, correct, wrong, why = wrap(rng, fact, others)
+        if stem in seen:
+            continue
+        try:
+            options, answer_idx = _options(rng, correct, wrong)
+        except ValueError:
+            continue
+        seen.add(stem)
+        questions.append({
+            "id": f"q{len(questions) + 1}",
+            "stem": stem,
+            "options": options,
+            "answer_idx": answer_idx,
+            "bloom": bloom,
+            "explanation": why,
+        })
+
+    return {
+        "metadata": {
+            "subject": subject,
+            "grade": grade,
+            "topic": topic,
+            "bloom_level": bloom,
+            "bloom": bloom,
+            "source": "template",
+        },
+        "questions": questions,
+    }
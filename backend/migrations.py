@@ -0,0 +1,252 @@
+# backend/migrations.py
+import re, sys, json, tempfile, os, datetime, sqlite3
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+# -------------------------------------------------------------
+# SCHEMA MIGRATIONS
+# -------------------------------------------------------------
+# Base.metadata.create_all only creates missing tables; it never touches a
+# table that already exists, so an index (or column) added to a model
+# would only ever reach brand-new databases. Changes to existing tables are
+# listed here as numbered steps instead. schema_version records which ones
+# a database has had, and upgrade() runs the rest at startup, each in its
+# own transaction. Steps must be safe on a database created by the current
+# models (create_all already made the index, hence IF NOT EXISTS).
+#
+#
+# A step is either a SQL string or a callable taking the connection.
+#
+#     python -m backend.migrations [status | upgrade | check-plans]
+def add_column(table: str, column: str, ddl: str):
+    """Step that adds a column unless the table already has it (fresh databases do)."""
+    def step(conn) -> None:
+        existing = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+        if column not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return step
+
+
+def _move_question_text(conn) -> None:
+    """
+    Copy each distinct stem/options/explanation in quiz_attempt_details into
+    questions (see backend/questions.py), point the details at it by id and
+    drop the text columns. Hashing runs inside SQLite as a Python function,
+    so the details are never loaded into memory.
+    """
+    from .questions import content_hash
+
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(quiz_attempt_details)"))}
+    if "stem" not in columns:
+        return  # made by the current models
+    conn.connection.driver_connection.create_function("content_hash", 3, content_hash, deterministic=True)
+    conn.execute(text(
+        "INSERT OR IGNORE INTO questions (content_hash, stem, options_json, explanation) "
+        "SELECT content_hash(stem, options_json, explanation), stem, options_json, explanation "
+        "FROM quiz_attempt_details ORDER BY id"
+    ))
+    conn.execute(text(
+        "UPDATE quiz_attempt_details SET question_id = (SELECT q.id FROM questions q WHERE q.content_hash = "
+        "content_hash(quiz_attempt_details.stem, quiz_attempt_details.options_json, quiz_attempt_details.explanation))"
+    ))
+    for column in ("stem", "options_json", "explanation"):
+        if sqlite3.sqlite_version_info >= (3, 35, 0):
+            conn.execute(text(f"ALTER TABLE quiz_attempt_details DROP COLUMN {column}"))
+        else:  # no DROP COLUMN before SQLite 3.35: empty the column instead
+            conn.execute(text(f"UPDATE quiz_attempt_details SET {column} = NULL"))
+
+
+def _fill_bank_keys(conn) -> None:
+    """Compute item_key and fingerprint for question bank rows that predate the columns."""
+    from .question_bank import _item_columns
+
+    rows = conn.execute(text(
+        "SELECT id, stem, options_json, answer_idx FROM question_bank WHERE item_key IS NULL OR fingerprint IS NULL"
+    )).all()
+    updates = [{"id": i, **_item_columns(stem, json.loads(options_json or "[]"), answer_idx)}
+               for i, stem, options_json, answer_idx in rows]
+    if updates:
+        conn.execute(text("UPDATE question_bank SET item_key = :item_key, fingerprint = :fingerprint WHERE id = :id"),
+                     updates)
+
+
+MIGRATIONS: list[tuple[int, str, list]] = [
+    (1, "indexes for per-child history lookups", [
+        "CREATE INDEX IF NOT EXISTS ix_quiz_attempts_child_topic_taken "
+        "ON quiz_attempts (child_id, subject, topic, taken_at)",
+        "CREATE INDEX IF NOT EXISTS ix_quiz_attempts_child_taken ON quiz_attempts (child_id, taken_at)",
+        "CREATE INDEX IF NOT EXISTS ix_child_profiles_parent_id ON child_profiles (parent_id)",
+    ]),
+    (2, "client idempotency keys on quiz attempts", [
+        add_column("quiz_attempts", "client_key", "VARCHAR"),
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_quiz_attempts_client_key ON quiz_attempts (client_key)",
+    ]),
+    (3, "answered question text stored once in questions", [
+        add_column("quiz_attempt_details", "question_id", "INTEGER REFERENCES questions (id)"),
+        _move_question_text,
+    ]),
+    (4, "index for per-subject history pages and summaries", [
+        "CREATE INDEX IF NOT EXISTS ix_quiz_attempts_child_subject_taken "
+        "ON quiz_attempts (child_id, subject, taken_at, score)",
+    ]),
+    (5, "item key and near-duplicate fingerprint stored on question bank items", [
+        add_column("question_bank", "item_key", "VARCHAR"),
+        add_column("question_bank", "fingerprint", "INTEGER"),
+        _fill_bank_keys,
+    ]),
+]
+# Steps that free a large share of the file. SQLite keeps freed pages for
+# reuse rather than returning them, so upgrade() VACUUMs once after these.
+VACUUM_AFTER = {3}
+
+
+def _ensure_version_table(conn) -> None:
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, description VARCHAR NOT NULL, applied_at DATETIME NOT NULL)"
+    ))
+
+
+def current_version(engine: Engine) -> int:
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+
+def upgrade(engine: Engine) -> list[int]:
+    """Apply every migration newer than the database's version. Returns the versions applied."""
+    applied = []
+    start = current_version(engine)
+    for version, description, statements in MIGRATIONS:
+        if version <= start:
+            continue
+        with engine.begin() as conn:
+            for step in statements:
+                step(conn) if callable(step) else conn.execute(text(step))
+            conn.execute(
+                text("INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": version, "d": description, "t": datetime.datetime.utcnow()},
+            )
+        applied.append(version)
+    if VACUUM_AFTER & set(applied):
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM")
+    return applied
+
+
+# -------------------------------------------------------------
+# QUERY-PLAN CHECKS: python -m backend.migrations check-plans
+# -------------------------------------------------------------
+# Runs the queries behind the quiz and profile routes against a scratch
+# database built exactly like a production one (create_all + upgrade), with
+# a little seed data, and asks SQLite for each statement's plan. A step
+# that reads a whole table ("SCAN quiz_attempts") rather than searching an
+# index fails the check.
+_TABLE_SCAN = re.compile(r"^SCAN (TABLE )?(\w+)(?: AS \w+)?$")
+
+
+def _route_queries(db) -> None:
+    """Call the route-level query code paths once each."""
+    from fastapi import Response
+    from . import models, question_bank, review
+    from .routes import quiz
+
+    parent = models.Parent(full_name="Plan Check", email="plans@example.com", hashed_password="x")
+    db.add(parent)
+    db.flush()
+    child = models.ChildProfile(name="Child", grade="Grade 5", parent_id=parent.id)
+    db.add(child)
+    db.commit()
+    submitted = quiz.submit_quiz(quiz.SubmitPayload(
+        profile_id=child.id, subject="Mathematics", topic="Fractions", bloom_level="Apply", score=0.5,
+        details=[quiz.AnswerDetail(question_index=0, stem="1/2 + 1/4 = ?", options=["3/4", "2/6"], picked_idx=0, correct_idx=0)],
+    ), response=Response(), db=db)  # the write-behind queue is not running here: saved inline
+    quiz.submit_quiz_batch(quiz.BatchSubmitPayload(attempts=[quiz.SubmitPayload(
+        profile_id=child.id, subject="Science", topic="Plants", score=1.0, client_key="plan-check-1",
+    )]), db=db)
+    key = question_bank.bank_key(5, "Science", "Plants", "Apply")
+    question_bank.deposit(db, key, [{"stem": "Which part of a plant makes food?", "options": ["Leaf", "Root"]}])
+
+    db.expire_all()
+    quiz.summarize_history(db, child.id, "Mathematics", "Fractions")
+    question_bank.seen_index(db, child.id, key[1], key[2])
+    question_bank.draw(db, key, n=1)
+    question_bank.stock(db, key)
+    question_bank.evict(db, key)
+    for subject in ("Mathematics", None):
+        page = quiz.recent_attempts(child.id, subject=subject, limit=1, db=db)
+        quiz.recent_attempts(child.id, subject=subject, limit=1, before=page.headers["X-Next-Cursor"], db=db)
+    quiz.history_summary(child.id, db=db)
+    quiz.topic_progress(child.id, db=db)
+    quiz.get_attempt(submitted["attempt_id"], db=db)
+    review.due(db, child.id)
+    review.due(db, child.id, subject="Mathematics")
+    db.query(models.Parent).filter(models.Parent.email == parent.email).first()
+    db.get(models.Parent, parent.id).children
+
+
+def check_plans(verbose: bool = False) -> list[tuple[str, str]]:
+    """Return (statement, plan step) for every full table scan in the route queries."""
+    from .database import Base
+    from . import models  # registers the tables on Base.metadata
+
+    path = os.path.join(tempfile.mkdtemp(prefix="plan-check-"), "plans.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    upgrade(engine)
+
+    captured: list[tuple[str, tuple]] = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            captured.append((statement, parameters))
+
+    with sessionmaker(bind=engine)() as db:
+        _route_queries(db)
+    event.remove(engine, "before_cursor_execute", capture)
+
+    scans = []
+    seen = set()
+    with engine.connect() as conn:
+        raw = conn.connection.driver_connection
+        for statement, params in captured:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            plan = [row[3] for row in raw.execute("EXPLAIN QUERY PLAN " + statement, params)]
+            if verbose:
+                print(" ".join(statement.split())[:120])
+                for step in plan:
+                    print(f"    {step}")
+            scans += [(statement, step) for step in plan if _TABLE_SCAN.match(step)]
+    engine.dispose()
+    return scans
+
+
+if __name__ == "__main__":
+    import argparse
+    from .database import engine, Base
+    from . import models
+
+    ap = argparse.ArgumentParser(description="Backend schema migrations.")
+    ap.add_argument("command", choices=["status", "upgrade", "check-plans"])
+    ap.add_argument("-v", "--verbose", action="store_true", help="check-plans: print every plan")
+    args = ap.parse_args()
+
+    if args.command == "status":
+        version = current_version(engine)
+        for v, description, _ in MIGRATIONS:
+            print(f"  {'applied' if v <= version else 'pending'}  {v:3d}  {description}")
+    elif args.command == "upgrade":
+        Base.metadata.create_all(bind=engine)
+        applied = upgrade(engine)
+        print(f"Applied migrations: {applied}" if applied else "Database is up to date")
+    else:
+        scans = check_plans(args.verbose)
+        for statement, step in scans:
+            print(f"FAIL  {step}\n      {' '.join(statement.split())[:160]}")
+        print(f"{len(scans)} full table scan(s)" if scans else "OK: no route query scans a whole table")
+        sys.exit(1 if scans else 0)
@@ -5,7 +5,7 @@ from .database import Base
 import datetime
 
 #Quiz attempt model
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 import datetime
 
 class QuizAttempt(Base):
@@ -18,6 +18,15 @@ class QuizAttempt(Base):
     bloom_level = Column(String)
     score = Column(Float)
     taken_at = Column(DateTime, default=datetime.datetime.utcnow)
+    client_key = Column(String, nullable=True)  # device-generated idempotency key (offline sync)
+
+    # Existing databases get these from backend/migrations.py
+    __table_args__ = (
+        Index("ix_quiz_attempts_child_topic_taken", "child_id", "subject", "topic", "taken_at"),
+        Index("ix_quiz_attempts_child_taken", "child_id", "taken_at"),
+        Index("ix_quiz_attempts_child_subject_taken", "child_id", "subject", "taken_at", "score"),  # score: covers /history/summary
+        Index("ix_quiz_attempts_client_key", "client_key", unique=True),
+    )
 
 
 class QuizAttemptDetail(Base):
@@ -26,12 +35,123 @@ class QuizAttemptDetail(Base):
     id = Column(Integer, primary_key=True, index=True)
     attempt_id = Column(Integer, ForeignKey("quiz_attempts.id", ondelete="CASCADE"), index=True)
     question_index = Column(Integer)
+    question_id = Column(Integer, ForeignKey("questions.id"))  # text shown: see backend/questions.py
+    picked_idx = Column(Integer)
+    correct_idx = Column(Integer)
+
+
+# -------------------------------------------------------------
+# QUESTIONS (answered question text, stored once per distinct text)
+# -------------------------------------------------------------
+class Question(Base):
+    __tablename__ = "questions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String, unique=True, index=True, nullable=False)  # questions.content_hash(...)
     stem = Column(String)
     options_json = Column(String)  # JSON-encoded list of option strings
-    picked_idx = Column(Integer)
+    explanation = Column(String)
+
+
+# -------------------------------------------------------------
+# LEARNER STATS (running summary per child, subject and topic)
+# -------------------------------------------------------------
+class LearnerStats(Base):
+    __tablename__ = "learner_stats"
+
+    child_id = Column(Integer, ForeignKey("child_profiles.id", ondelete="CASCADE"), primary_key=True)
+    subject = Column(String, primary_key=True)
+    topic = Column(String, primary_key=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    window_json = Column(String, nullable=False, default="[]")  # JSON list of the most recent scores, oldest first
+    ewma_score = Column(Float)
+    last_bloom = Column(String)
+    last_taken_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+# -------------------------------------------------------------
+# TOPIC MASTERY (knowledge-tracing estimate per Bloom level)
+# -------------------------------------------------------------
+class TopicMastery(Base):
+    __tablename__ = "topic_mastery"
+
+    child_id = Column(Integer, ForeignKey("child_profiles.id", ondelete="CASCADE"), primary_key=True)
+    subject = Column(String, primary_key=True)
+    topic = Column(String, primary_key=True)
+    bloom = Column(String, primary_key=True)
+    p_mastery = Column(Float, nullable=False)
+    observations = Column(Integer, nullable=False, default=0)  # answers seen (score-only attempts count once)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+# -------------------------------------------------------------
+# ITEM STATISTICS (offline calibration of answered questions)
+# -------------------------------------------------------------
+class ItemStats(Base):
+    __tablename__ = "item_stats"
+
+    item_key = Column(String, primary_key=True)  # item_stats.item_key(stem, options, correct_idx)
+    stem = Column(String)
+    options_json = Column(String)
     correct_idx = Column(Integer)
+    responses = Column(Integer, nullable=False)
+    p_correct = Column(Float)
+    difficulty = Column(Float, nullable=True)      # IRT b (ability at which P(correct) = 0.5)
+    discrimination = Column(Float, nullable=True)  # IRT a
+    picks_json = Column(String)                    # JSON list: times each option was picked
+    flags = Column(String, default="")             # comma-separated, see item_stats.py
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+# -------------------------------------------------------------
+# REVIEW SCHEDULE (spaced repetition per child and topic)
+# -------------------------------------------------------------
+class ReviewSchedule(Base):
+    __tablename__ = "review_schedule"
+
+    child_id = Column(Integer, ForeignKey("child_profiles.id", ondelete="CASCADE"), primary_key=True)
+    subject = Column(String, primary_key=True)
+    topic = Column(String, primary_key=True)
+    due_at = Column(DateTime, nullable=False)
+    interval_days = Column(Float, nullable=False)
+    ease = Column(Float, nullable=False)
+    reps = Column(Integer, nullable=False, default=0)     # passes in a row
+    lapses = Column(Integer, nullable=False, default=0)
+    last_score = Column(Float)
+    last_taken_at = Column(DateTime)
+
+    # Each child's schedule is read in due order straight off these indexes
+    __table_args__ = (
+        Index("ix_review_schedule_child_due", "child_id", "due_at"),
+        Index("ix_review_schedule_child_subject_due", "child_id", "subject", "due_at"),
+    )
+
+
+# -------------------------------------------------------------
+# QUESTION BANK (pre-generated items served by /quiz/generate)
+# -------------------------------------------------------------
+class QuestionBankItem(Base):
+    __tablename__ = "question_bank"
+
+    id = Column(Integer, primary_key=True, index=True)
+    grade = Column(Integer, nullable=False)
+    subject = Column(String, nullable=False)   # normalized (lower-case) key part
+    topic = Column(String, nullable=False)     # normalized (lower-case) key part
+    bloom = Column(String, nullable=False)
+    stem = Column(String, nullable=False)
+    options_json = Column(String)  # JSON-encoded list of option strings
+    answer_idx = Column(Integer)
     explanation = Column(String)
+    served_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    last_served_at = Column(DateTime, nullable=True)
+    item_key = Column(String)      # item_stats.item_key(stem, options, answer_idx)
+    fingerprint = Column(Integer)  # dedup.fingerprint as a signed 64-bit value
 
+    __table_args__ = (
+        Index("ix_question_bank_key", "grade", "subject", "topic", "bloom", "served_count"),
+    )
 
 
 # -------------------------------------------------------------
@@ -62,7 +182,7 @@ class ChildProfile(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     grade = Column(String, nullable=True)
-    parent_id = Column(Integer, ForeignKey("parents.id", ondelete="CASCADE"))
+    parent_id = Column(Integer, ForeignKey("parents.id", ondelete="CASCADE"), index=True)
 
     # Relationship back to parent
     parent = relationship("Parent", back_populates="children")
@@ -0,0 +1,162 @@
+# backend/progress.py
+import os, time, datetime, threading
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from . import models
+from .catalog import catalog, parse_grade
+from .mastery import KT_MASTERED
+from .review import REVIEW_PASS_SCORE
+
+# -------------------------------------------------------------
+# TOPIC PROGRESS (dashboard and subject page)
+# -------------------------------------------------------------
+# /quiz/progress returns every catalog topic of a child's grade with its
+# attempts, recent score, mastery and a status, built from one GROUP BY over
+# learner_stats joined to topic_mastery and review_schedule (all read by
+# primary key). The result is cached per child and dropped by
+# submissions.save_attempts whenever that child's attempts are committed,
+# so pages can ask for it on every render. The cache is per process:
+# PROGRESS_CACHE_TTL bounds how stale another worker's copy (or one that
+# predates a CLI rebuild) can get.
+PROGRESS_CACHE_TTL = int(os.getenv("PROGRESS_CACHE_TTL", 600))
+PROGRESS_CACHE_SIZE = int(os.getenv("PROGRESS_CACHE_SIZE", 5000))  # children kept
+
+NOT_STARTED, NEEDS_PRACTICE, GOOD_PROGRESS, DOING_WELL = "not_started", "needs_practice", "good_progress", "doing_well"
+
+
+def status(attempts: int, score: float | None, mastery: float | None) -> str:
+    """Card status: mastered topics do well, recent scores below the review pass mark need practice."""
+    if not attempts:
+        return NOT_STARTED
+    if mastery is not None and mastery >= KT_MASTERED:
+        return DOING_WELL
+    if score is not None and score < REVIEW_PASS_SCORE:
+        return NEEDS_PRACTICE
+    return GOOD_PROGRESS
+
+
+def _topic_rows(db: Session, child_id: int) -> list[tuple]:
+    """(subject, topic, attempts, ewma score, last taken, best P(mastered), review due) per studied topic."""
+    S, M, R = models.LearnerStats, models.TopicMastery, models.ReviewSchedule
+    same_topic = lambda T: and_(T.child_id == S.child_id, T.subject == S.subject, T.topic == S.topic)
+    return (
+        db.query(S.subject, S.topic, S.attempts, S.ewma_score, S.last_taken_at,
+                 func.max(M.p_mastery), func.max(R.due_at))
+        .outerjoin(M, same_topic(M))
+        .outerjoin(R, same_topic(R))
+        .filter(S.child_id == child_id)
+        .group_by(S.subject, S.topic)
+        .all()
+    )
+
+
+def _build(db: Session, child_id: int, grade: int) -> dict:
+    """
+    Progress for every catalog topic of `grade`. Studied topics stored
+    under a non-canonical name are matched with catalog.resolve(); topics
+    from other grades are left out.
+    """
+    studied: dict[tuple, dict] = {}
+    for subject, topic, attempts, score, last, p, due_at in _topic_rows(db, child_id):
+        hit = catalog.resolve(grade, subject, topic)
+        if hit is None:
+            continue
+        entry = studied.setdefault((hit.subject, hit.name), {"attempts": 0, "score": None, "mastery": None,
+                                                               "last_taken_at": None, "due_at": None})
+        entry["attempts"] += attempts or 0
+        if last is not None and (entry["last_taken_at"] is None or last > entry["last_taken_at"]):
+            entry["score"], entry["last_taken_at"] = score, last
+        if p is not None:
+            entry["mastery"] = max(p, entry["mastery"] or 0.0)
+        if due_at is not None:
+            entry["due_at"] = min(due_at, entry["due_at"] or due_at)
+
+    subjects = []
+    for subject in catalog.subjects:
+        topics = []
+        for t in catalog.topics_for(grade, subject):
+            e = studied.get((subject, t.name), {"attempts": 0, "score": None, "mastery": None,
+                                                "last_taken_at": None, "due_at": None})
+            topics.append({"topic": t.name, **e, "status": status(e["attempts"], e["score"], e["mastery"]),
+                           "score": round(e["score"], 4) if e["score"] is not None else None,
+                           "mastery": round(e["mastery"], 4) if e["mastery"] is not None else None})
+        if topics:
+            subjects.append({"subject": subject, "topics": topics})
+    return {"profile_id": child_id, "grade": grade, "subjects": subjects}
+
+
+def _summarize(topics: list[dict]) -> dict:
+    """Overall progress (mean mastery, unstarted topics as 0) and topics per status."""
+    counts = {s: 0 for s in (NOT_STARTED, NEEDS_PRACTICE, GOOD_PROGRESS, DOING_WELL)}
+    for t in topics:
+        counts[t["status"]] += 1
+    overall = sum(t["mastery"] or 0.0 for t in topics) / len(topics) if topics else 0.0
+    return {"overall": round(overall, 4), "status_counts": counts}
+
+
+class ProgressCache:
+    """
+    child id -> {grade: built progress}. Every invalidation bumps the
+    child's generation, and a result is only stored if no invalidation
+    happened while it was being built, so a read racing a submit cannot
+    put the pre-submit numbers back.
+    """
+    def __init__(self, ttl: int = PROGRESS_CACHE_TTL, max_children: int = PROGRESS_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_children = max_children
+        self._lock = threading.Lock()
+        self._entries: dict[int, dict[int, tuple[float, dict]]] = {}
+        self._generation: dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session, child_id: int, grade: int) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(child_id, {}).get(grade)
+            if cached is not None and now - cached[0] < self.ttl:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+            generation = self._generation.get(child_id, 0)
+        built = _build(db, child_id, grade)
+        with self._lock:
+            if self._generation.get(child_id, 0) == generation:
+                if child_id not in self._entries and len(self._entries) >= self.max_children:
+                    self._entries.clear()
+                self._entries.setdefault(child_id, {})[grade] = (now, built)
+        return built
+
+    def invalidate(self, child_ids) -> None:
+        with self._lock:
+            for child_id in child_ids:
+                self._entries.pop(child_id, None)
+                self._generation[child_id] = self._generation.get(child_id, 0) + 1
+
+
+cache = ProgressCache()
+
+
+def child_grade(db: Session, child_id: int) -> int | None:
+    grade = db.query(models.ChildProfile.grade).filter(models.ChildProfile.id == child_id).scalar()
+    return parse_grade(grade) if grade is not None else None
+
+
+def progress(db: Session, child_id: int, grade: int, subject: str | None = None) -> dict:
+    """
+    The cached progress for a child's grade, optionally narrowed to one
+    subject, with overall figures per subject and for the whole response.
+    `due` is worked out on every call; only the due date is cached.
+    """
+    built = cache.get(db, child_id, grade)
+    now = datetime.datetime.utcnow()
+    subjects = []
+    for s in built["subjects"]:
+        if subject and s["subject"] != subject:
+            continue
+        topics = [{**t, "due": t["due_at"] is not None and t["due_at"] <= now} for t in s["topics"]]
+        subjects.append({"subject": s["subject"], **_summarize(topics), "topics": topics})
+    return {"profile_id": child_id, "grade": grade,
+            **_summarize([t for s in subjects for t in s["topics"]]), "subjects": subjects}
@@ -0,0 +1,268 @@
+# backend/question_bank.py
+import os, json, datetime
+
+from sqlalchemy import and_, exists, func, or_
+from sqlalchemy.orm import Session
+
+from . import models, item_stats
+from .dedup import NearDupIndex, fingerprint
+
+# -------------------------------------------------------------
+# QUESTION BANK CONFIGURATION
+# -------------------------------------------------------------
+# Items are keyed by (grade, subject, topic, bloom). An item counts as
+# "stock" until it has been served QUESTION_BANK_MAX_SERVES times; when the
+# stock for a key falls below the low watermark a background refill asks the
+# quiz engine for a fresh batch.
+QUIZ_SIZE = int(os.getenv("QUIZ_SIZE", 10))
+BANK_LOW_WATERMARK = int(os.getenv("QUESTION_BANK_LOW_WATERMARK", 30))
+BANK_MAX_SERVES = int(os.getenv("QUESTION_BANK_MAX_SERVES", 3))
+BANK_MAX_AGE_DAYS = int(os.getenv("QUESTION_BANK_MAX_AGE_DAYS", 30))
+BANK_MAX_ITEMS_PER_KEY = int(os.getenv("QUESTION_BANK_MAX_ITEMS_PER_KEY", 200))
+# How many of a child's most recently answered questions a draw avoids repeating
+CHILD_HISTORY_ITEMS = int(os.getenv("QUESTION_BANK_CHILD_HISTORY_ITEMS", 500))
+# Candidates a draw reads per query while skipping near-duplicates and seen items
+DRAW_PAGE = int(os.getenv("QUESTION_BANK_DRAW_PAGE", 50))
+
+BLOOM_LEVELS = ["Remember", "Understand", "Apply", "Analyze", "Evaluate", "Create"]
+
+
+def bank_key(grade: int, subject: str, topic: str, bloom: str) -> tuple:
+    """Normalize the (grade, subject, topic, bloom) tuple used to look up items."""
+    return (
+        int(grade),
+        " ".join(str(subject).split()).lower(),
+        " ".join(str(topic).split()).lower(),
+        str(bloom).strip().title(),
+    )
+
+
+def _key_query(db: Session, key: tuple):
+    grade, subject, topic, bloom = key
+    return db.query(models.QuestionBankItem).filter_by(
+        grade=grade, subject=subject, topic=topic, bloom=bloom
+    )
+
+
+def _item_columns(stem: str, options: list, answer_idx) -> dict:
+    """The item_key and fingerprint columns of a bank item, computed once when it is banked."""
+    fp = fingerprint((stem or "").strip(), tuple(str(o) for o in options))
+    return {"item_key": item_stats.item_key(stem, options, answer_idx),
+            "fingerprint": fp - (1 << 64) if fp >= 1 << 63 else fp}  # SQLite integers are signed
+
+
+def _unsigned(fp: int) -> int:
+    """A stored fingerprint column back as the unsigned value NearDupIndex works with."""
+    return fp & ((1 << 64) - 1)
+
+
+def _flagged():
+    """SQL condition on bank items: calibration flagged the item as broken (see item_stats)."""
+    Item, Stats = models.QuestionBankItem, models.ItemStats
+    return exists().where(Stats.item_key == Item.item_key, item_stats.is_broken())
+
+
+def _servable(db: Session, key: tuple):
+    """Items for a key still within their serve budget and not flagged as broken."""
+    Item = models.QuestionBankItem
+    return _key_query(db, key).filter(Item.served_count < BANK_MAX_SERVES, ~_flagged())
+
+
+def stock(db: Session, key: tuple) -> int:
+    """Number of items for a key that can still be served (as draw would: flagged items don't count)."""
+    return _servable(db, key).count()
+
+
+def _stored_names(db: Session, profile_id: int, subject: str, topic: str) -> list[tuple[str, str]]:
+    """The (subject, topic) spellings a child's attempts are stored under for a bank key's subject and topic."""
+    S = models.LearnerStats
+    return [
+        (s, t) for s, t in db.query(S.subject, S.topic).filter(S.child_id == profile_id)
+        if " ".join(s.split()).lower() == subject and " ".join(t.split()).lower() == topic
+    ]
+
+
+def seen_index(db: Session, profile_id: int, subject: str, topic: str) -> NearDupIndex:
+    """
+    Near-duplicate index over the questions a child recently answered on a
+    topic. Attempts are matched on their stored subject/topic (found via
+    learner_stats) so the (child_id, subject, topic, taken_at) index applies.
+    """
+    A = models.QuizAttempt
+    names = _stored_names(db, profile_id, subject, topic)
+    if not names:
+        return NearDupIndex()
+    rows = (
+        db.query(models.Question.stem, models.Question.options_json)
+        .join(models.QuizAttemptDetail, models.QuizAttemptDetail.question_id == models.Question.id)
+        .join(A, A.id == models.QuizAttemptDetail.attempt_id)
+        .filter(
+            A.child_id == profile_id,
+            or_(*(and_(A.subject == s, A.topic == t) for s, t in names)),
+        )
+        .order_by(A.taken_at.desc())
+        .limit(CHILD_HISTORY_ITEMS)
+        .all()
+    )
+    index = NearDupIndex()
+    for stem, options_json in rows:
+        index.add(fingerprint((stem or "").strip(), tuple(json.loads(options_json or "[]"))))
+    return index
+
+
+def draw(db: Session, key: tuple, n: int = QUIZ_SIZE, seen: NearDupIndex | None = None) -> list[dict] | None:
+    """
+    Take `n` least-served items for a key and mark them as served, skipping
+    near-duplicates of each other and of anything in `seen` (see seen_index),
+    and items that calibration flagged as broken (see item_stats).
+    Returns None (a bank miss) when fewer than `n` such items are in stock.
+    """
+    candidates = _servable(db, key).order_by(
+        models.QuestionBankItem.served_count.asc(),
+        models.QuestionBankItem.last_served_at.asc(),
+        models.QuestionBankItem.id.asc(),
+    )
+    page_size = max(4 * n, DRAW_PAGE)
+    picked = NearDupIndex()
+    items = []
+    offset = 0
+    while len(items) < n:
+        page = candidates.offset(offset).limit(page_size).all()
+        for it in page:
+            fp = _unsigned(it.fingerprint)
+            if seen is not None and seen.contains(fp):
+                continue
+            if picked.add_if_new(fp):
+                items.append(it)
+                if len(items) == n:
+                    break
+        if len(page) < page_size:
+            break
+        offset += page_size
+    if len(items) < n:
+        return None
+
+    now = datetime.datetime.utcnow()
+    questions = []
+    for i, it in enumerate(items, start=1):
+        it.served_count = (it.served_count or 0) + 1
+        it.last_served_at = now
+        questions.append({
+            "id": f"q{i}",
+            "stem": it.stem,
+            "options": json.loads(it.options_json or "[]"),
+            "answer_idx": it.answer_idx,
+            "bloom": it.bloom,
+            "explanation": it.explanation or "",
+        })
+    db.commit()
+    return questions
+
+
+def deposit(db: Session, key: tuple, questions: list[dict], served: bool = False) -> int:
+    """
+    Store UI-shaped questions (as returned by adapt_model_to_ui) under a key.
+    Near-duplicates of items already banked for the key are skipped.
+    """
+    grade, subject, topic, bloom = key
+    now = datetime.datetime.utcnow()
+    index = NearDupIndex()
+    for it in _key_query(db, key).with_entities(models.QuestionBankItem.fingerprint):
+        index.add(_unsigned(it.fingerprint))
+    added = 0
+    for q in questions:
+        stem = (q.get("stem") or "").strip()
+        options = q.get("options") or []
+        columns = _item_columns(stem, options, q.get("answer_idx", 0))
+        if not stem or not index.add_if_new(_unsigned(columns["fingerprint"])):
+            continue
+        db.add(models.QuestionBankItem(
+            grade=grade,
+            subject=subject,
+            topic=topic,
+            bloom=bloom,
+            stem=stem,
+            options_json=json.dumps(options),
+            answer_idx=q.get("answer_idx", 0),
+            **columns,
+            explanation=q.get("explanation") or "",
+            served_count=1 if served else 0,
+            created_at=now,
+            last_served_at=now if served else None,
+        ))
+        added += 1
+    db.commit()
+    return added
+
+
+def evict(db: Session, key: tuple | None = None) -> int:
+    """
+    Drop stale items: anything past its serve budget or older than
+    QUESTION_BANK_MAX_AGE_DAYS (and, for one key, anything calibration
+    flagged as broken), then trim each key to QUESTION_BANK_MAX_ITEMS_PER_KEY
+    by least-recently-served (an item never served counts from when it was
+    banked, so fresh stock is kept).
+    """
+    Item = models.QuestionBankItem
+    q = _key_query(db, key) if key else db.query(Item)
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=BANK_MAX_AGE_DAYS)
+    removed = (
+        q.filter((Item.served_count >= BANK_MAX_SERVES) | (Item.created_at < cutoff))
+        .delete(synchronize_session=False)
+    )
+
+    if key:
+        removed += _key_query(db, key).filter(_flagged()).delete(synchronize_session=False)
+        overflow = (
+            _key_query(db, key)
+            .order_by(func.coalesce(Item.last_served_at, Item.created_at).desc(), Item.id.desc())
+            .offset(BANK_MAX_ITEMS_PER_KEY)
+            .all()
+        )
+        for it in overflow:
+            db.delete(it)
+        removed += len(overflow)
+
+    db.commit()
+    return removed
+
+
+# -------------------------------------------------------------
+# WARM-UP: python -m backend.question_bank [bloom ...]
+# -------------------------------------------------------------
+def iter_catalog_keys(blooms: list[str] | None = None):
+    """Yield (bank key, catalog.Topic) for every catalog topic."""
+    from .catalog import catalog
+
+    for topic in catalog.topics:
+        for bloom in (blooms or BLOOM_LEVELS):
+            yield bank_key(topic.grade, topic.subject, topic.name, bloom), topic
+
+
+async def _warm(blooms: list[str] | None) -> None:
+    from .routes.quiz import refill_bank
+    from .engine_client import close_engine_client
+    from .math_generator import supports
+
+    try:
+        for key, topic in iter_catalog_keys(blooms):
+            if supports(topic.subject, topic.name):
+                continue  # served by math_generator templates
+            print(f"Refilling {key} ...")
+            await refill_bank(key, {
+                "grade": key[0],
+                "subject": topic.subject,
+                "topic": topic.name,
+                "bloom_level": key[3],
+                "history": {"attempts": 0, "avg_score": None, "last_bloom": None},
+            })
+    finally:
+        await close_engine_client()
+
+
+if __name__ == "__main__":
+    import sys, asyncio
+    from .database import engine, Base
+
+    Base.metadata.create_all(bind=engine)
+    asyncio.run(_warm(sys.argv[1:] or None))
@@ -0,0 +1,71 @@
+# backend/questions.py
+import os, hashlib, json
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from . import models
+
+# -------------------------------------------------------------
+# ANSWERED QUESTION TEXT, STORED ONCE
+# -------------------------------------------------------------
+# The stem, options and explanation of every answered question live in the
+# questions table, one row per distinct text, keyed by content_hash (SHA-1
+# of exactly what was shown). quiz_attempt_details rows point at it by id,
+# so a retake of the same quiz, or a bank item served to a whole class,
+# adds a few integers per answer instead of another copy of the text.
+# Migration 3 (backend/migrations.py) moves existing databases over.
+LOOKUP_CHUNK = 500  # stay under SQLite's bound-parameter limit
+TEXT_CACHE_SIZE = int(os.getenv("QUESTION_TEXT_CACHE_SIZE", 20000))  # decoded texts kept by texts()
+
+
+def content_hash(stem: str | None, options_json: str | None, explanation: str | None) -> str:
+    return hashlib.sha1(json.dumps([stem, options_json, explanation]).encode("utf-8")).hexdigest()
+
+
+def _lookup(db: Session, hashes: list[str]) -> dict[str, int]:
+    Q = models.Question
+    found = {}
+    for lo in range(0, len(hashes), LOOKUP_CHUNK):
+        found.update(db.query(Q.content_hash, Q.id).filter(Q.content_hash.in_(hashes[lo:lo + LOOKUP_CHUNK])))
+    return found
+
+
+def ids(db: Session, texts: list[tuple[str | None, str | None, str | None]]) -> list[int]:
+    """
+    Question id for each (stem, options_json, explanation), inserting the
+    texts not stored yet with one executemany. Does not commit; a concurrent
+    insert of the same text fails the caller's flush on the unique hash.
+    """
+    hashes = [content_hash(*t) for t in texts]
+    unique = dict(zip(hashes, texts))
+    found = _lookup(db, list(unique))
+    new = [
+        {"content_hash": h, "stem": t[0], "options_json": t[1], "explanation": t[2]}
+        for h, t in unique.items() if h not in found
+    ]
+    if new:
+        db.execute(insert(models.Question), new)
+        found.update(_lookup(db, [row["content_hash"] for row in new]))
+    return [found[h] for h in hashes]
+
+
+# Rows are never updated (a changed text is a new row), so decoded text can
+# be kept for as long as we like: attempt reads then skip both the text
+# query and a json.loads of the options per answer.
+_texts: dict[int, tuple[str | None, list, str]] = {}
+
+
+def texts(db: Session, question_ids) -> dict[int, tuple[str | None, list, str]]:
+    """question id -> (stem, options list, explanation), from the cache or one IN query for the rest."""
+    out = {qid: _texts[qid] for qid in question_ids if qid in _texts}
+    missing = [qid for qid in set(question_ids) if qid not in out]
+    Q = models.Question
+    for lo in range(0, len(missing), LOOKUP_CHUNK):
+        rows = db.query(Q.id, Q.stem, Q.options_json, Q.explanation).filter(Q.id.in_(missing[lo:lo + LOOKUP_CHUNK]))
+        for qid, stem, options_json, explanation in rows:
+            out[qid] = (stem, json.loads(options_json or "[]"), explanation or "")
+    if len(_texts) + len(missing) > TEXT_CACHE_SIZE:
+        _texts.clear()
+    _texts.update((qid, out[qid]) for qid in missing if qid in out)
+    return out
@@ -0,0 +1,157 @@
+# backend/review.py
+import os, datetime
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models
+
+# -------------------------------------------------------------
+# SPACED-REPETITION REVIEW SCHEDULE
+# -------------------------------------------------------------
+# Every topic a child has been quizzed on gets a next-review time, set
+# SM-2 style from the attempt score: a pass (>= REVIEW_PASS_SCORE) pushes
+# the review out by a growing interval, scaled by an "ease" that good
+# scores raise and weak ones lower; a fail brings the topic back the next
+# day. The (child_id, due_at) index on review_schedule is each child's
+# priority queue: /quiz/due reads the top k with one index seek, and
+# /quiz/submit reschedules a topic in the same transaction as the attempt.
+#
+#     python -m backend.review rebuild     (nightly: replay every attempt)
+REVIEW_PASS_SCORE = float(os.getenv("REVIEW_PASS_SCORE", 0.6))
+REVIEW_FIRST_INTERVALS = (1.0, 3.0)   # days after the first and second pass
+REVIEW_START_EASE = 2.5
+REVIEW_MIN_EASE = 1.3
+REVIEW_MAX_INTERVAL = float(os.getenv("REVIEW_MAX_INTERVAL_DAYS", 120))
+REBUILD_CHUNK = 5000
+
+
+def _apply(row: models.ReviewSchedule, score: float, taken_at: datetime.datetime) -> None:
+    q = 5 * max(0.0, min(1.0, score))   # SM-2 grade on a 0-5 scale
+    row.ease = max(REVIEW_MIN_EASE, row.ease + 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
+    if score >= REVIEW_PASS_SCORE:
+        row.reps += 1
+        if row.reps <= len(REVIEW_FIRST_INTERVALS):
+            row.interval_days = REVIEW_FIRST_INTERVALS[row.reps - 1]
+        else:
+            row.interval_days = min(REVIEW_MAX_INTERVAL, row.interval_days * row.ease)
+    else:
+        row.reps = 0
+        row.lapses += 1
+        row.interval_days = REVIEW_FIRST_INTERVALS[0]
+    row.last_score = score
+    row.last_taken_at = taken_at
+    row.due_at = taken_at + datetime.timedelta(days=row.interval_days)
+
+
+def _new(child_id: int, subject: str, topic: str) -> models.ReviewSchedule:
+    return models.ReviewSchedule(child_id=child_id, subject=subject, topic=topic, ease=REVIEW_START_EASE,
+                                 interval_days=0.0, reps=0, lapses=0, due_at=datetime.datetime.utcnow())
+
+
+def record(db: Session, attempt: models.QuizAttempt) -> models.ReviewSchedule:
+    """Reschedule the attempt's topic. Does not commit."""
+    pk = (attempt.child_id, attempt.subject, attempt.topic)
+    row = db.get(models.ReviewSchedule, pk)
+    if row is None:
+        row = _new(*pk)
+        try:
+            with db.begin_nested():
+                db.add(row)
+        except IntegrityError:
+            row = db.get(models.ReviewSchedule, pk)  # created by a concurrent submit
+    taken_at = attempt.taken_at or datetime.datetime.utcnow()
+    if row.last_taken_at and taken_at < row.last_taken_at:
+        return row  # older than the attempt that set the schedule; `rebuild` replays it in order
+    _apply(row, attempt.score or 0.0, taken_at)
+    return row
+
+
+def due(db: Session, child_id: int, k: int = 5, subject: str | None = None,
+        now: datetime.datetime | None = None) -> list[dict]:
+    """The child's k topics with the earliest review time (overdue first)."""
+    now = now or datetime.datetime.utcnow()
+    R = models.ReviewSchedule
+    q = db.query(R).filter(R.child_id == child_id)
+    if subject:
+        q = q.filter(R.subject == subject)
+    rows = q.order_by(R.due_at.asc()).limit(k).all()
+    return [
+        {
+            "subject": r.subject,
+            "topic": r.topic,
+            "due_at": r.due_at.isoformat(),
+            "due": r.due_at <= now,
+            "overdue_days": round(max(0.0, (now - r.due_at).total_seconds() / 86400), 2),
+            "interval_days": round(r.interval_days, 2),
+            "last_score": r.last_score,
+            "reps": r.reps,
+            "lapses": r.lapses,
+        }
+        for r in rows
+    ]
+
+
+def rebuild(db: Session) -> int:
+    """
+    Recompute every child's schedule in one pass over quiz_attempts, read in
+    (child, subject, topic, taken_at) order off the history index, so each
+    topic's row is finished as soon as the next topic starts. Returns rows
+    written.
+    """
+    db.query(models.ReviewSchedule).delete(synchronize_session=False)
+    cursor = db.connection().connection.cursor()
+    cursor.execute(
+        "SELECT child_id, subject, topic, score, taken_at FROM quiz_attempts "
+        "ORDER BY child_id, subject, topic, taken_at"
+    )
+    done, written, row, key = [], 0, None, None
+    while chunk := cursor.fetchmany(REBUILD_CHUNK):
+        for child_id, subject, topic, score, taken_at in chunk:
+            if (child_id, subject, topic) != key:
+                if row is not None:
+                    done.append(row)
+                key = (child_id, subject, topic)
+                row = _new(*key)
+            if isinstance(taken_at, str):
+                taken_at = datetime.datetime.fromisoformat(taken_at)
+            _apply(row, score or 0.0, taken_at or datetime.datetime.utcnow())
+        if len(done) >= REBUILD_CHUNK:
+            written += _write(db, done)
+            done = []
+    cursor.close()
+    if row is not None:
+        done.append(row)
+    written += _write(db, done)
+    db.commit()
+    return written
+
+
+def _write(db: Session, rows: list[models.ReviewSchedule]) -> int:
+    if rows:
+        cols = [c.name for c in models.ReviewSchedule.__table__.columns]
+        db.execute(insert(models.ReviewSchedule), [{c: getattr(r, c) for c in cols} for r in rows])
+    return len(rows)
+
+
+def backfill_if_empty(db: Session) -> int:
+    """Build the schedule once for databases that have attempts from before it existed."""
+    if db.query(models.ReviewSchedule).first() is None and db.query(models.QuizAttempt).first() is not None:
+        return rebuild(db)
+    return 0
+
+
+if __name__ == "__main__":
+    import argparse, time
+    from .database import SessionLocal, engine, Base
+
+    ap = argparse.ArgumentParser(description="Maintain the spaced-repetition review schedule.")
+    ap.add_argument("command", choices=["rebuild"])
+    args = ap.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        n = rebuild(db)
+    print(f"Rebuilt {n} review_schedule rows in {time.perf_counter() - start:.2f}s")
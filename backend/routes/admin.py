@@ -0,0 +1,66 @@
+# backend/routes/admin.py
+import os, secrets, datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.orm import Session
+
+from .. import analytics
+from ..catalog import catalog
+from ..database import get_db
+
+# Admin endpoints are off unless ADMIN_TOKEN is set; callers send it as X-Admin-Token.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+def _group_by(raw: str) -> tuple[str, ...]:
+    dims = tuple(d.strip() for d in raw.split(",") if d.strip())
+    unknown = [d for d in dims if d not in analytics.DIMENSIONS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown group_by {unknown}; use {list(analytics.DIMENSIONS)}")
+    return dims
+
+
+def _report(db: Session, report: str, grade, subject, since, until, group_by, refresh) -> dict:
+    if since and until and since > until:
+        raise HTTPException(status_code=422, detail="since is after until")
+    if subject:
+        subject = catalog.subject(subject) or subject
+    return analytics.run(db, report, refresh=refresh, grade=grade, subject=subject,
+                         since=since, until=until, group_by=_group_by(group_by))
+
+
+@router.get("/analytics/scores")
+def score_analytics(grade: int | None = None, subject: str | None = None,
+                    since: datetime.date | None = None, until: datetime.date | None = None,
+                    group_by: str = ",".join(analytics.DIMENSIONS), refresh: bool = False,
+                    db: Session = Depends(get_db)):
+    """
+    Attempts, children, score mean/percentiles and answer accuracy per
+    group (any of grade, subject, topic, bloom) for attempts taken between
+    `since` and `until` (inclusive dates). Cached on disk until new
+    attempts arrive; `refresh=true` recomputes.
+    """
+    return _report(db, "scores", grade, subject, since, until, group_by, refresh)
+
+
+@router.get("/analytics/mastery")
+def mastery_analytics(grade: int | None = None, subject: str | None = None,
+                      since: datetime.date | None = None, until: datetime.date | None = None,
+                      group_by: str = ",".join(analytics.DIMENSIONS), refresh: bool = False,
+                      db: Session = Depends(get_db)):
+    """
+    Knowledge-tracing mastery per group: children, mean/percentile
+    P(mastered) and the share mastered. With `since`/`until`, only topics a
+    child practised in that window count (e.g. "Grade 5 this term").
+    """
+    return _report(db, "mastery", grade, subject, since, until, group_by, refresh)
@@ -0,0 +1,21 @@
+# backend/routes/catalog.py
+from fastapi import APIRouter, Request, Response
+
+from ..catalog import catalog
+
+router = APIRouter(tags=["catalog"])
+
+CATALOG_MAX_AGE = 3600  # seconds clients may reuse the catalog without asking
+
+
+@router.get("/catalog")
+def get_catalog(request: Request, response: Response):
+    """
+    The CBC topic catalog as {"Grade 4": {"Mathematics": [...]}, ...}.
+    Send the last ETag in If-None-Match to get a 304 when nothing changed.
+    """
+    headers = {"ETag": catalog.etag, "Cache-Control": f"public, max-age={CATALOG_MAX_AGE}"}
+    if catalog.etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return {"subjects": catalog.subjects, "topics": catalog.to_dict()}
@@ -1,18 +1,25 @@
 # backend/routes/quiz.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-import os, requests, datetime, json
+import asyncio, datetime, json, os
+import orjson
 import re
 
-from ..database import get_db
-from .. import models
+from ..database import SessionLocal, get_db
+from .. import models, questions, question_bank, engine_client, math_generator, learner_stats, mastery, progress, review, submissions
+from ..catalog import catalog
+from ..engine_client import EngineError
+from ..jobs import jobs
+from ..submit_queue import submit_queue
+from ..engine_stream import ArrayStopTracker
+from ..dedup import NearDupIndex, question_fingerprint, unique_questions
 
 router = APIRouter(prefix="/quiz", tags=["quiz"])
 
-QUIZ_ENGINE_URL = os.getenv("QUIZ_ENGINE_URL")
-QUIZ_API_KEY = os.getenv("QUIZ_API_KEY")
-
 class GeneratePayload(BaseModel):
     profile_id: int
     grade: int
@@ -37,27 +44,27 @@ class SubmitPayload(BaseModel):
     bloom_level: str | None = None
     score: float
     details: list[AnswerDetail] = []
+    client_key: str | None = None  # idempotency key, generated on the device
+    taken_at: datetime.datetime | None = None  # when the quiz was taken, for offline uploads
+
+
+class BatchSubmitPayload(BaseModel):
+    attempts: list[SubmitPayload]
 
 # --------------------------
-# Helpers (unchanged from before)
+# History, Bloom selection and engine-to-UI adaptation
 # --------------------------
 def summarize_history(db: Session, profile_id: int, subject: str, topic: str) -> dict:
-    attempts = (
-        db.query(models.QuizAttempt)
-        .filter_by(child_id=profile_id, subject=subject, topic=topic)
-        .order_by(models.QuizAttempt.taken_at.desc())
-        .limit(5)
-        .all()
-    )
-    if not attempts:
-        return {"attempts": 0, "avg_score": None, "last_bloom": None}
-    avg_score = sum(a.score for a in attempts) / len(attempts)
-    last_bloom = attempts[0].bloom_level if attempts else None
-    return {"attempts": len(attempts), "avg_score": avg_score, "last_bloom": last_bloom}
+    """Recent performance and per-Bloom mastery estimates for adaptive Bloom selection."""
+    history = learner_stats.summary(learner_stats.get(db, profile_id, subject, topic))
+    history["mastery"] = mastery.levels(db, profile_id, subject, topic)
+    return history
 
 def choose_bloom(history: dict, requested: str | None) -> str:
     if requested:
         return requested
+    if history.get("mastery"):
+        return mastery.next_bloom(history["mastery"])
     if not history.get("attempts"):
         return "Understand"
     avg = history.get("avg_score") or 0
@@ -70,25 +77,31 @@ def choose_bloom(history: dict, requested: str | None) -> str:
 BLOOM_INT_TO_TEXT = {1:"Remember",2:"Understand",3:"Apply",4:"Analyze",5:"Evaluate",6:"Create"}
 LETTER_TO_IDX = {"A":0,"B":1,"C":2,"D":3}
 
+def adapt_question(q: dict, i: int, bloom_text: str) -> dict:
+    """Reshape one engine item into the question dict the UI renders."""
+    opts = q.get("options", {})
+    ordered = [opts.get("A",""), opts.get("B",""), opts.get("C",""), opts.get("D","")]
+    ans_letter = (q.get("answer") or "").strip().upper()
+    return {
+        "id": f"q{i}",
+        "stem": q.get("question","").strip(),
+        "options": ordered,
+        "answer_idx": LETTER_TO_IDX.get(ans_letter,0),
+        "bloom": bloom_text,
+        "explanation": q.get("rationale","").strip()
+    }
+
 def adapt_model_to_ui(model_payload: dict) -> dict:
     meta = (model_payload or {}).get("metadata", {})
     bloom_level = meta.get("bloom_level")
     bloom_text = BLOOM_INT_TO_TEXT.get(bloom_level, bloom_level) if isinstance(bloom_level, int) else (bloom_level or "Understand")
     
     questions = (model_payload or {}).get("questions", [])
-    ui_questions = []
-    for i, q in enumerate(questions, start=1):
-        opts = q.get("options", {})
-        ordered = [opts.get("A",""), opts.get("B",""), opts.get("C",""), opts.get("D","")]
-        ans_letter = (q.get("answer") or "").strip().upper()
-        ui_questions.append({
-            "id": f"q{i}",
-            "stem": q.get("question","").strip(),
-            "options": ordered,
-            "answer_idx": LETTER_TO_IDX.get(ans_letter,0),
-            "bloom": bloom_text,
-            "explanation": q.get("rationale","").strip()
-        })
+    ui_questions = [adapt_question(q, i, bloom_text) for i, q in enumerate(questions, start=1)]
+    # The prompt asks for no near-identical questions; enforce it
+    ui_questions = unique_questions(ui_questions)
+    for i, q in enumerate(ui_questions, start=1):
+        q["id"] = f"q{i}"
     return {
         "metadata": {
             "subject": meta.get("subject"),
@@ -101,22 +114,320 @@ def adapt_model_to_ui(model_payload: dict) -> dict:
     }
 
 # --------------------------
-# Forwarding endpoint
+# Quiz engine + question bank
 # --------------------------
-@router.post("/generate")
-def generate_quiz(p: GeneratePayload, db: Session = Depends(get_db)):
-    if not QUIZ_ENGINE_URL:
-        raise HTTPException(status_code=500, detail="Quiz engine URL not configured")
+async def request_engine(colab_payload: dict) -> dict:
+    """Forward a generation request to the Colab quiz engine (via Ngrok)."""
+    return await engine_client.get_engine_client().generate(colab_payload)
 
-    history = summarize_history(db, p.profile_id, p.subject, p.topic)
-    bloom = choose_bloom(history, p.bloom_level)
 
+# Response shapes of the read endpoints. They document the API (OpenAPI);
+# the handlers build plain dicts from column tuples and send them
+# pre-encoded with orjson (OrjsonResponse), so FastAPI neither validates
+# nor re-encodes what these describe.
+class OrjsonResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)  # datetimes come out as ISO 8601, like isoformat()
+
+
+class AttemptRow(BaseModel):
+    id: int
+    subject: str | None
+    topic: str | None
+    bloom_level: str | None
+    score: float | None
+    taken_at: datetime.datetime | None
+
+
+class AttemptDetailOut(BaseModel):
+    question_index: int | None
+    stem: str | None
+    options: list[str]
+    picked_idx: int | None
+    correct_idx: int | None
+    explanation: str
+
+
+class AttemptOut(BaseModel):
+    id: int
+    profile_id: int | None
+    subject: str | None
+    topic: str | None
+    bloom_level: str | None
+    score: float | None
+    taken_at: datetime.datetime | None
+    details: list[AttemptDetailOut]
+
+
+class SubjectSummary(BaseModel):
+    subject: str | None
+    attempts: int
+    avg_score: float | None
+    last_taken_at: datetime.datetime | None
+
+
+class TopicProgress(BaseModel):
+    topic: str
+    attempts: int
+    score: float | None            # exponentially weighted recent score
+    mastery: float | None          # best P(mastered) over the Bloom levels seen
+    status: str                    # not_started | needs_practice | good_progress | doing_well
+    last_taken_at: datetime.datetime | None
+    due_at: datetime.datetime | None
+    due: bool
+
+
+class SubjectProgress(BaseModel):
+    subject: str
+    overall: float
+    status_counts: dict[str, int]
+    topics: list[TopicProgress]
+
+
+class ProgressOut(BaseModel):
+    profile_id: int
+    grade: int
+    overall: float
+    status_counts: dict[str, int]
+    subjects: list[SubjectProgress]
+
+
+# --------------------------
+# Single-flight: one engine call per identical in-flight request
+# --------------------------
+SINGLEFLIGHT_MAX_WAITERS = int(os.getenv("QUIZ_SINGLEFLIGHT_MAX_WAITERS", 100))
+
+
+class SingleFlightBusy(Exception):
+    """Raised when a key already has the maximum number of waiters."""
+
+
+class SingleFlight:
+    """
+    Registry of in-flight calls keyed by the normalized bank key. The first
+    caller for a key starts the call; later callers await the same task until
+    it finishes. The task is shielded so a leader that disconnects does not
+    cancel the call for everyone else. `stream` does the same for calls that
+    produce items one at a time.
+    """
+    def __init__(self, max_waiters: int = SINGLEFLIGHT_MAX_WAITERS):
+        self.max_waiters = max_waiters
+        self._calls: dict[tuple, list] = {}  # key -> [task, waiter_count]
+        self._streams: dict[tuple, _Broadcast] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    async def do(self, key: tuple, fn):
+        call = self._calls.get(key)
+        if call is None:
+            task = asyncio.ensure_future(fn())
+            call = self._calls[key] = [task, 0]
+            task.add_done_callback(lambda t, c=call: self._finish(key, c, t))
+            self.leaders += 1
+        elif call[1] >= self.max_waiters:
+            self.rejected += 1
+            raise SingleFlightBusy(key)
+        else:
+            call[1] += 1
+            self.coalesced += 1
+        return await asyncio.shield(call[0])
+
+    async def stream(self, key: tuple, produce):
+        """
+        Streaming form of `do`: `produce()` is an async iterator that runs
+        once per key in its own task, and every concurrent caller receives
+        all of its items (the ones produced before it joined first). The
+        producer's exception, if any, is raised to every caller after the
+        items it did produce.
+        """
+        flight = self._streams.get(key)
+        if flight is None:
+            flight = self._streams[key] = _Broadcast()
+            flight.task = asyncio.ensure_future(flight.run(produce()))
+            flight.task.add_done_callback(
+                lambda t, f=flight: self._streams.pop(key) if self._streams.get(key) is f else None)
+            self.leaders += 1
+        elif flight.waiters >= self.max_waiters:
+            self.rejected += 1
+            raise SingleFlightBusy(key)
+        else:
+            flight.waiters += 1
+            self.coalesced += 1
+        async for item in flight.follow():
+            yield item
+
+    def _finish(self, key: tuple, call: list, task: asyncio.Future) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter went away
+
+    def metrics(self) -> dict:
+        total = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "waiting": sum(c[1] for c in self._calls.values()) + sum(f.waiters for f in self._streams.values()),
+            "engine_calls": self.leaders,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "coalesce_ratio": (self.coalesced / total) if total else 0.0,
+        }
+
+
+class _Broadcast:
+    """The items of one in-flight stream so far, replayable by late joiners."""
+    def __init__(self):
+        self.items: list = []
+        self.error: Exception | None = None
+        self.finished = False
+        self.waiters = 0
+        self.task: asyncio.Future | None = None
+        self._changed = asyncio.Event()
+
+    async def run(self, source) -> None:
+        try:
+            async for item in source:
+                self.items.append(item)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
+            self._notify()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def follow(self):
+        i = 0
+        while True:
+            if i < len(self.items):
+                i += 1
+                yield self.items[i - 1]
+            elif self.finished:
+                break
+            else:
+                await self._changed.wait()
+        if self.error is not None:
+            raise self.error
+
+
+singleflight = SingleFlight()
+
+
+def _deposit(key: tuple, questions: list[dict], served: bool) -> None:
+    with SessionLocal() as db:
+        question_bank.deposit(db, key, questions, served)
+
+
+async def _stream_live(key: tuple, colab_payload: dict):
+    """
+    Engine items for `key` as soon as they are generated and validated,
+    banked once the stream completes (run via singleflight.stream).
+    """
+    tracker = ArrayStopTracker(colab_payload["subject"], colab_payload["grade"], colab_payload["topic"],
+                               target=STREAM_MAX_ITEMS)
+    accepted, index = [], NearDupIndex()
+    async for chunk in engine_client.get_engine_client().stream_generate(colab_payload):
+        for item in tracker.feed(chunk):
+            q = adapt_question(item, len(accepted) + 1, key[3])
+            if not index.add_if_new(question_fingerprint(q)):
+                continue
+            accepted.append(q)
+            yield q
+        if tracker.done:
+            break
+    if accepted:
+        await run_in_threadpool(_deposit, key, accepted, True)
+
+
+async def _generate_live(key: tuple, colab_payload: dict) -> dict:
+    """Call the engine once for `key` and bank the result (run via singleflight)."""
+    raw = await request_engine(colab_payload)
+    await run_in_threadpool(_deposit, key, adapt_model_to_ui(raw)["questions"], True)
+    return raw
+
+
+def _draw_from_bank(key: tuple, profile_id: int) -> tuple[list[dict] | None, bool]:
+    """
+    Draw a quiz for `key` that avoids questions the child has already
+    answered; also report whether the key's stock is now low.
+    """
+    with SessionLocal() as db:
+        seen = question_bank.seen_index(db, profile_id, key[1], key[2])
+        questions = question_bank.draw(db, key, seen=seen)
+        low = question_bank.stock(db, key) < question_bank.BANK_LOW_WATERMARK
+    return questions, low
+
+
+def _refill_needed(key: tuple) -> bool:
+    with SessionLocal() as db:
+        return question_bank.stock(db, key) < question_bank.BANK_LOW_WATERMARK
+
+
+def _bank_refill(key: tuple, questions: list[dict]) -> None:
+    with SessionLocal() as db:
+        question_bank.deposit(db, key, questions)
+        question_bank.evict(db, key)
+
+
+_refilling: set[tuple] = set()
+
+async def refill_bank(key: tuple, colab_payload: dict) -> None:
+    """Top up the question bank for one key; runs as a background task."""
+    if key in _refilling:
+        return
+    _refilling.add(key)
+    try:
+        if not await run_in_threadpool(_refill_needed, key):
+            return
+        quiz = adapt_model_to_ui(await request_engine(colab_payload))
+        await run_in_threadpool(_bank_refill, key, quiz["questions"])
+    except EngineError:
+        pass  # next bank miss / low-stock draw will retry
+    finally:
+        _refilling.discard(key)
+
+
+_background: set[asyncio.Task] = set()
+
+def _spawn(fn, *args) -> None:
+    """BackgroundTasks stand-in for work started outside a request."""
+    task = asyncio.ensure_future(fn(*args))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+def _history(profile_id: int, subject: str, topic: str) -> dict:
+    with SessionLocal() as db:
+        return summarize_history(db, profile_id, subject, topic)
+
+
+async def _prepare(p: GeneratePayload) -> tuple[dict, tuple]:
+    """
+    Resolve the topic against the catalog, then history + Bloom level, and
+    build the engine payload and bank key. Canonical subject/topic names
+    are written back to `p`.
+    """
     # Ensure grade is sent as int to Colab quiz engine
     try:
         grade_int = int(re.sub(r"[^\d]", "", str(p.grade)))
     except:
         raise HTTPException(status_code=400, detail=f"Invalid grade format: {p.grade}")
 
+    # Reject out-of-scope topics before any engine call
+    topic = catalog.resolve(grade_int, p.subject, p.topic)
+    if topic is None:
+        raise HTTPException(status_code=422, detail=f"'{p.topic}' is not a Grade {grade_int} {p.subject} topic in the CBC catalog")
+    p.subject, p.topic = topic.subject, topic.name
+
+    history = await run_in_threadpool(_history, p.profile_id, p.subject, p.topic)
+    bloom = choose_bloom(history, p.bloom_level)
+
     colab_payload = {
         "grade": grade_int,
         "subject": p.subject,
@@ -124,98 +435,354 @@ def generate_quiz(p: GeneratePayload, db: Session = Depends(get_db)):
         "bloom_level": bloom,
         "history": history,
     }
+    return colab_payload, question_bank.bank_key(grade_int, p.subject, p.topic, bloom)
+
+
+def _bank_metadata(colab_payload: dict, key: tuple, source: str) -> dict:
+    return {
+        "subject": colab_payload["subject"],
+        "grade": colab_payload["grade"],
+        "topic": colab_payload["topic"],
+        "bloom_level": colab_payload["bloom_level"],
+        "bloom": key[3],
+        "source": source,
+    }
+
+
+def _template_quiz(colab_payload: dict, key: tuple) -> dict:
+    quiz = math_generator.generate_quiz(key[0], colab_payload["subject"], colab_payload["topic"], key[3])
+    return {"metadata": _bank_metadata(colab_payload, key, "template"), "questions": quiz["questions"]}
+
+
+async def build_quiz(p: GeneratePayload, schedule) -> dict:
+    """
+    Produce a quiz for `p` from the bank or the engine. Shared by
+    /quiz/generate and generation jobs; `schedule(fn, *args)` queues
+    background refills. Database work runs in short-lived sessions, so no
+    connection is held while waiting on the engine.
+    """
+    colab_payload, key = await _prepare(p)
 
-    headers = {"X-API-Key": QUIZ_API_KEY} if QUIZ_API_KEY else {}
+    # Arithmetic topics come from CPU templates: no engine, no bank
+    if math_generator.supports(p.subject, p.topic):
+        return _template_quiz(colab_payload, key)
+
+    # Serve from the bank when possible; refill in the background when low
+    questions, low = await run_in_threadpool(_draw_from_bank, key, p.profile_id)
+    if questions is not None:
+        if low:
+            schedule(refill_bank, key, colab_payload)
+        return {"metadata": _bank_metadata(colab_payload, key, "bank"), "questions": questions}
+
+    # Bank miss: fall back to a live engine call
+    if not engine_client.QUIZ_ENGINE_URLS:
+        raise HTTPException(status_code=500, detail="Quiz engine URL not configured")
     try:
-        # Forward request to Colab via Ngrok
-        r = requests.post(f"{QUIZ_ENGINE_URL}/generate", json=colab_payload, headers=headers, timeout=1000)
-        r.raise_for_status()
-        raw = r.json()
-    except requests.RequestException as e:
+        raw = await singleflight.do(key, lambda: _generate_live(key, colab_payload))
+    except SingleFlightBusy:
+        raise HTTPException(status_code=429, detail="Too many students are waiting for this quiz; try again shortly")
+    except EngineError as e:
         raise HTTPException(status_code=502, detail=f"Quiz engine error: {e}")
 
-    return adapt_model_to_ui(raw)
+    quiz = adapt_model_to_ui(raw)
+    quiz["metadata"].update(subject=p.subject, topic=p.topic, source="engine")
+    schedule(refill_bank, key, colab_payload)
+    return quiz
 
 
-@router.post("/submit")
-def submit_quiz(p: SubmitPayload, db: Session = Depends(get_db)):
-    """Persist a completed quiz attempt and per-question details."""
-    # Create attempt summary row
-    attempt = models.QuizAttempt(
-        child_id=p.profile_id,
-        subject=p.subject,
-        topic=p.topic,
-        bloom_level=p.bloom_level or "Unknown",
-        score=p.score,
-        taken_at=datetime.datetime.utcnow(),
+@router.post("/generate")
+async def generate_quiz(p: GeneratePayload, background_tasks: BackgroundTasks):
+    return await build_quiz(p, background_tasks.add_task)
+
+
+# The prompt asks for 10-15 items; stop reading (and let the engine stop) after this many
+STREAM_MAX_ITEMS = int(os.getenv("QUIZ_STREAM_MAX_ITEMS", 15))
+
+def _ndjson(obj: dict) -> str:
+    return json.dumps(obj) + "\n"
+
+
+@router.post("/generate/stream")
+async def generate_quiz_stream(p: GeneratePayload):
+    """
+    NDJSON variant of /generate: a `metadata` line, then one `question` line
+    per item as soon as the engine has produced and we have validated it,
+    then `done` (or `error`). Concurrent streams for the same bank key share
+    one engine stream, as /generate shares one engine call.
+    """
+    colab_payload, key = await _prepare(p)
+    if math_generator.supports(p.subject, p.topic):
+        questions, low, source = _template_quiz(colab_payload, key)["questions"], False, "template"
+    else:
+        questions, low = await run_in_threadpool(_draw_from_bank, key, p.profile_id)
+        source = "bank" if questions is not None else "engine"
+    if questions is None and not engine_client.QUIZ_ENGINE_URLS:
+        raise HTTPException(status_code=500, detail="Quiz engine URL not configured")
+
+    async def lines():
+        yield _ndjson({"type": "metadata", **_bank_metadata(colab_payload, key, source)})
+        if questions is not None:
+            for q in questions:
+                yield _ndjson({"type": "question", "question": q})
+            if low:
+                _spawn(refill_bank, key, colab_payload)
+            yield _ndjson({"type": "done", "count": len(questions)})
+            return
+
+        # Concurrent streams for the same key share one engine stream
+        count = 0
+        try:
+            async for q in singleflight.stream(key, lambda: _stream_live(key, colab_payload)):
+                count += 1
+                yield _ndjson({"type": "question", "question": q})
+        except SingleFlightBusy as e:
+            yield _ndjson({"type": "error", "detail": f"Quiz engine error: {e}"})
+            return
+        except EngineError as e:
+            if count:
+                yield _ndjson({"type": "error", "detail": f"Quiz engine error: {e}"})
+                return
+            # Engine without streaming support (or a failed stream): one shot
+            try:
+                raw = await singleflight.do(key, lambda: _generate_live(key, colab_payload))
+            except (EngineError, SingleFlightBusy) as e:
+                yield _ndjson({"type": "error", "detail": f"Quiz engine error: {e}"})
+                return
+            live = adapt_model_to_ui(raw)["questions"]
+            for q in live:
+                yield _ndjson({"type": "question", "question": q})
+            _spawn(refill_bank, key, colab_payload)
+            yield _ndjson({"type": "done", "count": len(live)})
+            return
+
+        _spawn(refill_bank, key, colab_payload)
+        yield _ndjson({"type": "done", "count": count})
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+# --------------------------
+# Generation jobs (submit, poll / SSE)
+# --------------------------
+JOB_SSE_HEARTBEAT = 15  # seconds between keep-alive comments on idle streams
+
+async def _run_generation_job(p: GeneratePayload) -> dict:
+    return await build_quiz(p, _spawn)
+
+
+@router.post("/jobs", status_code=202)
+async def create_generation_job(p: GeneratePayload):
+    """Queue a quiz generation and return its job id immediately."""
+    topic = catalog.resolve(p.grade, p.subject, p.topic)
+    if topic is None:
+        raise HTTPException(status_code=422, detail=f"'{p.topic}' is not a Grade {p.grade} {p.subject} topic in the CBC catalog")
+    dedupe_key = (p.profile_id, p.grade, topic.subject, topic.name, p.bloom_level)
+    job = jobs.submit(lambda: _run_generation_job(p), dedupe_key=dedupe_key)
+    return {"job_id": job.id, "status": job.status}
+
+
+def _get_job_or_404(job_id: str):
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@router.get("/jobs/{job_id}")
+def get_generation_job(job_id: str):
+    """Poll a generation job; includes the quiz once status is 'done'."""
+    return _get_job_or_404(job_id).to_dict()
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_generation_job(job_id: str):
+    """Server-sent events: one `status` event per change, then `result` or `error`."""
+    job = _get_job_or_404(job_id)
+
+    async def events():
+        while True:
+            seen, state = job.version, job.to_dict()
+            if job.finished:
+                yield f"event: {'result' if job.status == 'done' else 'error'}\ndata: {json.dumps(state)}\n\n"
+                return
+            yield f"event: status\ndata: {json.dumps(state)}\n\n"
+            # The job may change while we are suspended in a yield: compare
+            # against the version sent rather than waiting for the next change
+            while not job.finished and not await job.wait_changed(JOB_SSE_HEARTBEAT, seen):
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    db.add(attempt)
-    db.flush()  # get attempt.id
-
-    # Persist details if provided
-    for d in (p.details or []):
-        db.add(models.QuizAttemptDetail(
-            attempt_id=attempt.id,
-            question_index=d.question_index,
-            stem=d.stem,
-            options_json=json.dumps(d.options or []),
-            picked_idx=d.picked_idx if d.picked_idx is not None else -1,
-            correct_idx=d.correct_idx if d.correct_idx is not None else -1,
-            explanation=d.explanation or "",
-        ))
-
-    db.commit()
-    return {"attempt_id": attempt.id, "status": "saved"}
-
-
-@router.get("/recent")
-def recent_attempts(profile_id: int, subject: str | None = None, limit: int = 10, db: Session = Depends(get_db)):
-    """Return recent quiz attempts for a profile, optionally filtered by subject."""
-    q = db.query(models.QuizAttempt).filter(models.QuizAttempt.child_id == profile_id)
+
+
+@router.get("/metrics")
+def quiz_metrics():
+    """Counters for request coalescing and per-endpoint engine health."""
+    out = {"singleflight": singleflight.metrics()}
+    if engine_client.QUIZ_ENGINE_URLS:
+        out["engine_pool"] = engine_client.get_engine_client().stats()
+    return out
+
+
+@router.post("/submit")
+def submit_quiz(p: SubmitPayload, response: Response, db: Session = Depends(get_db)):
+    """
+    Persist a completed quiz attempt and per-question details. While the
+    write-behind queue runs (backend/submit_queue.py) the attempt is only
+    spooled to disk here: the reply is 202 with a pending id, and
+    GET /quiz/submit/{pending_id} reports the attempt id once it is saved.
+    """
+    if submit_queue.running:
+        response.status_code = 202
+        return {"attempt_id": None, "pending_id": submit_queue.enqueue(p), "status": "pending"}
+    result = submissions.save_attempts(db, [p])[0]
+    return {"attempt_id": result["attempt_id"], "status": result["status"]}
+
+
+@router.get("/submit/{pending_id}")
+def submit_status(pending_id: str):
+    """Status of a write-behind submission: pending, saved, duplicate or failed."""
+    result = submit_queue.status(pending_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Unknown pending id")
+    return result
+
+
+@router.post("/submit/batch")
+def submit_quiz_batch(p: BatchSubmitPayload, db: Session = Depends(get_db)):
+    """
+    Upload attempts queued on a device while it was offline. Every attempt
+    needs a client_key; attempts already saved under their key are
+    reported as duplicates, so a failed upload can simply be retried.
+    """
+    if len(p.attempts) > submissions.SUBMIT_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {submissions.SUBMIT_BATCH_MAX} attempts per batch")
+    if any(not a.client_key for a in p.attempts):
+        raise HTTPException(status_code=422, detail="Every attempt in a batch needs a client_key")
+    results = submissions.save_attempts(db, p.attempts)
+    return {
+        "saved": sum(r["status"] == "saved" for r in results),
+        "duplicates": sum(r["status"] == "duplicate" for r in results),
+        "results": results,
+    }
+
+
+@router.get("/due")
+def due_reviews(profile_id: int, limit: int = 5, subject: str | None = None, db: Session = Depends(get_db)):
+    """Topics the child should review next (spaced repetition), overdue first."""
     if subject:
-        q = q.filter(models.QuizAttempt.subject == subject)
-    attempts = q.order_by(models.QuizAttempt.taken_at.desc()).limit(limit).all()
-    return [
+        subject = catalog.subject(subject) or subject
+    return review.due(db, profile_id, max(1, min(limit, 50)), subject)
+
+
+def _history_cursor(taken_at: datetime.datetime, attempt_id: int) -> str:
+    return f"{taken_at.isoformat()},{attempt_id}"
+
+
+@router.get("/recent", response_model=list[AttemptRow])
+def recent_attempts(profile_id: int, subject: str | None = None, limit: int = 10,
+                    before: str | None = None, db: Session = Depends(get_db)):
+    """
+    Return recent quiz attempts for a profile, newest first, optionally
+    filtered by subject. Pages are keyset-based: pass the X-Next-Cursor
+    header of one page as `before` to get the next, which starts right
+    after that (taken_at, id) on the history index instead of skipping
+    rows, so page 50 costs what page 1 does.
+    """
+    A = models.QuizAttempt
+    q = db.query(A.id, A.subject, A.topic, A.bloom_level, A.score, A.taken_at).filter(A.child_id == profile_id)
+    if subject:
+        q = q.filter(A.subject == subject)
+    if before:
+        try:
+            taken, _, last_id = before.rpartition(",")
+            taken, last_id = datetime.datetime.fromisoformat(taken), int(last_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Bad history cursor")
+        # The first term is the index range; the second only trims rows sharing the cursor's time
+        q = q.filter(A.taken_at <= taken, (A.taken_at < taken) | (A.id < last_id))
+    rows = q.order_by(A.taken_at.desc(), A.id.desc()).limit(limit).all()
+    headers = {}
+    if rows and len(rows) == limit and rows[-1].taken_at:
+        headers["X-Next-Cursor"] = _history_cursor(rows[-1].taken_at, rows[-1].id)
+    return OrjsonResponse([row._asdict() for row in rows], headers=headers)
+
+
+@router.get("/history/summary", response_model=list[SubjectSummary])
+def history_summary(profile_id: int, db: Session = Depends(get_db)):
+    """Per-subject attempt count, average score and last attempt time, from one GROUP BY."""
+    A = models.QuizAttempt
+    rows = (
+        db.query(A.subject, func.count(A.id), func.avg(A.score), func.max(A.taken_at))
+        .filter(A.child_id == profile_id)
+        .group_by(A.subject)
+        .order_by(A.subject)
+        .all()
+    )
+    return OrjsonResponse([
         {
-            "id": a.id,
-            "subject": a.subject,
-            "topic": a.topic,
-            "bloom_level": a.bloom_level,
-            "score": a.score,
-            "taken_at": a.taken_at.isoformat() if a.taken_at else None,
+            "subject": subject,
+            "attempts": attempts,
+            "avg_score": round(avg, 4) if avg is not None else None,
+            "last_taken_at": last,
         }
-        for a in attempts
-    ]
+        for subject, attempts, avg, last in rows
+    ])
 
 
-@router.get("/attempt/{attempt_id}")
+@router.get("/progress", response_model=ProgressOut)
+def topic_progress(profile_id: int, grade: int | None = None, subject: str | None = None,
+                   db: Session = Depends(get_db)):
+    """
+    Attempts, recent score, mastery and status for every catalog topic of
+    the child's grade (the profile's grade unless `grade` is given),
+    grouped by subject, in one response. Cached per child until the child's
+    next submit is saved.
+    """
+    if grade is None:
+        grade = progress.child_grade(db, profile_id)
+        if grade is None:
+            raise HTTPException(status_code=404, detail="Profile not found or has no grade")
+    if subject:
+        subject = catalog.subject(subject) or subject
+    return OrjsonResponse(progress.progress(db, profile_id, grade, subject))
+
+
+@router.get("/attempt/{attempt_id}", response_model=AttemptOut)
 def get_attempt(attempt_id: int, db: Session = Depends(get_db)):
-    a = db.query(models.QuizAttempt).filter(models.QuizAttempt.id == attempt_id).first()
+    A, D = models.QuizAttempt, models.QuizAttemptDetail
+    a = (db.query(A.id, A.child_id, A.subject, A.topic, A.bloom_level, A.score, A.taken_at)
+         .filter(A.id == attempt_id).first())
     if not a:
         raise HTTPException(status_code=404, detail="Attempt not found")
     details = (
-        db.query(models.QuizAttemptDetail)
-        .filter(models.QuizAttemptDetail.attempt_id == attempt_id)
-        .order_by(models.QuizAttemptDetail.question_index.asc())
+        db.query(D.question_index, D.question_id, D.picked_idx, D.correct_idx)
+        .filter(D.attempt_id == attempt_id)
+        .order_by(D.question_index.asc())
         .all()
     )
-    return {
+    text = questions.texts(db, [d.question_id for d in details])  # decoded options, cached per question
+    out = []
+    for d in details:
+        stem, options, explanation = text.get(d.question_id, (None, [], ""))
+        out.append({
+            "question_index": d.question_index,
+            "stem": stem,
+            "options": options,
+            "picked_idx": d.picked_idx,
+            "correct_idx": d.correct_idx,
+            "explanation": explanation,
+        })
+    return OrjsonResponse({
         "id": a.id,
         "profile_id": a.child_id,
         "subject": a.subject,
         "topic": a.topic,
         "bloom_level": a.bloom_level,
         "score": a.score,
-        "taken_at": a.taken_at.isoformat() if a.taken_at else None,
-        "details": [
-            {
-                "question_index": d.question_index,
-                "stem": d.stem,
-                "options": json.loads(d.options_json or "[]"),
-                "picked_idx": d.picked_idx,
-                "correct_idx": d.correct_idx,
-                "explanation": d.explanation or "",
-            }
-            for d in details
-        ],
-    }
+        "taken_at": a.taken_at,
+        "details": out,
+    })
@@ -0,0 +1,172 @@
+# backend/submissions.py
+import os, json, datetime
+
+from sqlalchemy import and_, insert, inspect, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models, questions, learner_stats, mastery, progress, review
+
+# -------------------------------------------------------------
+# SAVING QUIZ ATTEMPTS
+# -------------------------------------------------------------
+# One write path for /quiz/submit and /quiz/submit/batch. Attempts and
+# their answers go in with executemany inserts (question text once per
+# distinct text, through backend/questions.py); learner_stats,
+# topic_mastery and review_schedule are folded in attempt time order; all
+# of it lands in one transaction. Attempts carrying a client_key (made up
+# by the device, e.g. a UUID) are saved once: a retried upload gets the
+# original attempt ids back instead of a second copy.
+SUBMIT_BATCH_MAX = int(os.getenv("QUIZ_SUBMIT_BATCH_MAX", 500))
+KEY_LOOKUP_CHUNK = 500  # stay under SQLite's bound-parameter limit
+
+
+def _existing(db: Session, keys: list[str]) -> dict[str, int]:
+    """client_key -> attempt id for keys that are already saved."""
+    A = models.QuizAttempt
+    found = {}
+    for lo in range(0, len(keys), KEY_LOOKUP_CHUNK):
+        found.update(db.query(A.client_key, A.id).filter(A.client_key.in_(keys[lo:lo + KEY_LOOKUP_CHUNK])))
+    return found
+
+
+def _naive_utc(when: datetime.datetime) -> datetime.datetime:
+    """Times are stored as naive UTC; devices may send "...Z" or "+03:00"."""
+    if when.tzinfo is None:
+        return when
+    return when.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _detail_rows(db: Session, attempt_details: list[tuple[int, list]]) -> list[dict]:
+    """quiz_attempt_details rows for (attempt_id, details) pairs, question text stored via questions.ids."""
+    flat = [(attempt_id, d) for attempt_id, details in attempt_details for d in (details or [])]
+    question_ids = questions.ids(db, [(d.stem, json.dumps(d.options or []), d.explanation or "") for _, d in flat])
+    return [
+        {
+            "attempt_id": attempt_id,
+            "question_index": d.question_index,
+            "question_id": question_id,
+            "picked_idx": d.picked_idx if d.picked_idx is not None else -1,
+            "correct_idx": d.correct_idx if d.correct_idx is not None else -1,
+        }
+        for (attempt_id, d), question_id in zip(flat, question_ids)
+    ]
+
+
+def _load_summaries(db: Session, attempts: list) -> list:
+    """
+    Pull the learner_stats / topic_mastery / review_schedule rows of the
+    batch's (child, subject, topic) triples into the session with one query
+    per table (per chunk of triples), and insert the missing ones
+    with one executemany each. A concurrent submit creating the same row
+    makes the flush fail; save_attempts then retries the batch. Returns the
+    rows: the session's identity map only holds weak references, so the
+    caller keeps them alive until the record() calls are done.
+    """
+    topics = list({(a.child_id, a.subject, a.topic) for a in attempts})
+    chunk = KEY_LOOKUP_CHUNK // 3  # three bound parameters per topic
+    loaded = []
+    for model in (models.LearnerStats, models.TopicMastery, models.ReviewSchedule):
+        for lo in range(0, len(topics), chunk):
+            # An OR of primary-key prefixes: SQLite answers each with an index search
+            # (a row-value IN (VALUES ...) would scan the table)
+            loaded += db.query(model).filter(or_(*(
+                and_(model.child_id == c, model.subject == s, model.topic == t)
+                for c, s, t in topics[lo:lo + chunk]))).all()
+    have = {(type(r), inspect(r).identity) for r in loaded}
+
+    missing = {}
+    for a in attempts:
+        topic = (a.child_id, a.subject, a.topic)
+        if (models.LearnerStats, topic) not in have:
+            missing[(models.LearnerStats, topic)] = models.LearnerStats(
+                child_id=a.child_id, subject=a.subject, topic=a.topic, attempts=0, window_json="[]",
+                ewma_score=None, last_bloom=None, last_taken_at=None)
+        if (models.ReviewSchedule, topic) not in have:
+            missing[(models.ReviewSchedule, topic)] = review._new(*topic)
+            missing[(models.ReviewSchedule, topic)].last_score = None
+            missing[(models.ReviewSchedule, topic)].last_taken_at = None
+        bloom = mastery.bloom_name(a.bloom_level)
+        if bloom is not None and (models.TopicMastery, topic + (bloom,)) not in have:
+            missing[(models.TopicMastery, topic + (bloom,))] = models.TopicMastery(
+                child_id=a.child_id, subject=a.subject, topic=a.topic, bloom=bloom,
+                p_mastery=mastery.KT_P_INIT, observations=0)
+    if missing:
+        db.add_all(missing.values())
+        db.flush()
+    return loaded + list(missing.values())
+
+
+def _save(db: Session, payloads: list) -> list[dict]:
+    now = datetime.datetime.utcnow()
+    keys = list({p.client_key for p in payloads if p.client_key})
+    saved = _existing(db, keys) if keys else {}
+
+    results, fresh, first_seen = [], [], set()
+    for p in payloads:
+        if p.client_key and (p.client_key in saved or p.client_key in first_seen):
+            results.append({"client_key": p.client_key, "attempt_id": saved.get(p.client_key), "status": "duplicate"})
+            continue
+        if p.client_key:
+            first_seen.add(p.client_key)
+        results.append({"client_key": p.client_key, "attempt_id": None, "status": "saved"})
+        fresh.append((len(results) - 1, p, models.QuizAttempt(
+            child_id=p.profile_id,
+            subject=p.subject,
+            topic=p.topic,
+            bloom_level=p.bloom_level or "Unknown",
+            score=p.score,
+            taken_at=min(_naive_utc(p.taken_at), now) if p.taken_at else now,
+            client_key=p.client_key,
+        )))
+    if not fresh:
+        return results
+
+    # Attempts need their ids before their details can be written. (SQLite
+    # cannot hand back RETURNING ids in insert order for a multi-row insert,
+    # so the ORM sends these one statement each; the ten-odd detail rows per
+    # attempt are the bulk of the write and go in as one executemany.)
+    db.add_all([a for _, _, a in fresh])
+    db.flush()
+    for i, _, attempt in fresh:
+        results[i]["attempt_id"] = attempt.id
+    details = _detail_rows(db, [(attempt.id, p.details) for _, p, attempt in fresh])
+    if details:
+        db.execute(insert(models.QuizAttemptDetail), details)
+
+    # Per-child summaries, oldest attempt first (offline uploads can be old).
+    # With every row the batch touches already in the session, the record()
+    # calls are identity-map hits instead of a SELECT + savepoint apiece.
+    summaries = _load_summaries(db, [a for _, _, a in fresh])  # noqa: F841 (kept alive)
+    with db.no_autoflush:
+        for _, p, attempt in sorted(fresh, key=lambda f: f[2].taken_at):
+            learner_stats.record(db, attempt)
+            mastery.record(db, attempt, mastery.observations(p.details, p.score))
+            review.record(db, attempt)
+
+    for r in results:  # duplicates inside this batch point at the copy just saved
+        if r["status"] == "duplicate" and r["attempt_id"] is None:
+            r["attempt_id"] = next(x["attempt_id"] for x in results
+                                   if x["client_key"] == r["client_key"] and x["status"] == "saved")
+    return results
+
+
+def save_attempts(db: Session, payloads: list) -> list[dict]:
+    """
+    Save SubmitPayload-shaped attempts in one transaction. Returns one
+    {"client_key", "attempt_id", "status": "saved" | "duplicate"} per input,
+    in input order. Cached /quiz/progress results of the children
+    involved are dropped once the attempts are committed.
+    """
+    try:
+        results = _save(db, payloads)
+        db.commit()
+    except IntegrityError:
+        # The same client_key was committed concurrently (a retry racing
+        # the original upload): start again and report it as a duplicate.
+        db.rollback()
+        results = _save(db, payloads)
+        db.commit()
+    if any(r["status"] == "saved" for r in results):
+        progress.cache.invalidate({p.profile_id for p in payloads})
+    return results
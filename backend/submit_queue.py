@@ -0,0 +1,298 @@
+# backend/submit_queue.py
+import os, glob, json, time, uuid, queue, logging, threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from sqlalchemy.exc import OperationalError
+
+from . import models, submissions
+from .database import SessionLocal
+
+log = logging.getLogger(__name__)
+
+# -------------------------------------------------------------
+# WRITE-BEHIND SUBMISSIONS
+# -------------------------------------------------------------
+# When a class finishes a quiz together, thirty /quiz/submit calls each
+# opening their own transaction queue up on SQLite's single writer lock
+# (latency spikes, "database is locked"). With the queue running,
+# /quiz/submit only appends the attempt to a spool file, fsyncs it and
+# answers 202 with a pending id; one writer thread saves whatever has
+# arrived every QUIZ_GROUP_COMMIT_MS (or sooner, once QUIZ_GROUP_COMMIT_MAX
+# attempts are waiting) in a single submissions.save_attempts transaction.
+#
+# The pending id doubles as the attempt's client_key, so replaying the
+# spool after a crash can never save an attempt twice: on startup every
+# spooled attempt is queued again, and ones that had already been
+# committed come back as duplicates. The spool is emptied whenever
+# nothing is waiting.
+#
+# Every worker process spools to its own slot, QUIZ_SUBMIT_SPOOL + ".<n>",
+# held under an exclusive lock on "<slot>.lock" for the life of the queue,
+# so one process emptying its spool never touches lines another has
+# acknowledged. On startup a queue takes the first free slot and also
+# adopts every other slot nobody holds (left by a worker that did not come
+# back), moving those lines into its own spool before replaying.
+#
+# Write-behind is opt-in (QUIZ_WRITE_BEHIND=1) because it changes the
+# /quiz/submit contract: 202 with attempt_id None and a pending id to poll
+# at /quiz/submit/{pending_id}, instead of 200 with the saved attempt.
+WRITE_BEHIND = os.getenv("QUIZ_WRITE_BEHIND", "0") == "1"
+SPOOL_PATH = os.getenv("QUIZ_SUBMIT_SPOOL", "./submit_spool.jsonl")
+GROUP_COMMIT_MS = int(os.getenv("QUIZ_GROUP_COMMIT_MS", 50))
+GROUP_COMMIT_MAX = int(os.getenv("QUIZ_GROUP_COMMIT_MAX", 200))
+RESULT_TTL = int(os.getenv("QUIZ_PENDING_RESULT_TTL", 1800))
+RETRY_DELAY = 1.0  # seconds between attempts while the database is locked
+
+PENDING, SAVED, DUPLICATE, FAILED = "pending", "saved", "duplicate", "failed"
+
+
+def _try_lock(f) -> bool:
+    """Take an exclusive, non-blocking lock on an open file; released when the file is closed."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+class SubmitQueue:
+    """Spool-backed in-process queue with a single group-committing writer thread."""
+
+    def __init__(self, spool_path: str = SPOOL_PATH, session_factory=SessionLocal,
+                 interval_ms: int = GROUP_COMMIT_MS, max_group: int = GROUP_COMMIT_MAX, ttl: int = RESULT_TTL):
+        self.spool_path = spool_path         # base name; this process spools to spool_path + ".<slot>"
+        self.path: str | None = None
+        self.session_factory = session_factory
+        self.interval = interval_ms / 1000
+        self.max_group = max_group
+        self.ttl = ttl
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()       # spool writes and the in-flight count
+        self._spool = None
+        self._slot_lock = None
+        self._in_flight = 0
+        self._written = 0                    # spool lines written ...
+        self._synced = 0                     # ... and known to be fsynced
+        self._syncing = False
+        self._synced_changed = threading.Condition()
+        self._results: dict[str, dict] = {}  # pending id -> status dict
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> int:
+        """Open the spool, queue whatever it still holds and start the writer. Returns attempts recovered."""
+        if self.running:
+            return 0
+        self._claim()
+        self._adopt()
+        recovered = self._recover()
+        self._spool = open(self.path, "a", encoding="utf-8")
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="submit-writer", daemon=True)
+        self._thread.start()
+        return recovered
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Commit everything queued, then stop the writer."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        if self._slot_lock is not None:
+            self._slot_lock.close()
+            self._slot_lock = None
+
+    def _claim(self) -> None:
+        """Lock the first slot no other process holds and make it this queue's spool."""
+        slot = 0
+        while True:
+            lock = open(f"{self.spool_path}.{slot}.lock", "a+")
+            if _try_lock(lock):
+                self._slot_lock, self.path = lock, f"{self.spool_path}.{slot}"
+                return
+            lock.close()
+            slot += 1
+
+    def _adopt(self) -> None:
+        """
+        Move the lines of every unheld slot (and of a pre-slot spool at the
+        bare spool_path) into this queue's spool, fsynced before the
+        originals are emptied. Two processes adopting the same lines is
+        harmless: the replay is idempotent.
+        """
+        orphans = [self.spool_path] if os.path.exists(self.spool_path) else []
+        for path in glob.glob(glob.escape(self.spool_path) + ".*"):
+            if path != self.path and path.rpartition(".")[2].isdigit():
+                orphans.append(path)
+        for path in orphans:
+            lock = None
+            if path != self.spool_path:
+                lock = open(path + ".lock", "a+")
+                if not _try_lock(lock):
+                    lock.close()
+                    continue  # a live worker's spool
+            try:
+                with open(path, encoding="utf-8") as f:
+                    lines = f.read()
+                if lines:
+                    with open(self.path, "a", encoding="utf-8") as mine:
+                        mine.write(lines if lines.endswith("\n") else lines + "\n")
+                        mine.flush()
+                        os.fsync(mine.fileno())
+                    log.info("Submit queue: adopted spool %s", path)
+                os.remove(path)
+            finally:
+                if lock is not None:
+                    lock.close()
+
+    def _recover(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        from .routes.quiz import SubmitPayload
+
+        recovered = 0
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line: never fsynced, so never acknowledged
+                self._track(entry["pending_id"], SubmitPayload(**entry["payload"]))
+                recovered += 1
+        return recovered
+
+    def enqueue(self, payload) -> str:
+        """
+        Make a SubmitPayload durable and queue it. Returns its pending id
+        (the payload's client_key, or a new one) once it is on disk.
+        """
+        pending_id = payload.client_key or uuid.uuid4().hex
+        payload = payload.model_copy(update={"client_key": pending_id})
+        line = json.dumps({"pending_id": pending_id, "payload": payload.model_dump(mode="json")})
+        with self._lock:
+            if self._results.get(pending_id, {}).get("status") == PENDING:
+                return pending_id  # a retry of an attempt that is still queued
+            self._spool.write(line + "\n")
+            self._spool.flush()
+            self._written += 1
+            seq = self._written
+            self._track(pending_id, payload)
+        self._sync(seq)
+        return pending_id
+
+    def _sync(self, seq: int) -> None:
+        """
+        Return once spool line `seq` is on disk. One caller fsyncs on behalf
+        of every line written so far while the others wait for it, so a
+        burst of submits shares a few fsyncs instead of queueing for one each.
+        """
+        with self._synced_changed:
+            while self._synced < seq:
+                if self._syncing:
+                    self._synced_changed.wait()
+                    continue
+                self._syncing, target = True, self._written
+                self._synced_changed.release()
+                try:
+                    os.fsync(self._spool.fileno())
+                finally:
+                    self._synced_changed.acquire()
+                    self._syncing = False
+                    self._synced_changed.notify_all()
+                self._synced = max(self._synced, target)
+
+    def _track(self, pending_id: str, payload) -> None:
+        self._in_flight += 1
+        self._results[pending_id] = {"pending_id": pending_id, "status": PENDING, "attempt_id": None,
+                                     "updated_at": time.time()}
+        self._queue.put((pending_id, payload))
+
+    def status(self, pending_id: str) -> dict | None:
+        """Where a pending id stands; falls back to the database once the in-memory result has expired."""
+        self._purge()
+        result = self._results.get(pending_id)
+        if result is not None:
+            return {k: v for k, v in result.items() if k != "updated_at"}
+        with self.session_factory() as db:
+            attempt_id = (db.query(models.QuizAttempt.id)
+                          .filter(models.QuizAttempt.client_key == pending_id).scalar())
+        if attempt_id is None:
+            return None
+        return {"pending_id": pending_id, "status": SAVED, "attempt_id": attempt_id}
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [k for k, r in self._results.items() if r["status"] != PENDING and r["updated_at"] < cutoff]
+            for k in expired:
+                del self._results[k]
+
+    def _run(self) -> None:
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                group = [self._queue.get(timeout=0.2)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.interval
+            while len(group) < self.max_group:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    group.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._commit(group)
+
+    def _commit(self, group: list[tuple[str, object]]) -> None:
+        while True:
+            try:
+                with self.session_factory() as db:
+                    results = submissions.save_attempts(db, [p for _, p in group])
+                break
+            except Exception as e:
+                if isinstance(e, OperationalError) and "locked" in str(e):
+                    log.warning("Submit queue: database locked; retrying %d attempts", len(group))
+                    time.sleep(RETRY_DELAY)
+                    continue
+                if len(group) == 1:
+                    log.exception("Submit queue: could not save attempt %s", group[0][0])
+                    results = [{"status": FAILED, "attempt_id": None}]
+                    self._dead_letter(group[0])
+                    break
+                # One bad attempt must not hold back the rest: save them one by one
+                for item in group:
+                    self._commit([item])
+                return
+
+        now = time.time()
+        with self._lock:
+            for (pending_id, _), r in zip(group, results):
+                self._results[pending_id] = {"pending_id": pending_id, "status": r["status"],
+                                             "attempt_id": r["attempt_id"], "updated_at": now}
+            self._in_flight -= len(group)
+            if self._in_flight == 0 and self._spool is not None:
+                self._spool.truncate(0)  # everything acknowledged is in the database
+
+    def _dead_letter(self, item: tuple[str, object]) -> None:
+        pending_id, payload = item
+        with open(self.spool_path + ".failed", "a", encoding="utf-8") as f:
+            f.write(json.dumps({"pending_id": pending_id, "payload": payload.model_dump(mode="json")}) + "\n")
+
+
+submit_queue = SubmitQueue()
@@ -0,0 +1,42 @@
+# backend/tests/test_engine_notebook.py
+import threading, time
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from transformers import LlamaConfig, LlamaForCausalLM
+
+from backend.bench.micro_batch import ByteTokenizer, load_engine
+
+
+@pytest.fixture(scope="module")
+def engine():
+    """The notebook's generation code on a tiny random Llama (see backend/bench/micro_batch.py)."""
+    torch.manual_seed(0)
+    tok = ByteTokenizer()
+    model = LlamaForCausalLM(LlamaConfig(
+        vocab_size=258, hidden_size=64, intermediate_size=192, num_hidden_layers=2, num_attention_heads=4,
+        num_key_value_heads=4, max_position_embeddings=4096, bos_token_id=tok.bos_token_id, eos_token_id=None,
+        pad_token_id=tok.pad_token_id,
+    )).eval()
+    return load_engine(model, tok)
+
+
+def test_batched_generation_matches_unbatched(engine):
+    """Padding between the shared prefix and the user part must not change what a prompt decodes to."""
+    assert engine["SHARE_PREFIX_IN_BATCH"]
+    assert engine["check_batched_generation"](n_tokens=16)
+
+
+def test_stream_waits_for_the_gpu(engine):
+    chunks = []
+    with engine["GPU_LOCK"]:
+        reader = threading.Thread(target=lambda: chunks.extend(
+            engine["generate_quiz_stream"]("Mathematics", 4, "Fractions", max_new_tokens=8)))
+        reader.start()
+        time.sleep(0.5)
+        assert not chunks  # a batch holds the GPU: the stream has not started decoding
+    reader.join(60)
+    assert not reader.is_alive() and chunks
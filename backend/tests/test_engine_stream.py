@@ -0,0 +1,14 @@
+# backend/tests/test_engine_stream.py
+import json
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def test_notebook_copy_matches_engine_stream():
+    """The engine notebook's early-stopping code must be a verbatim copy of backend/engine_stream.py."""
+    module = (ROOT / "backend" / "engine_stream.py").read_text(encoding="utf-8")
+    shared = module[module.index("REQ_KEYS = "):]
+    nb = json.loads((ROOT / "notebooks" / "smlmodel.ipynb").read_text(encoding="utf-8"))
+    cells = ["".join(c["source"]) for c in nb["cells"] if c["cell_type"] == "code"]
+    assert any(shared in cell for cell in cells), "notebooks/smlmodel.ipynb differs from backend/engine_stream.py"
@@ -0,0 +1,7 @@
+# backend/tests/test_query_plans.py
+from backend.migrations import check_plans
+
+
+def test_route_queries_use_indexes():
+    """Same check as `python -m backend.migrations check-plans`: no route query scans a whole table."""
+    assert check_plans() == []
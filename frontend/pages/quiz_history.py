@@ -26,17 +26,34 @@ def _update_query(profile, subject=None, grade=None, topic=None, review_attempt_
     st.query_params.update(params)
 
 
-def _fetch_attempts(profile_id: int, subject: str | None = None, limit: int = 100):
+PAGE_SIZE = 25
+
+
+def _fetch_summary(profile_id: int):
+    """Per-subject counts, average score and last attempt time."""
+    try:
+        r = requests.get(f"{BACKEND}/quiz/history/summary", params={"profile_id": profile_id}, timeout=15)
+        if r.status_code == 200:
+            return r.json() or []
+    except Exception:
+        pass
+    return []
+
+
+def _fetch_attempts(profile_id: int, subject: str | None = None, limit: int = PAGE_SIZE, before: str | None = None):
+    """One page of attempts, newest first, and the cursor for the next (older) page."""
     try:
         params = {"profile_id": profile_id, "limit": limit}
         if subject:
             params["subject"] = subject
+        if before:
+            params["before"] = before
         r = requests.get(f"{BACKEND}/quiz/recent", params=params, timeout=15)
         if r.status_code == 200:
-            return r.json() or []
+            return r.json() or [], r.headers.get("X-Next-Cursor")
     except Exception:
         pass
-    return []
+    return [], None
 
 
 def main():
@@ -52,9 +69,9 @@ def main():
     preferred_subject = st.session_state.get("selected_subject")
     grade = st.session_state.get("selected_grade")
 
-    # Build the subject list from attempts
-    all_attempts = _fetch_attempts(prof["id"], subject=None, limit=200)
-    subjects = sorted({a.get("subject") for a in all_attempts if a.get("subject")})
+    # Build the subject list from the per-subject summary
+    summary = {s["subject"]: s for s in _fetch_summary(prof["id"]) if s.get("subject")}
+    subjects = sorted(summary)
     if preferred_subject and preferred_subject not in subjects:
         subjects = [preferred_subject] + subjects
 
@@ -74,10 +91,22 @@ def main():
     # Keep query params in sync so refresh/back preserves context
     _update_query(prof, subject, grade)
 
-    # Fetch attempts for chosen subject
-    attempts = _fetch_attempts(prof["id"], subject=subject, limit=100)
+    # Page through the chosen subject's attempts: cursors[i] opens page i
+    pager = st.session_state.get("history_pager")
+    if not pager or pager.get("profile_id") != prof["id"] or pager.get("subject") != subject:
+        pager = {"profile_id": prof["id"], "subject": subject, "cursors": [None], "page": 0}
+        st.session_state["history_pager"] = pager
+    attempts, next_cursor = _fetch_attempts(prof["id"], subject=subject, before=pager["cursors"][pager["page"]])
 
     st.markdown(f"### {subject}")
+    stats = summary.get(subject)
+    if stats:
+        avg = stats.get("avg_score")
+        st.caption(
+            f"{stats['attempts']} quizzes"
+            + (f" · average {int(avg * 100)}%" if avg is not None else "")
+            + (f" · last taken {stats['last_taken_at']}" if stats.get("last_taken_at") else "")
+        )
     if not attempts:
         st.caption("No previous quizzes for this subject yet.")
     else:
@@ -101,6 +130,18 @@ def main():
                     _update_query(prof, subject, grade, a.get("topic"), attempt_id)
                     st.switch_page("pages/quiz_page.py")
 
+        newer, _, older = st.columns([2, 6, 2])
+        with newer:
+            if pager["page"] > 0 and st.button("◀ Newer"):
+                pager["page"] -= 1
+                st.rerun()
+        with older:
+            if next_cursor and st.button("Older ▶"):
+                del pager["cursors"][pager["page"] + 1:]
+                pager["cursors"].append(next_cursor)
+                pager["page"] += 1
+                st.rerun()
+
     st.markdown("---")
     if st.button("⬅️ Back to Subject"):
         st.session_state["selected_subject"] = subject
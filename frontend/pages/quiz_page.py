@@ -1,8 +1,12 @@
 # frontend/pages/quiz_page.py
 import streamlit as st
 import requests
+import json
+import time
 
 BACKEND = st.secrets.get("BACKEND_URL", "http://localhost:8000")
+JOB_POLL_INTERVAL = 2   # seconds between status checks
+JOB_POLL_LIMIT = 900    # give up waiting after this many seconds
 
 # --- Context sync helpers ---
 def _update_query(profile, subject, grade, topic=None, review_attempt_id=None):
@@ -27,6 +31,71 @@ def _update_query(profile, subject, grade, topic=None, review_attempt_id=None):
     st.query_params.update(params)
 
 
+# --- Generation job helpers ---
+def _start_job(payload):
+    r = requests.post(f"{BACKEND}/quiz/jobs", json=payload, timeout=20)
+    r.raise_for_status()
+    return r.json()["job_id"]
+
+
+def _wait_for_job(job_id):
+    """Poll a generation job until it finishes; dropped polls are simply retried."""
+    deadline = time.time() + JOB_POLL_LIMIT
+    while time.time() < deadline:
+        try:
+            r = requests.get(f"{BACKEND}/quiz/jobs/{job_id}", timeout=15)
+        except requests.RequestException:
+            time.sleep(JOB_POLL_INTERVAL)
+            continue
+        if r.status_code == 404:
+            raise RuntimeError("This quiz request expired. Please generate again.")
+        data = r.json()
+        if data.get("status") == "done":
+            return data.get("result")
+        if data.get("status") == "error":
+            raise RuntimeError(data.get("error") or "Quiz generation failed")
+        time.sleep(JOB_POLL_INTERVAL)
+    raise TimeoutError("The quiz is taking too long. Please try again.")
+
+
+def _stream_quiz(payload, container):
+    """
+    Read /quiz/generate/stream (NDJSON) and show each question as soon as it
+    arrives. Returns the assembled quiz, or None if the stream ended in an
+    error or without its `done` line: a quiz cut off partway is discarded
+    and the caller generates a whole one as a job instead.
+    """
+    quiz = {"metadata": {}, "questions": []}
+    with requests.post(f"{BACKEND}/quiz/generate/stream", json=payload, stream=True, timeout=(10, 900)) as r:
+        r.raise_for_status()
+        for line in r.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+            msg = json.loads(line)
+            kind = msg.get("type")
+            if kind == "metadata":
+                quiz["metadata"] = {k: v for k, v in msg.items() if k != "type"}
+            elif kind == "question":
+                q = msg["question"]
+                quiz["questions"].append(q)
+                with container:
+                    st.markdown(f"**Q{len(quiz['questions'])}. {q['stem']}**")
+                    for opt in q.get("options", []):
+                        st.caption(f"• {opt}")
+            elif kind == "error":
+                return None
+            elif kind == "done":
+                return quiz if quiz["questions"] else None
+    return None
+
+
+def _set_job_param(job_id):
+    if job_id:
+        st.query_params["quiz_job_id"] = job_id
+    else:
+        st.query_params.pop("quiz_job_id", None)
+
+
 def main():
     prof = st.session_state.get("selected_profile")
     grade = st.session_state.get("selected_grade")
@@ -99,12 +168,38 @@ def main():
             "topic": topic,
             "bloom_level": None if bloom_choice == "Auto" else bloom_choice,
         }
+        st.session_state.pop("current_quiz", None)
+        # Stream questions in as they are generated; fall back to a polled job
+        try:
+            with st.status("Generating questions...", expanded=True) as status:
+                quiz = _stream_quiz(payload, st.container())
+                if quiz:
+                    status.update(label="Questions ready", state="complete", expanded=False)
+                else:
+                    status.update(label="Streaming stopped early; preparing the full quiz...",
+                                  state="error", expanded=False)
+        except Exception:
+            quiz = None
+        if quiz:
+            st.session_state["current_quiz"] = quiz
+            st.rerun()
+        try:
+            job_id = _start_job(payload)
+            st.session_state["quiz_job_id"] = job_id
+            _set_job_param(job_id)
+        except Exception as e:
+            st.error(f"Failed to generate quiz: {e}")
+
+    # Resume a pending generation (also after a reload or dropped connection)
+    job_id = st.session_state.get("quiz_job_id") or st.query_params.get("quiz_job_id")
+    if job_id and not st.session_state.get("current_quiz"):
         try:
-            resp = requests.post(f"{BACKEND}/quiz/generate", json=payload, timeout=900)
-            resp.raise_for_status()
-            st.session_state["current_quiz"] = resp.json()
+            with st.spinner("Preparing your quiz..."):
+                st.session_state["current_quiz"] = _wait_for_job(job_id)
         except Exception as e:
             st.error(f"Failed to generate quiz: {e}")
+        st.session_state.pop("quiz_job_id", None)
+        _set_job_param(None)
 
     quiz = st.session_state.get("current_quiz")
     if quiz:
@@ -170,15 +265,16 @@ def main():
                     f"{BACKEND}/quiz/submit",
                     json={
                         "profile_id": prof["id"],
-                        "subject": subject,
-                        "topic": topic,
+                        # canonical catalog names, as resolved by the backend
+                        "subject": (quiz.get("metadata", {}) or {}).get("subject") or subject,
+                        "topic": (quiz.get("metadata", {}) or {}).get("topic") or topic,
                         "bloom_level": (quiz.get("metadata", {}) or {}).get("bloom") or "Unknown",
                         "score": score,
                         "details": details,
                     },
                     timeout=15,
                 )
-                if resp.status_code not in (200, 201):
+                if resp.status_code not in (200, 201, 202):  # 202: queued, saved shortly
                     st.warning("Saved locally; backend submit failed.")
             except Exception as e:
                 st.warning(f"Saved locally; submit error: {e}")
@@ -1,6 +1,9 @@
 import streamlit as st
+import requests
 from datetime import datetime
 
+BACKEND = st.secrets.get("BACKEND_URL", "http://localhost:8000")
+
 st.set_page_config(page_title="Student Dashboard", layout="wide")
 
 
@@ -20,6 +23,41 @@ def _update_query(profile, subject=None, grade=None):
     st.query_params.update(params)
 
 
+SUBJECT_CARDS = [  # (subject, icon, button label)
+    ("Mathematics", "🧮", "➡️ Go to Math"),
+    ("English", "📖", "➡️ Go to English"),
+    ("Science", "🔬", "➡️ Go to Science"),
+]
+
+
+def _fetch_progress(profile: dict) -> dict:
+    """{subject: progress} for the child's grade from one /quiz/progress call; {} if unavailable."""
+    try:
+        r = requests.get(f"{BACKEND}/quiz/progress", params={"profile_id": profile.get("id")}, timeout=10)
+        if r.status_code == 200:
+            return {s["subject"]: s for s in r.json().get("subjects", [])}
+    except requests.RequestException:
+        pass
+    return {}
+
+
+def _subject_status(progress: dict | None) -> tuple[str, str]:
+    """(status line, card colour) summarizing a subject's topic statuses."""
+    if not progress:
+        return "Progress unavailable", "#f1f3f5"
+    counts = progress.get("status_counts", {})
+    started = sum(counts.values()) - counts.get("not_started", 0)
+    mastered = f" ({int((progress.get('overall') or 0) * 100)}% mastered)"
+    if not started:
+        return "🌱 Ready to start!", "#f1f3f5"
+    if counts.get("needs_practice", 0) >= max(1, counts.get("doing_well", 0)):
+        n = counts["needs_practice"]
+        return f"⚠️ {n} topic{'s' if n != 1 else ''} need{'s' if n == 1 else ''} more practice{mastered}", "#fff3cd"
+    if counts.get("doing_well", 0) >= counts.get("good_progress", 0):
+        return f"✅ Going great!{mastered}", "#d3f9d8"
+    return f"✨ Good progress{mastered}", "#e7f5ff"
+
+
 def main():
     profile = st.session_state.get("selected_profile")
 
@@ -38,59 +76,24 @@ def main():
     st.markdown("---")
     st.subheader("Your Learning Subjects")
 
-    col1, col2, col3 = st.columns(3)
-
-    # --- Math Card ---
-    with col1:
-        st.markdown(
-            """
-            <div style="background:#fff3cd; padding:30px; border-radius:20px; text-align:center;">
-                <div style="font-size:50px;">🧮</div>
-                <h3>Mathematics</h3>
-                <p>⚠️ Needs more practice!</p>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-        if st.button("➡️ Go to Math"):
-            st.session_state["selected_subject"] = "Mathematics"
-            _update_query(profile, "Mathematics", profile.get("grade"))
-            st.switch_page("pages/subject_page.py")
-
-    # --- English Card ---
-    with col2:
-        st.markdown(
-            """
-            <div style="background:#e7f5ff; padding:30px; border-radius:20px; text-align:center;">
-                <div style="font-size:50px;">📖</div>
-                <h3>English</h3>
-                <p>✅ Going great!</p>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-        if st.button("➡️ Go to English"):
-            st.session_state["selected_subject"] = "English"
-            _update_query(profile, "English", profile.get("grade"))
-            st.switch_page("pages/subject_page.py")
-
-    # --- Science Card ---
-    with col3:
-        st.markdown(
-            """
-            <div style="background:#d3f9d8; padding:30px; border-radius:20px; text-align:center;">
-                <div style="font-size:50px;">🔬</div>
-                <h3>Science</h3>
-                <p>⚠️ Needs more attention!</p>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-        if st.button("➡️ Go to Science"):
-            st.session_state["selected_subject"] = "Science"
-            _update_query(profile, "Science", profile.get("grade"))
-            st.switch_page("pages/subject_page.py")
-
+    progress = _fetch_progress(profile)
+    for col, (subject, icon, label) in zip(st.columns(3), SUBJECT_CARDS):
+        status_text, card_color = _subject_status(progress.get(subject))
+        with col:
+            st.markdown(
+                f"""
+                <div style="background:{card_color}; padding:30px; border-radius:20px; text-align:center;">
+                    <div style="font-size:50px;">{icon}</div>
+                    <h3>{subject}</h3>
+                    <p>{status_text}</p>
+                </div>
+                """,
+                unsafe_allow_html=True,
+            )
+            if st.button(label):
+                st.session_state["selected_subject"] = subject
+                _update_query(profile, subject, profile.get("grade"))
+                st.switch_page("pages/subject_page.py")
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,6 @@
 # frontend/pages/subject_page.py
 import streamlit as st
-import random
+import time
 import requests
 
 BACKEND = st.secrets.get("BACKEND_URL", "http://localhost:8000")
@@ -56,62 +56,27 @@ def _sync_to_query(profile: dict | None, subject: str | None, grade: str | None,
     st.query_params.clear()
     st.query_params.update(params)
 
-# ---------- TOPICS: keep the full production set here ----------
-TOPICS = {
-    "Grade 4": {
-        "Mathematics": [
-            "Numbers", "Whole Numbers", "Addition", "Subtraction", "Multiplication", "Division",
-            "Fractions", "Decimals", "Measurement", "Length", "Area", "Mass", "Volume", "Capacity",
-            "Time", "Money", "Geometry", "Angles", "Position and Direction", "2D-Shapes",
-            "Algebra", "Data Handling"
-        ],
-        "English": [
-            "The Family", "Family Celebrations", "Etiquette", "Accidents: First Aid", "Nutrition: Balanced Diet",
-            "Internet: Email", "Technology: Cyber Safety", "The Farm", "HIV and AIDS",
-            "Hygiene and Sanitation", "Sports: My Favourite Sport", "Clean Environment", "Money"
-        ],
-        "Science": [
-            "Characteristics of Plants", "Animals", "Human Body", "Air Pollution", "Water Pollution",
-            "Digital Devices", "Coding", "States of Matter", "Properties of Matter", "Forces and its Effects",
-            "Energy", "Machines", "Earth and Space"
-        ]
-    },
-    "Grade 5": {
-        "Mathematics": [
-            "Numbers – Whole Numbers", "Addition", "Subtraction", "Multiplication", "Division", "Fractions",
-            "Decimals", "Measurement – Length", "Area", "Volume", "Capacity", "Mass", "Time", "Money",
-            "Geometry – Lines – Angles", "3D Objects", "Data Representation", "Algebra – Simple Equations"
-        ],
-        "English": [
-            "Child Rights and Responsibilities", "National Celebrations", "Etiquette Table Manners",
-            "Road Accidents Prevention", "Traditional Food", "Jobs and Occupations",
-            "Technology – Learning Through Technology", "The Farm – Cash Crops", "Leisure Time Activities",
-            "Health – Communicable Diseases", "Sports – Appreciating Talents", "Environmental Pollution",
-            "Money – Savings and Banking"
-        ],
-        "Science": [
-            "Living Things", "Health Education: Diseases", "Environment", "Computing Devices: Handling Data",
-            "Matter", "Force and Energy", "Earth and Space"
-        ]
-    },
-    "Grade 6": {
-        "Mathematics": [
-            "Whole Numbers", "Multiplication", "Division", "Fractions", "Decimals", "Length", "Area",
-            "Capacity", "Mass", "Time", "Money", "Lines", "Angles", "3D Objects", "Bar Graphs", "Inequalities"
-        ],
-        "English": [
-            "Child Labour", "Cultural and Religious Celebrations", "Etiquette – Telephone",
-            "Emergency Rescue Services", "Our Tourist Attraction", "Jobs and Occupations – Work Ethics",
-            "Technology – Scientific Innovations", "The Farm – Animal Safety and Care", "Lifestyle – Diseases",
-            "Proper Use of Leisure Time", "Sports – Indoor Games", "Environmental Conservation", "Money – Trade"
-        ],
-        "Science": [
-            "Plants", "Animals", "Human Circulatory System", "Reproductive System", "Water Conservation",
-            "Handling Data – Spreadsheets", "Properties of Matter", "Composition of Air", "Force",
-            "Light Energy", "Machines"
-        ]
-    }
-}
+# ---------- TOPICS: served by the backend catalog (/catalog) ----------
+CATALOG_REVALIDATE = 300  # seconds between ETag checks against the backend
+
+@st.cache_resource
+def _catalog_cache() -> dict:
+    return {"etag": None, "topics": {}, "checked_at": 0.0}
+
+def load_topics() -> dict:
+    """{"Grade 4": {"Mathematics": [...]}, ...}; revalidated with the catalog's ETag."""
+    cache = _catalog_cache()
+    if cache["topics"] and time.time() - cache["checked_at"] < CATALOG_REVALIDATE:
+        return cache["topics"]
+    headers = {"If-None-Match": cache["etag"]} if cache["etag"] else {}
+    try:
+        r = requests.get(f"{BACKEND}/catalog", headers=headers, timeout=10)
+        if r.status_code == 200:
+            cache.update(etag=r.headers.get("ETag"), topics=r.json().get("topics", {}))
+        cache["checked_at"] = time.time()
+    except requests.RequestException:
+        pass  # keep the last catalog we saw
+    return cache["topics"]
 
 # ---------- helper: normalize subject and grade ----------
 def normalize_subject(raw):
@@ -144,6 +109,40 @@ def normalize_grade(raw_grade):
             return f"Grade {token}"
     return None
 
+# ---------- progress: one /quiz/progress call per render ----------
+STATUS_CARDS = {
+    "not_started": ("🌱 Not started yet", "#f1f3f5"),
+    "needs_practice": ("⚠️ Needs practice", "#fff3cd"),
+    "good_progress": ("✨ Good progress", "#e7f5ff"),
+    "doing_well": ("✅ Doing well", "#d3f9d8"),
+}
+
+def fetch_progress(profile_id, grade: str, subject: str) -> dict | None:
+    """Mastery and status of every topic of `subject` in `grade`, or None if the backend is unreachable."""
+    try:
+        r = requests.get(
+            f"{BACKEND}/quiz/progress",
+            params={"profile_id": profile_id, "grade": grade.split()[-1], "subject": subject},
+            timeout=10,
+        )
+        if r.status_code == 200:
+            subjects = r.json().get("subjects") or []
+            return subjects[0] if subjects else None
+    except requests.RequestException:
+        pass
+    return None
+
+def start_quiz(profile: dict, subject: str, grade: str, topic: str):
+    """Save the quiz context and open the quiz page for `topic`."""
+    # ensure we do not land in review mode
+    st.session_state.pop("review_attempt_id", None)
+    st.session_state["selected_topic"] = topic
+    st.session_state["selected_subject"] = subject
+    st.session_state["selected_grade"] = grade
+    st.success(f"Preparing quiz for '{topic}'...")
+    _sync_to_query(profile, subject, grade, topic)
+    st.switch_page("pages/quiz_page.py")
+
 # ---------- main ----------
 def main():
     # Restore context from URL if present
@@ -181,16 +180,23 @@ def main():
     st.title(f"{subject} - {grade}")
     st.markdown(f"### 👋 Welcome, {profile.get('name', 'Student')}!")
 
-    # recent progress mock
+    progress = fetch_progress(profile.get("id"), grade, subject)
+    by_topic = {t["topic"]: t for t in (progress or {}).get("topics", [])}
+
     st.markdown("#### Your Recent Progress")
-    prog_val = st.session_state.get("mock_progress", None)
-    if prog_val is None:
-        prog_val = random.uniform(0.45, 0.88)
-        st.session_state["mock_progress"] = prog_val
-    st.progress(prog_val)
-    st.caption(f"Overall progress indicator: {int(prog_val*100)}%")
+    if progress is None:
+        st.caption("Progress unavailable right now.")
+    else:
+        counts = progress.get("status_counts", {})
+        st.progress(min(max(progress.get("overall") or 0.0, 0.0), 1.0))
+        st.caption(
+            f"Overall mastery: {int((progress.get('overall') or 0) * 100)}% — "
+            f"{counts.get('doing_well', 0)} doing well, {counts.get('needs_practice', 0)} need practice, "
+            f"{counts.get('not_started', 0)} not started"
+        )
 
     # Determine topics using normalized keys
+    TOPICS = load_topics()
     topics = TOPICS.get(grade, {}).get(subject, [])
     if not topics:
         # Helpful message + debug
@@ -238,23 +244,29 @@ def main():
                 st.caption("Could not load recent history.")
     except Exception:
         st.caption("Recent history unavailable.")
+    # Topics the spaced-repetition schedule says are due again
+    due = sorted((t for t in by_topic.values() if t.get("due") and t["topic"] in topics),
+                 key=lambda t: t.get("due_at") or "")[:3]
+    if due:
+        st.markdown("#### 🔁 Due for Review")
+        for d in due:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.write(f"{d['topic']} — recent score {int((d.get('score') or 0) * 100)}%")
+            with col2:
+                if st.button("Review now", key=f"due::{d['topic']}"):
+                    start_quiz(profile, subject, grade, d["topic"])
+
     st.info("Click a topic's Start button to open the quiz for that topic.")
 
     # layout topic cards with Start Quiz buttons
     cols = st.columns(3)
     for i, topic in enumerate(topics):
         with cols[i % 3]:
-            # small status mock: needs attention if random < 0.35
-            status_score = random.random()
-            if status_score < 0.35:
-                status_text = "⚠️ Needs practice"
-                card_color = "#fff3cd"
-            elif status_score < 0.75:
-                status_text = "✨ Good progress"
-                card_color = "#e7f5ff"
-            else:
-                status_text = "✅ Doing well"
-                card_color = "#d3f9d8"
+            tp = by_topic.get(topic, {})
+            status_text, card_color = STATUS_CARDS.get(tp.get("status"), STATUS_CARDS["not_started"])
+            if tp.get("attempts"):
+                status_text += f" · {int((tp.get('mastery') or 0) * 100)}% mastered"
 
             st.markdown(
                 f"""
@@ -269,17 +281,7 @@ def main():
             # Start Quiz button for this topic:
             btn_key = f"start_quiz::{subject}::{grade}::{topic}"
             if st.button("▶️ Start Quiz", key=btn_key):
-                # save context for quiz page
-                # ensure we do not land in review mode
-                if "review_attempt_id" in st.session_state:
-                    st.session_state.pop("review_attempt_id", None)
-                st.session_state["selected_topic"] = topic
-                st.session_state["selected_subject"] = subject
-                st.session_state["selected_grade"] = grade
-                st.success(f"Preparing quiz for '{topic}'...")
-                # switch to quiz page when implemented (placeholder)
-                _sync_to_query(profile, subject, grade, topic)
-                st.switch_page("pages/quiz_page.py")
+                start_quiz(profile, subject, grade, topic)
 
     st.markdown("---")
     st.subheader("📈 Recent Quiz History (sample)")